@@ -0,0 +1,43 @@
+""" Unit tests for the HTML parser
+"""
+from unittest import TestCase
+
+from lxml import etree
+
+from xml_utils.commons.exceptions import HTMLError
+from xml_utils.html_tree.parser import parse_html, parse_many
+
+
+class TestParseHtml(TestCase):
+    def test_parse_html_returns_parent_element(self):
+        element = parse_html("text <b>bold</b>", "div")
+        self.assertEqual(etree.tostring(element), b"<div>text <b>bold</b></div>")
+
+    def test_parse_html_invalid_fragment_raises_html_error(self):
+        with self.assertRaises(HTMLError):
+            parse_html("<b>bold", "div")
+
+    def test_parse_html_closing_parent_raises_html_error(self):
+        with self.assertRaises(HTMLError):
+            parse_html("</div><div>", "div")
+
+    def test_parse_html_after_error_parses_fragment(self):
+        with self.assertRaises(HTMLError):
+            parse_html("<b>", "div")
+        self.assertEqual(etree.tostring(parse_html("<i>ok</i>", "div")), b"<div><i>ok</i></div>")
+
+
+class TestParseMany(TestCase):
+    def test_parse_many_list_returns_list(self):
+        elements = parse_many(["a", "<b>b</b>"], "p")
+        self.assertEqual([etree.tostring(element) for element in elements], [b"<p>a</p>", b"<p><b>b</b></p>"])
+
+    def test_parse_many_dict_returns_dict(self):
+        elements = parse_many({"title": "a", "description": "b"}, "p")
+        self.assertEqual(sorted(elements), ["description", "title"])
+
+    def test_parse_many_raises_html_error_listing_invalid_fragments(self):
+        with self.assertRaises(HTMLError) as context:
+            parse_many({"title": "<b>", "description": "ok", "notes": "&nbsp;"}, "p")
+        self.assertEqual([line.split(":")[0] for line in context.exception.message.split("\n")],
+                         ["title", "notes"])
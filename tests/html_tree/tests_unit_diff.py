@@ -0,0 +1,86 @@
+""" Unit tests for the bounded diff of HTML fragments
+"""
+from unittest import TestCase
+
+from lxml.html.diff import htmldiff
+
+from xml_utils.html_tree.diff import HTMLDiffEngine, split_blocks, split_wrapper
+
+PARAGRAPHS = ['<p>Paragraph %d with <b>bold</b> words.</p>\n' % index for index in range(50)]
+
+
+class TestSplitBlocks(TestCase):
+    def test_split_blocks_keeps_inline_content_together(self):
+        self.assertEqual(split_blocks('text <b>bold</b> <p>block</p>tail<i>it</i>'),
+                         ['text <b>bold</b> ', '<p>block</p>tail', '<i>it</i>'])
+
+    def test_split_blocks_escapes_leading_text(self):
+        self.assertEqual(split_blocks('&lt;script&gt;alert(1)&lt;/script&gt; intro<p>block</p>'),
+                         ['&lt;script&gt;alert(1)&lt;/script&gt; intro', '<p>block</p>'])
+
+    def test_split_blocks_of_empty_fragment_returns_empty_list(self):
+        self.assertEqual(split_blocks(' \n'), [])
+
+
+class TestSplitWrapper(TestCase):
+    def test_split_wrapper_returns_tags_and_content(self):
+        self.assertEqual(split_wrapper('<div class="a">text <p>x</p>\n</div>\n'),
+                         ('<div class="a">', 'text <p>x</p>\n', '</div>\n'))
+
+    def test_split_wrapper_of_empty_element_returns_none(self):
+        self.assertIsNone(split_wrapper('<div class="a"></div>'))
+
+
+class TestHTMLDiffEngine(TestCase):
+    def test_diff_of_small_fragments_returns_htmldiff(self):
+        engine = HTMLDiffEngine()
+        self.assertEqual(engine.diff('<p>one two</p>', '<p>one three</p>'),
+                         htmldiff('<p>one two</p>', '<p>one three</p>'))
+
+    def test_diff_by_block_marks_changed_blocks_only(self):
+        new_paragraphs = list(PARAGRAPHS)
+        new_paragraphs[10] = new_paragraphs[10].replace('words', 'terms')
+        del new_paragraphs[20]
+        new_paragraphs.insert(30, '<p>inserted</p>\n')
+        result = HTMLDiffEngine(block_threshold=0).diff(''.join(PARAGRAPHS), ''.join(new_paragraphs))
+        self.assertIn('<p>Paragraph 10 with <b>bold</b> <ins>terms.</ins> <del>words.</del>', result)
+        self.assertIn('<p><del>Paragraph 20 with <b>bold</b> words.</del></p>', result)
+        self.assertIn('<p><ins>inserted</ins></p>', result)
+        self.assertNotIn('<del></del>', result)
+        self.assertEqual(result.count('<ins>') + result.count('<del>'), 4)
+
+    def test_diff_by_block_splits_single_wrapping_block(self):
+        new_paragraphs = list(PARAGRAPHS)
+        new_paragraphs[10] = new_paragraphs[10].replace('words', 'terms')
+        old_html = '<div class="content"><div>%s</div></div>' % ''.join(PARAGRAPHS)
+        new_html = '<div class="content"><div>%s</div></div>' % ''.join(new_paragraphs)
+        engine = HTMLDiffEngine(block_threshold=0, max_region_size=1000)
+        result = engine.diff(old_html, new_html)
+        self.assertTrue(result.startswith('<div class="content"><div><p>Paragraph 0 with'))
+        self.assertTrue(result.endswith('</div></div>'))
+        self.assertIn('<p>Paragraph 10 with <b>bold</b> <ins>terms.</ins> <del>words.</del>', result)
+        self.assertEqual(result.count('<ins>') + result.count('<del>'), 2)
+
+    def test_diff_by_block_keeps_leading_text_escaped(self):
+        leading_text = '&lt;script&gt;alert(1)&lt;/script&gt; intro'
+        new_paragraphs = list(PARAGRAPHS)
+        new_paragraphs[10] = new_paragraphs[10].replace('words', 'terms')
+        result = HTMLDiffEngine().diff(leading_text + ''.join(PARAGRAPHS), leading_text + ''.join(new_paragraphs))
+        self.assertTrue(result.startswith(leading_text))
+        self.assertNotIn('<script>', result)
+
+    def test_diff_of_region_over_size_budget_marks_whole_region(self):
+        engine = HTMLDiffEngine(block_threshold=0, max_region_size=10)
+        result = engine.diff('<p>same</p><p>one two</p>', '<p>same</p><p>one three</p>')
+        self.assertEqual(result, '<p>same</p><ins><p>one three</p></ins> <del><p>one two</p></del>')
+
+    def test_diff_after_time_budget_marks_whole_region(self):
+        engine = HTMLDiffEngine(block_threshold=0, time_budget=0)
+        self.assertEqual(engine.diff('<p>a</p>', ''), '<del><p>a</p></del>')
+
+    def test_diff_returns_cached_result(self):
+        engine = HTMLDiffEngine(cache_size=1)
+        result = engine.diff('<p>a</p>', '<p>b</p>')
+        self.assertIs(engine.diff('<p>a</p>', '<p>b</p>'), result)
+        engine.diff('<p>b</p>', '<p>c</p>')
+        self.assertIsNot(engine.diff('<p>a</p>', '<p>b</p>'), result)
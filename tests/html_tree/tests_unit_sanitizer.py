@@ -0,0 +1,54 @@
+""" Unit tests for the streaming HTML sanitizer
+"""
+import io
+from unittest import TestCase
+
+from xml_utils.html_tree.parser import safe_html
+from xml_utils.html_tree.sanitizer import HTMLSanitizer
+
+
+class TestHTMLSanitizer(TestCase):
+    def setUp(self):
+        self.sanitizer = HTMLSanitizer()
+
+    def test_sanitize_keeps_allowed_tags_and_attributes(self):
+        self.assertEqual(self.sanitizer.sanitize('text <a href="/x" class="c" onclick="f()">link</a><br>'),
+                         'text <a href="/x" class="c">link</a><br>')
+
+    def test_sanitize_unwraps_unknown_tags_and_removes_scripts(self):
+        self.assertEqual(self.sanitizer.sanitize('<foo>kept <i>i</i></foo><script>a<b</script><!-- c -->'),
+                         'kept <i>i</i>')
+
+    def test_sanitize_escapes_text_and_attributes(self):
+        self.assertEqual(self.sanitizer.sanitize('1 &lt; 2 <span title=\'a"b\'>x</span>'),
+                         '1 &lt; 2 <span title="a&quot;b">x</span>')
+
+    def test_sanitize_removes_unsafe_urls(self):
+        self.assertEqual(self.sanitizer.sanitize('<a href=" java\tscript:alert(1)">a</a><img src="http://i/x.png">'),
+                         '<a>a</a><img src="http://i/x.png">')
+
+    def test_sanitize_closes_elements_and_content_outside_fragment(self):
+        self.assertEqual(self.sanitizer.sanitize('<p>x</div><p>y', parent_tag='div'), '<div><p>x</p><p>y</p></div>')
+
+    def test_sanitize_with_custom_allowlist(self):
+        sanitizer = HTMLSanitizer(allowed_tags=['b'], allowed_attributes=[])
+        self.assertEqual(sanitizer.sanitize('<p><b class="c">x</b></p>'), '<b>x</b>')
+
+    def test_sanitize_stream_writes_sanitized_chunks(self):
+        output = io.StringIO()
+        self.sanitizer.sanitize_stream(io.BytesIO('<p>é</p><script>x</script>'.encode('utf-8') * 3), output.write,
+                                       chunk_size=5)
+        self.assertEqual(output.getvalue(), '<p>é</p>' * 3)
+
+    def test_sanitize_many(self):
+        self.assertEqual(self.sanitizer.sanitize_many({'a': '<b>x', 'b': 'y'}), {'a': '<b>x</b>', 'b': 'y'})
+        self.assertEqual(self.sanitizer.sanitize_many(['<i>x</i>', '']), ['<i>x</i>', ''])
+
+
+class TestSafeHtml(TestCase):
+    def test_safe_html_with_sanitizer(self):
+        self.assertEqual(safe_html('<p>é<script>x</script></p>', sanitizer=True), b'<div><p>&#233;</p></div>')
+
+    def test_safe_html_with_sanitizer_matches_tree_output_of_safe_fragment(self):
+        html_text = '<p>text <b>bold</b> &amp; <a href="http://x">link</a></p>'
+        self.assertEqual(safe_html(html_text, sanitizer=HTMLSanitizer()), safe_html(html_text))
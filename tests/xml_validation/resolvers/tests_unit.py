@@ -0,0 +1,109 @@
+""" Unit tests for the URI resolvers
+"""
+import os
+import tempfile
+from unittest import TestCase
+
+from lxml import etree
+
+from xml_utils.commons.exceptions import XMLError
+from xml_utils.xml_validation.resolvers.caching_uri_resolver import CachingURIResolver
+from xml_utils.xml_validation.resolvers.content_uri_resolver import ContentURIResolver, get_path_suffixes
+from xml_utils.xml_validation.resolvers.default_uri_resolver import DefaultURIResolver
+from xml_utils.xml_validation.resolvers.dict_uri_resolver import DictURIResolver
+from xml_utils.xml_validation.resolvers.directory_uri_resolver import DirectoryURIResolver
+
+MAIN_SCHEMA = b'<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">' \
+              b'<xs:import namespace="urn:a" schemaLocation="http://example.org/schemas/a.xsd"/>' \
+              b'<xs:element name="root" type="xs:string"/></xs:schema>'
+SCHEMA_A = '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" targetNamespace="urn:a">' \
+           '<xs:include schemaLocation="types/b.xsd"/></xs:schema>'
+SCHEMA_B = '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" targetNamespace="urn:a">' \
+           '<xs:element name="b" type="xs:int"/></xs:schema>'
+XML_B = b'<b xmlns="urn:a">1</b>'
+
+
+def _compile(schema, resolver):
+    parser = etree.XMLParser()
+    parser.resolvers.add(resolver)
+    return etree.XMLSchema(etree.fromstring(schema, parser))
+
+
+class TestGetPathSuffixes(TestCase):
+    def test_get_path_suffixes_returns_paths_from_full_path_to_file_name(self):
+        self.assertEqual(get_path_suffixes('http://host/a/./b/c.xsd?x=1'), ['a/b/c.xsd', 'b/c.xsd', 'c.xsd'])
+        self.assertEqual(get_path_suffixes('../c.xsd'), ['c.xsd'])
+
+
+class TestContentURIResolver(TestCase):
+    def test_content_uri_resolver_without_get_content_cannot_be_instantiated(self):
+        with self.assertRaises(TypeError):
+            ContentURIResolver()
+
+
+class TestDictURIResolver(TestCase):
+    def test_compile_resolves_imports_and_includes_from_bundle(self):
+        resolver = DictURIResolver({'a.xsd': SCHEMA_A, 'http://example.org/schemas/types/b.xsd': SCHEMA_B})
+        xml_schema = _compile(MAIN_SCHEMA, resolver)
+        self.assertTrue(xml_schema.validate(etree.fromstring(XML_B)))
+
+    def test_get_content_of_unknown_document_returns_none(self):
+        self.assertIsNone(DictURIResolver({'a.xsd': SCHEMA_A}).get_content('http://host/b.xsd'))
+
+
+class TestDirectoryURIResolver(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        os.mkdir(os.path.join(self.directory.name, 'types'))
+        for path, content in (('a.xsd', SCHEMA_A), ('types/b.xsd', SCHEMA_B)):
+            with open(os.path.join(self.directory.name, path), 'w') as schema_file:
+                schema_file.write(content)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_compile_resolves_imports_and_includes_from_directory(self):
+        xml_schema = _compile(MAIN_SCHEMA, DirectoryURIResolver(self.directory.name))
+        self.assertTrue(xml_schema.validate(etree.fromstring(XML_B)))
+
+    def test_get_content_outside_directory_returns_none(self):
+        resolver = DirectoryURIResolver(os.path.join(self.directory.name, 'types'))
+        self.assertIsNone(resolver.get_content('../a.xsd'))
+        self.assertEqual(resolver.get_content('http://host/types/b.xsd'), SCHEMA_B.encode('utf-8'))
+
+
+class TestCachingURIResolver(TestCase):
+    def setUp(self):
+        self.documents = {'a.xsd': SCHEMA_A, 'b.xsd': SCHEMA_B}
+
+    def test_compilations_share_cached_documents(self):
+        resolver = CachingURIResolver(DictURIResolver(self.documents))
+        _compile(MAIN_SCHEMA, resolver)
+        self.documents.clear()
+        xml_schema = _compile(MAIN_SCHEMA, resolver)
+        self.assertTrue(xml_schema.validate(etree.fromstring(XML_B)))
+        statistics = resolver.get_statistics()
+        self.assertEqual((statistics['documents'], statistics['hits'], statistics['misses']), (2, 2, 2))
+
+    def test_cache_is_bounded_by_size(self):
+        resolver = CachingURIResolver(DictURIResolver(self.documents), max_size=len(SCHEMA_A) + 1)
+        resolver.get_content('a.xsd')
+        resolver.get_content('b.xsd')
+        statistics = resolver.get_statistics()
+        self.assertEqual((statistics['documents'], statistics['evictions']), (1, 1))
+
+    def test_get_content_of_unknown_document_returns_none(self):
+        resolver = CachingURIResolver(DictURIResolver(self.documents))
+        self.assertIsNone(resolver.get_content('c.xsd'))
+        self.assertEqual(resolver.get_statistics()['documents'], 0)
+
+    def test_clear_removes_documents(self):
+        resolver = CachingURIResolver(DictURIResolver(self.documents))
+        resolver.get_content('a.xsd')
+        resolver.clear()
+        self.assertEqual(resolver.get_statistics()['size'], 0)
+
+    def test_init_without_content_resolver_raises_xml_error(self):
+        for resolver in (None, DefaultURIResolver()):
+            with self.assertRaises(XMLError):
+                CachingURIResolver(resolver)
@@ -0,0 +1,63 @@
+""" Unit tests for the compilation of schemas with a dedicated parser
+"""
+from unittest import TestCase
+
+from lxml import etree
+
+from xml_utils.xml_validation.resolvers.dict_uri_resolver import DictURIResolver
+from xml_utils.xml_validation.schema_parser import SchemaParser
+from xml_utils.xml_validation.validation import lxml_validate_xml, lxml_validate_xsd
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+MAIN_SCHEMA = '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">' \
+              '<xs:import namespace="urn:a" schemaLocation="a.xsd"/>' \
+              '<xs:element name="root" type="xs:string"/></xs:schema>'
+DOCUMENTS = {'a.xsd': '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" targetNamespace="urn:a">'
+                      '<xs:element name="b" type="xs:int"/></xs:schema>'}
+
+
+class CountingURIResolver(DictURIResolver):
+    """ Resolver counting its calls
+    """
+    def __init__(self, documents):
+        super().__init__(documents)
+        self.calls = 0
+
+    def get_content(self, url):
+        self.calls += 1
+        return super().get_content(url)
+
+
+class TestSchemaParser(TestCase):
+    def test_compile_resolves_imports_with_resolvers(self):
+        xml_schema = SchemaParser([DictURIResolver(DOCUMENTS)]).compile(XSDTree.build_tree(MAIN_SCHEMA))
+        self.assertTrue(xml_schema.validate(etree.fromstring('<b xmlns="urn:a">1</b>')))
+
+    def test_compile_tree_of_dedicated_parser(self):
+        schema_parser = SchemaParser([DictURIResolver(DOCUMENTS)])
+        xsd_tree = schema_parser.build_tree(MAIN_SCHEMA)
+        self.assertIs(xsd_tree.parser, schema_parser.parser)
+        self.assertTrue(schema_parser.compile(xsd_tree.getroot()).validate(etree.fromstring('<root/>')))
+
+    def test_resolvers_are_registered_once(self):
+        resolver = CountingURIResolver(DOCUMENTS)
+        schema_parser = SchemaParser([resolver])
+        xsd_tree = XSDTree.build_tree(MAIN_SCHEMA)
+        for _ in range(3):
+            schema_parser.compile(xsd_tree)
+        self.assertEqual(resolver.calls, 3)
+
+
+class TestBuildEtreeSchema(TestCase):
+    def test_validation_does_not_add_resolvers_to_parser_of_tree(self):
+        xsd_tree = XSDTree.build_tree(MAIN_SCHEMA)
+        xml_tree = XSDTree.build_tree('<root>x</root>')
+        resolvers = [CountingURIResolver(DOCUMENTS) for _ in range(3)]
+        for resolver in resolvers:
+            self.assertIsNone(lxml_validate_xml(xsd_tree, xml_tree, resolver))
+        # each resolver is only used by its own validation
+        self.assertEqual([resolver.calls for resolver in resolvers], [1, 1, 1])
+
+    def test_validation_with_schema_parser(self):
+        schema_parser = SchemaParser([DictURIResolver(DOCUMENTS)])
+        self.assertIsNone(lxml_validate_xsd(XSDTree.build_tree(MAIN_SCHEMA), schema_parser))
@@ -0,0 +1,102 @@
+""" Unit tests for the validation service
+"""
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from xml_utils.commons.exceptions import XMLError
+from xml_utils.xml_validation.resolvers.dict_uri_resolver import DictURIResolver
+from xml_utils.xml_validation.validation_service import ValidationService
+
+SCHEMA = '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"><xs:element name="root" type="xs:int"/></xs:schema>'
+OTHER_SCHEMA = SCHEMA.replace('xs:int', 'xs:string')
+IMPORTING_SCHEMA = '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">' \
+                   '<xs:import namespace="urn:a" schemaLocation="a.xsd"/></xs:schema>'
+IMPORTED_SCHEMA = '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" targetNamespace="urn:a">' \
+                  '<xs:element name="b" type="xs:int"/></xs:schema>'
+
+
+def get_uri_resolver():
+    return DictURIResolver({'a.xsd': IMPORTED_SCHEMA})
+
+
+class TestValidationService(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.service = ValidationService({'int': SCHEMA}, processes=1, max_pending=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.service.close()
+
+    def test_validate_with_registered_schema(self):
+        self.assertIsNone(self.service.validate('int', b'<root>1</root>'))
+        self.assertIn('not a valid value', self.service.validate('int', '<root>x</root>'))
+
+    def test_validate_with_schema_sent_with_task(self):
+        self.assertIsNone(self.service.validate(OTHER_SCHEMA, '<root>x</root>'))
+
+    def test_validate_document_from_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(os.path.join(directory, 'document.xml'))
+            path.write_bytes(b'<root>1</root>')
+            self.assertIsNone(self.service.validate('int', path))
+
+    def test_validate_many_keeps_order(self):
+        errors = self.service.validate_many('int', [b'<root>1</root>', b'<root>x</root>', b'<root>3</root>'],
+                                            chunk_size=2)
+        self.assertEqual([error is None for error in errors], [True, False, True])
+
+    def test_validate_async(self):
+        async def validate_all():
+            return await asyncio.gather(*(self.service.validate_async('int', '<root>%s</root>' % value)
+                                          for value in ('1', 'x', '3', '4')))
+
+        errors = asyncio.run(validate_all())
+        self.assertEqual([error is None for error in errors], [True, False, True, True])
+
+    def test_cancelled_validate_async_releases_its_slot(self):
+        async def cancel_waiting_validation():
+            task = asyncio.ensure_future(self.service.validate_async('int', '<root>1</root>'))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            for _ in range(self.service.max_pending):
+                self.service._slots.release()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            # the slot acquired by the thread after the cancellation is released
+            await asyncio.sleep(0.1)
+
+        for _ in range(self.service.max_pending):
+            self.service._slots.acquire()
+        asyncio.run(cancel_waiting_validation())
+        acquired = [self.service._slots.acquire(blocking=False) for _ in range(self.service.max_pending)]
+        for _ in range(sum(acquired)):
+            self.service._slots.release()
+        self.assertEqual(acquired, [True] * self.service.max_pending)
+
+    def test_submit_without_free_slot_raises_xml_error(self):
+        for _ in range(self.service.max_pending):
+            self.service._slots.acquire()
+        try:
+            with self.assertRaises(XMLError):
+                self.service.submit('int', b'<root>1</root>', timeout=0.01)
+        finally:
+            for _ in range(self.service.max_pending):
+                self.service._slots.release()
+
+    def test_invalid_schema_returns_errors(self):
+        self.assertIsNotNone(self.service.validate('<xs:schema/>', b'<root>1</root>'))
+
+    def test_invalid_document_type_raises_xml_error(self):
+        with self.assertRaises(XMLError):
+            self.service.submit('int', 1)
+
+
+class TestValidationServiceWithResolver(TestCase):
+    def test_workers_resolve_imports_with_resolver(self):
+        with ValidationService({'a': IMPORTING_SCHEMA}, processes=1, uri_resolver_factory=get_uri_resolver) as service:
+            self.assertIsNone(service.validate('a', '<b xmlns="urn:a">1</b>'))
+            self.assertIsNotNone(service.validate('a', '<b xmlns="urn:a">x</b>'))
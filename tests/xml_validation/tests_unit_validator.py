@@ -0,0 +1,143 @@
+""" Unit tests for the validator and its backends
+"""
+from unittest import TestCase
+
+from xml_utils.commons.exceptions import ValidationBackendError
+from xml_utils.xml_validation.validator import Validator, LxmlBackend, XercesBackend, LatencyTracker, \
+    RoutingPolicy, requires_xsd_11, LXML, XERCES
+from xml_utils.xml_validation.xerces.stub_server import StubValidationServer
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+SCHEMA = '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"><xs:element name="root" type="xs:int"/></xs:schema>'
+SCHEMA_11 = '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"><xs:element name="root">' \
+            '<xs:complexType><xs:assert test="true()"/></xs:complexType></xs:element></xs:schema>'
+
+
+class TestLxmlBackend(TestCase):
+    def test_validate_xml(self):
+        backend = LxmlBackend()
+        self.assertIsNone(backend.validate_xml(SCHEMA, '<root>1</root>'))
+        self.assertIn('not a valid value', backend.validate_xml(SCHEMA, b'<root>x</root>'))
+
+    def test_validate_invalid_xsd_returns_errors(self):
+        self.assertIsNotNone(LxmlBackend().validate_xsd('<xs:schema/>'))
+
+
+class TestXercesBackend(TestCase):
+    def test_validate_with_stub_server(self):
+        with StubValidationServer() as server:
+            backend = XercesBackend(server.endpoint)
+            self.assertIsNone(backend.validate_xsd(SCHEMA))
+            self.assertIsNone(backend.validate_xml(SCHEMA, '<root>1</root>'))
+            self.assertIn('not a valid value', backend.validate_xml(SCHEMA, b'<root>x</root>'))
+            self.assertEqual(server.requests, 3)
+
+    def test_validate_with_server_timeout_raises_validation_backend_error(self):
+        with StubValidationServer(delay=0.2) as server:
+            with self.assertRaises(ValidationBackendError):
+                XercesBackend(server.endpoint, timeout=20).validate_xsd(SCHEMA)
+
+
+class FakeClock(object):
+    """ Clock advanced by the tests
+    """
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRoutingPolicy(TestCase):
+    def test_route_by_size_and_xsd_version(self):
+        policy = RoutingPolicy(max_inline_size=20, adaptive=False)
+        tracker = LatencyTracker()
+        self.assertEqual(policy.route(SCHEMA, '<root>1</root>', tracker), [LXML, XERCES])
+        self.assertEqual(policy.route(SCHEMA, '<root>%s</root>' % ('1' * 20), tracker), [XERCES, LXML])
+        self.assertEqual(policy.route(SCHEMA_11, '<root/>', tracker), [XERCES])
+
+    def test_adaptive_route_prefers_fastest_observed_backend(self):
+        tracker = LatencyTracker()
+        policy = RoutingPolicy()
+        tracker.record(LXML, 10, 0.5)
+        self.assertEqual(policy.route(SCHEMA, 'x' * 10, tracker), [LXML, XERCES])
+        tracker.record(XERCES, 10, 0.1)
+        self.assertEqual(policy.route(SCHEMA, 'x' * 10, tracker), [XERCES, LXML])
+        self.assertEqual(policy.route(SCHEMA, 'x' * 1000, tracker), [LXML, XERCES])
+
+    def test_requires_xsd_11(self):
+        self.assertTrue(requires_xsd_11(SCHEMA_11.encode('utf-8')))
+        self.assertTrue(requires_xsd_11('<xs:element vc:minVersion="1.1"/>'))
+        self.assertFalse(requires_xsd_11(SCHEMA))
+
+
+class TestLatencyTracker(TestCase):
+    def test_record_averages_latencies_by_size(self):
+        tracker = LatencyTracker(weight=0.5, failure_penalty=1.0)
+        tracker.record(LXML, 100, 0.2)
+        tracker.record(LXML, 120, 0.4)
+        tracker.record(LXML, 1000, 0.01, failed=True)
+        self.assertAlmostEqual(tracker.estimate(LXML, 110), 0.3)
+        self.assertEqual(tracker.estimate(LXML, 1000), 1.0)
+        self.assertIsNone(tracker.estimate(XERCES, 100))
+        statistics = tracker.get_statistics()[LXML]
+        self.assertEqual((statistics['calls'], statistics['failures']), (3, 1))
+        self.assertEqual(sorted(statistics['latencies']), [256, 1024])
+
+    def test_estimate_of_old_average_returns_none(self):
+        clock = FakeClock()
+        tracker = LatencyTracker(max_age=60.0, clock=clock)
+        tracker.record(XERCES, 100, 0.01, failed=True)
+        clock.now = 60.0
+        self.assertEqual(tracker.estimate(XERCES, 100), 10.0)
+        clock.now = 60.1
+        self.assertIsNone(tracker.estimate(XERCES, 100))
+        self.assertEqual(tracker.get_statistics()[XERCES]['latencies'], dict())
+        # the failure penalty is no longer part of the average
+        tracker.record(XERCES, 100, 0.01)
+        self.assertEqual(tracker.estimate(XERCES, 100), 0.01)
+
+
+class TestValidator(TestCase):
+    def test_validate_in_process(self):
+        result = Validator().validate_xml(XSDTree.build_tree(SCHEMA), '<root>1</root>')
+        self.assertTrue(result.is_valid)
+        self.assertEqual(result.backend, LXML)
+
+    def test_validate_xsd_11_with_xerces(self):
+        with StubValidationServer(validate_xsd=lambda xsd_string: None) as server:
+            validator = Validator([LxmlBackend(), XercesBackend(server.endpoint)])
+            result = validator.validate_xsd(SCHEMA_11)
+            self.assertEqual((result.is_valid, result.backend), (True, XERCES))
+
+    def test_validate_falls_back_on_timeout(self):
+        with StubValidationServer(delay=0.2) as server:
+            validator = Validator([LxmlBackend(), XercesBackend(server.endpoint, timeout=20)],
+                                  policy=RoutingPolicy(max_inline_size=0))
+            result = validator.validate_xml(SCHEMA, '<root>x</root>')
+            self.assertEqual((result.is_valid, result.backend), (False, LXML))
+            statistics = validator.latency_tracker.get_statistics()
+            self.assertEqual(statistics[XERCES]['failures'], 1)
+            # the failure penalty makes lxml the first backend for documents of this size
+            self.assertEqual(validator.policy.route(SCHEMA, '<root>x</root>', validator.latency_tracker)[0], LXML)
+
+    def test_validate_with_xerces_again_once_server_recovers(self):
+        clock = FakeClock()
+        with StubValidationServer(delay=0.05) as server:
+            xerces_backend = XercesBackend(server.endpoint, timeout=20)
+            validator = Validator([LxmlBackend(), xerces_backend], policy=RoutingPolicy(max_inline_size=0),
+                                  latency_tracker=LatencyTracker(max_age=60.0, clock=clock))
+            self.assertEqual(validator.validate_xml(SCHEMA, '<root>x</root>').backend, LXML)
+            self.assertEqual(validator.policy.route(SCHEMA, '<root>x</root>', validator.latency_tracker)[0], LXML)
+            # the server recovers: no more delay, and the reply to the timed out request is waited for
+            server.delay = 0
+            xerces_backend.timeout = 3000
+            # the failure penalty expires, Xerces is tried again
+            clock.now = 61.0
+            result = validator.validate_xml(SCHEMA, '<root>x</root>')
+            self.assertEqual(result.backend, XERCES)
+            self.assertLess(validator.latency_tracker.estimate(XERCES, len('<root>x</root>')), 1.0)
+
+    def test_validate_without_available_backend_raises_validation_backend_error(self):
+        with self.assertRaises(ValidationBackendError):
+            Validator().validate_xsd(SCHEMA_11)
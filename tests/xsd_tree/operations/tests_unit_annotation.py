@@ -1,8 +1,9 @@
 """Unit tests for annotation operations
 """
+from io import BytesIO
 from unittest import TestCase
 
-from xml_utils.xsd_tree.operations.annotation import remove_annotations
+from xml_utils.xsd_tree.operations.annotation import remove_annotations, stream_remove_annotations
 from xml_utils.xsd_tree.xsd_tree import XSDTree
 
 
@@ -30,3 +31,43 @@ class TestRemoveAnnotations(TestCase):
         result_xsd_string = XSDTree.tostring(xsd_tree)
 
         self.assertTrue(expected_xsd_string == result_xsd_string)
+
+
+class TestStreamRemoveAnnotations(TestCase):
+    def test_stream_remove_no_annotations_returns_same_tree(self):
+        xsd_string = '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">' \
+                     '<xs:element name="integer" type="xs:integer"/></xs:schema>'
+
+        output = BytesIO()
+        stream_remove_annotations(BytesIO(xsd_string.encode('utf-8')), output)
+        result_xsd_string = XSDTree.tostring(XSDTree.build_tree(output.getvalue()))
+
+        self.assertEqual(xsd_string, result_xsd_string)
+
+    def test_stream_remove_annotations_comments_and_pis(self):
+        xsd_string = '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">' \
+                     '<xs:annotation><xs:appinfo/></xs:annotation><!-- comment -->' \
+                     '<xs:element name="integer" type="xs:integer">' \
+                     '<xs:annotation><xs:documentation>doc</xs:documentation></xs:annotation><?pi value?>' \
+                     '</xs:element></xs:schema>'
+
+        expected_xsd_string = '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">' \
+                              '<xs:element name="integer" type="xs:integer"/></xs:schema>'
+
+        output = BytesIO()
+        stream_remove_annotations(BytesIO(xsd_string.encode('utf-8')), output)
+        result_xsd_string = XSDTree.tostring(XSDTree.build_tree(output.getvalue()))
+
+        self.assertEqual(expected_xsd_string, result_xsd_string)
+
+    def test_stream_remove_annotations_keeps_all_namespace_prefixes(self):
+        xsd_string = '<xs:schema xmlns="http://www.w3.org/2001/XMLSchema" ' \
+                     'xmlns:xs="http://www.w3.org/2001/XMLSchema">' \
+                     '<xs:element name="integer" type="integer"/></xs:schema>'
+
+        output = BytesIO()
+        stream_remove_annotations(BytesIO(xsd_string.encode('utf-8')), output)
+        root = XSDTree.build_tree(output.getvalue()).getroot()
+
+        self.assertEqual(root.nsmap, {None: "http://www.w3.org/2001/XMLSchema",
+                                      "xs": "http://www.w3.org/2001/XMLSchema"})
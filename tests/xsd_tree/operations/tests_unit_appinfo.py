@@ -6,7 +6,7 @@ from lxml import etree
 
 from xml_utils.commons.exceptions import XMLError
 from xml_utils.xsd_tree.operations.appinfo import add_appinfo_element, \
-    delete_appinfo_element
+    delete_appinfo_element, get_appinfo_by_xpath, get_appinfo_by_xpath_from_string
 from xml_utils.xsd_tree.xsd_tree import XSDTree
 
 
@@ -48,10 +48,10 @@ class TestAddAppInfoElement(TestCase):
             </xs:schema>
         """
 
-        updated_tree = XSDTree.fromstring(updated_xsd_string)
+        updated_tree = XSDTree.fromstring(updated_xsd_string, parser='hash')
         updated_xsd_string = XSDTree.tostring(updated_tree)
 
-        expected_tree = XSDTree.fromstring(expected_string)
+        expected_tree = XSDTree.fromstring(expected_string, parser='hash')
         expected_string = XSDTree.tostring(expected_tree)
 
         self.assertEqual(updated_xsd_string, expected_string)
@@ -80,10 +80,10 @@ class TestAddAppInfoElement(TestCase):
             </xs:schema>
         """
 
-        updated_tree = XSDTree.fromstring(updated_xsd_string)
+        updated_tree = XSDTree.fromstring(updated_xsd_string, parser='hash')
         updated_xsd_string = XSDTree.tostring(updated_tree)
 
-        expected_tree = XSDTree.fromstring(expected_string)
+        expected_tree = XSDTree.fromstring(expected_string, parser='hash')
         expected_string = XSDTree.tostring(expected_tree)
 
         self.assertEqual(updated_xsd_string, expected_string)
@@ -111,10 +111,10 @@ class TestAddAppInfoElement(TestCase):
             </xs:schema>
         """
 
-        updated_tree = XSDTree.fromstring(updated_xsd_string)
+        updated_tree = XSDTree.fromstring(updated_xsd_string, parser='hash')
         updated_xsd_string = XSDTree.tostring(updated_tree)
 
-        expected_tree = XSDTree.fromstring(expected_string)
+        expected_tree = XSDTree.fromstring(expected_string, parser='hash')
         expected_string = XSDTree.tostring(expected_tree)
 
         self.assertEqual(updated_xsd_string, expected_string)
@@ -143,10 +143,10 @@ class TestAddAppInfoElement(TestCase):
             </xs:schema>
         """
 
-        updated_tree = XSDTree.fromstring(updated_xsd_string)
+        updated_tree = XSDTree.fromstring(updated_xsd_string, parser='hash')
         updated_xsd_string = XSDTree.tostring(updated_tree)
 
-        expected_tree = XSDTree.fromstring(expected_string)
+        expected_tree = XSDTree.fromstring(expected_string, parser='hash')
         expected_string = XSDTree.tostring(expected_tree)
 
         self.assertEqual(updated_xsd_string, expected_string)
@@ -175,10 +175,10 @@ class TestAddAppInfoElement(TestCase):
             </xs:schema>
         """
 
-        updated_tree = XSDTree.fromstring(updated_xsd_string)
+        updated_tree = XSDTree.fromstring(updated_xsd_string, parser='hash')
         updated_xsd_string = XSDTree.tostring(updated_tree)
 
-        expected_tree = XSDTree.fromstring(expected_string)
+        expected_tree = XSDTree.fromstring(expected_string, parser='hash')
         expected_string = XSDTree.tostring(expected_tree)
 
         self.assertEqual(updated_xsd_string, expected_string)
@@ -209,10 +209,10 @@ class TestAddAppInfoElement(TestCase):
             </xs:schema>
         """
 
-        updated_tree = XSDTree.fromstring(updated_xsd_string)
+        updated_tree = XSDTree.fromstring(updated_xsd_string, parser='hash')
         updated_xsd_string = XSDTree.tostring(updated_tree)
 
-        expected_tree = XSDTree.fromstring(expected_string)
+        expected_tree = XSDTree.fromstring(expected_string, parser='hash')
         expected_string = XSDTree.tostring(expected_tree)
 
         self.assertEqual(updated_xsd_string, expected_string)
@@ -243,10 +243,10 @@ class TestAddAppInfoElement(TestCase):
             </xs:schema>
         """
 
-        updated_tree = XSDTree.fromstring(updated_xsd_string)
+        updated_tree = XSDTree.fromstring(updated_xsd_string, parser='hash')
         updated_xsd_string = XSDTree.tostring(updated_tree)
 
-        expected_tree = XSDTree.fromstring(expected_string)
+        expected_tree = XSDTree.fromstring(expected_string, parser='hash')
         expected_string = XSDTree.tostring(expected_tree)
 
         self.assertEqual(updated_xsd_string, expected_string)
@@ -277,10 +277,10 @@ class TestAddAppInfoElement(TestCase):
             </xs:schema>
         """
 
-        updated_tree = XSDTree.fromstring(updated_xsd_string)
+        updated_tree = XSDTree.fromstring(updated_xsd_string, parser='hash')
         updated_xsd_string = XSDTree.tostring(updated_tree)
 
-        expected_tree = XSDTree.fromstring(expected_string)
+        expected_tree = XSDTree.fromstring(expected_string, parser='hash')
         expected_string = XSDTree.tostring(expected_tree)
 
         self.assertEqual(updated_xsd_string, expected_string)
@@ -313,10 +313,10 @@ class TestAddAppInfoElement(TestCase):
             </xs:schema>
         """
 
-        updated_tree = XSDTree.fromstring(updated_xsd_string)
+        updated_tree = XSDTree.fromstring(updated_xsd_string, parser='hash')
         updated_xsd_string = XSDTree.tostring(updated_tree)
 
-        expected_tree = XSDTree.fromstring(expected_string)
+        expected_tree = XSDTree.fromstring(expected_string, parser='hash')
         expected_string = XSDTree.tostring(expected_tree)
 
         self.assertEqual(updated_xsd_string, expected_string)
@@ -376,10 +376,10 @@ class TestDeleteAppInfoElement(TestCase):
             </xs:schema>
         """
 
-        updated_tree = XSDTree.fromstring(updated_xsd_string)
+        updated_tree = XSDTree.fromstring(updated_xsd_string, parser='hash')
         updated_xsd_string = XSDTree.tostring(updated_tree)
 
-        expected_tree = XSDTree.fromstring(expected_string)
+        expected_tree = XSDTree.fromstring(expected_string, parser='hash')
         expected_string = XSDTree.tostring(expected_tree)
 
         self.assertEqual(updated_xsd_string, expected_string)
@@ -436,10 +436,10 @@ class TestDeleteAppInfoElement(TestCase):
             </xs:schema>
         """
 
-        updated_tree = XSDTree.fromstring(updated_xsd_string)
+        updated_tree = XSDTree.fromstring(updated_xsd_string, parser='hash')
         updated_xsd_string = XSDTree.tostring(updated_tree)
 
-        expected_tree = XSDTree.fromstring(expected_string)
+        expected_tree = XSDTree.fromstring(expected_string, parser='hash')
         expected_string = XSDTree.tostring(expected_tree)
 
         self.assertEqual(updated_xsd_string, expected_string)
@@ -469,10 +469,10 @@ class TestDeleteAppInfoElement(TestCase):
             </xs:schema>
         """
 
-        updated_tree = XSDTree.fromstring(updated_xsd_string)
+        updated_tree = XSDTree.fromstring(updated_xsd_string, parser='hash')
         updated_xsd_string = XSDTree.tostring(updated_tree)
 
-        expected_tree = XSDTree.fromstring(expected_string)
+        expected_tree = XSDTree.fromstring(expected_string, parser='hash')
         expected_string = XSDTree.tostring(expected_tree)
 
         self.assertEqual(updated_xsd_string, expected_string)
@@ -492,3 +492,66 @@ class TestDeleteAppInfoElement(TestCase):
 
         with self.assertRaises(XMLError):
             delete_appinfo_element(xsd_string, xpath, "attribute")
+
+
+class TestGetAppInfoByXpath(TestCase):
+    def test_get_appinfo_by_xpath_no_appinfo_returns_empty_dict(self):
+        xsd_string = """
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+                <xs:element name="root"/>
+            </xs:schema>
+        """
+        xsd_tree = XSDTree.build_tree(xsd_string)
+        self.assertEqual(get_appinfo_by_xpath(xsd_tree), dict())
+
+    def test_get_appinfo_by_xpath_returns_appinfo_of_all_elements(self):
+        xsd_string = """
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+                <xs:element name="root">
+                    <xs:annotation>
+                        <xs:appinfo><label>Root</label></xs:appinfo>
+                        <xs:appinfo><placeholder>value</placeholder></xs:appinfo>
+                    </xs:annotation>
+                </xs:element>
+                <xs:element name="other">
+                    <xs:annotation><xs:appinfo><unit>m</unit></xs:appinfo></xs:annotation>
+                </xs:element>
+            </xs:schema>
+        """
+        xsd_tree = XSDTree.build_tree(xsd_string)
+        appinfo_by_xpath = get_appinfo_by_xpath(xsd_tree)
+
+        self.assertEqual(len(appinfo_by_xpath), 2)
+        for xpath, appinfo in appinfo_by_xpath.items():
+            element = xsd_tree.find(xpath)
+            if element.attrib["name"] == "root":
+                self.assertEqual(appinfo, {"label": "Root", "placeholder": "value"})
+            else:
+                self.assertEqual(appinfo, {"unit": "m"})
+
+    def test_get_appinfo_by_xpath_present_twice_raises_exception(self):
+        xsd_string = """
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+                <xs:element name="root">
+                    <xs:annotation>
+                        <xs:appinfo><label>old</label></xs:appinfo>
+                        <xs:appinfo><label>old</label></xs:appinfo>
+                    </xs:annotation>
+                </xs:element>
+            </xs:schema>
+        """
+        xsd_tree = XSDTree.build_tree(xsd_string)
+        with self.assertRaises(XMLError):
+            get_appinfo_by_xpath(xsd_tree)
+
+    def test_get_appinfo_by_xpath_from_string_returns_cached_result(self):
+        xsd_string = """
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+                <xs:element name="root">
+                    <xs:annotation><xs:appinfo><label>Root</label></xs:appinfo></xs:annotation>
+                </xs:element>
+            </xs:schema>
+        """
+        appinfo_by_xpath = get_appinfo_by_xpath_from_string(xsd_string)
+        self.assertEqual(list(appinfo_by_xpath.values()), [{"label": "Root"}])
+        self.assertTrue(get_appinfo_by_xpath_from_string(xsd_string) is appinfo_by_xpath)
@@ -0,0 +1,55 @@
+"""Unit tests for edit sessions
+"""
+from unittest import TestCase
+
+from xml_utils.commons.exceptions import XMLError
+from xml_utils.xsd_tree.operations.appinfo import add_appinfo_element
+from xml_utils.xsd_tree.operations.attribute import set_attribute
+from xml_utils.xsd_tree.operations.edit_session import XSDEditSession
+
+XSD_STRING = "<xs:schema xmlns:xs='http://www.w3.org/2001/XMLSchema'>" \
+             "<xs:element name='root'/><xs:element name='other'/></xs:schema>"
+
+
+class TestXSDEditSession(TestCase):
+    def test_commit_without_edits_returns_same_string(self):
+        session = XSDEditSession(XSD_STRING)
+        self.assertEqual(session.commit(), set_attribute(XSD_STRING, "xs:element", "name", "root"))
+
+    def test_commit_returns_same_result_as_string_api(self):
+        session = XSDEditSession(XSD_STRING)
+        session.set_attribute("xs:element[2]", "type", "xs:string")
+        session.add_appinfo_element("xs:element[1]", "label", "Root")
+        session.delete_attribute("xs:element[2]", "name")
+
+        expected_string = set_attribute(XSD_STRING, "xs:element[2]", "type", "xs:string")
+        expected_string = add_appinfo_element(expected_string, "xs:element[1]", "label", "Root")
+        expected_string = set_attribute(expected_string, "xs:element[2]", "name", None)
+
+        self.assertEqual(session.commit(), expected_string)
+
+    def test_edits_are_not_applied_before_commit(self):
+        session = XSDEditSession(XSD_STRING)
+        session.set_attribute("xs:element", "type", "xs:string")
+        self.assertTrue("type=" not in session.xsd_string)
+
+    def test_delete_appinfo_element_removes_appinfo(self):
+        session = XSDEditSession(XSD_STRING)
+        session.add_appinfo_element("xs:element", "label", "Root")
+        session.commit()
+        session.delete_appinfo_element("xs:element", "label")
+        self.assertTrue("<label>" not in session.commit())
+
+    def test_rollback_discards_pending_edits(self):
+        session = XSDEditSession(XSD_STRING)
+        session.set_attribute("xs:element", "type", "xs:string")
+        session.rollback()
+        self.assertTrue("type=" not in session.commit())
+
+    def test_failed_commit_restores_committed_state(self):
+        session = XSDEditSession(XSD_STRING)
+        session.set_attribute("xs:element", "type", "xs:string")
+        session.set_attribute("xs:attribute", "type", "xs:string")
+        with self.assertRaises(XMLError):
+            session.commit()
+        self.assertTrue("type=" not in session.commit())
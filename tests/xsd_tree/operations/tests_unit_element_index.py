@@ -0,0 +1,79 @@
+"""Unit tests for the element index
+"""
+from unittest import TestCase
+
+from xml_utils.commons.exceptions import XMLError
+from xml_utils.xsd_tree.operations.appinfo import add_appinfo_child_to_element, \
+    delete_appinfo_child_from_element
+from xml_utils.xsd_tree.operations.attribute import update_element_attribute
+from xml_utils.xsd_tree.operations.element_index import XSDTreeIndex
+from xml_utils.xsd_tree.operations.namespaces import get_namespaces
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+XSD_STRING = "<xs:schema xmlns:xs='http://www.w3.org/2001/XMLSchema'>" \
+             "<xs:element name='root' type='rootType'/>" \
+             "<xs:complexType name='rootType'><xs:sequence>" \
+             "<xs:element name='first'/><xs:element name='second'/>" \
+             "</xs:sequence></xs:complexType>" \
+             "<xs:simpleType name='simple'><xs:restriction base='xs:string'/></xs:simpleType>" \
+             "</xs:schema>"
+
+
+class TestXSDTreeIndex(TestCase):
+    def setUp(self):
+        self.xsd_tree = XSDTree.build_tree(XSD_STRING)
+        self.index = XSDTreeIndex(self.xsd_tree, get_namespaces(XSD_STRING))
+
+    def test_get_element_by_xpath_returns_same_element_as_tree(self):
+        xpath = "xs:complexType/xs:sequence/xs:element[2]"
+        element = self.index.get_element_by_xpath(xpath)
+        self.assertEqual(element.attrib["name"], "second")
+
+    def test_get_element_by_xpath_with_predicate(self):
+        xpath = "xs:complexType/xs:sequence/xs:element[@name='first']"
+        element = self.index.get_element_by_xpath(xpath)
+        self.assertEqual(element.attrib["name"], "first")
+
+    def test_get_element_by_xpath_not_matching_raises_xml_error(self):
+        with self.assertRaises(XMLError):
+            self.index.get_element_by_xpath("xs:attribute")
+
+    def test_get_xpath_returns_canonical_xpath(self):
+        element = self.index.get_element_by_xpath("xs:complexType/xs:sequence/xs:element[2]")
+        xpath = self.index.get_xpath(element)
+        self.assertTrue(self.xsd_tree.find(xpath) is element)
+
+    def test_get_global_element(self):
+        element = self.index.get_global_element("root")
+        self.assertEqual(element.attrib["type"], "rootType")
+
+    def test_get_global_type(self):
+        self.assertEqual(self.index.get_global_type("rootType").tag,
+                         "{http://www.w3.org/2001/XMLSchema}complexType")
+        self.assertEqual(self.index.get_global_type("simple").tag,
+                         "{http://www.w3.org/2001/XMLSchema}simpleType")
+
+    def test_get_global_type_not_found_raises_xml_error(self):
+        with self.assertRaises(XMLError):
+            self.index.get_global_type("root")
+
+    def test_rename_global_element_updates_index(self):
+        element = self.index.get_global_element("root")
+        update_element_attribute(element, "name", "renamed", self.index)
+        self.assertTrue(self.index.get_global_element("renamed") is element)
+        with self.assertRaises(XMLError):
+            self.index.get_global_element("root")
+
+    def test_add_appinfo_indexes_new_elements(self):
+        element = self.index.get_element_by_xpath("xs:element")
+        add_appinfo_child_to_element(element, "label", "value", self.index)
+        appinfo_element = self.index.get_element_by_xpath("xs:element/xs:annotation/xs:appinfo/label")
+        self.assertEqual(appinfo_element.text, "value")
+        self.assertTrue(self.xsd_tree.find(self.index.get_xpath(appinfo_element)) is appinfo_element)
+
+    def test_delete_appinfo_drops_removed_elements(self):
+        element = self.index.get_element_by_xpath("xs:element")
+        add_appinfo_child_to_element(element, "label", "value", self.index)
+        delete_appinfo_child_from_element(element, "label", self.index)
+        with self.assertRaises(XMLError):
+            self.index.get_element_by_xpath("xs:element/xs:annotation/xs:appinfo/label")
@@ -4,8 +4,9 @@ from unittest import TestCase
 
 from lxml import etree
 
+from xml_utils.commons import constants as xml_utils_constants
 from xml_utils.xsd_tree.operations.namespaces import get_namespaces, get_default_prefix, \
-    get_target_namespace
+    get_target_namespace, get_prefix_namespace
 from xml_utils.xsd_tree.xsd_tree import XSDTree
 
 
@@ -43,6 +44,17 @@ class TestGetNamespaces(TestCase):
         self.assertTrue('xml' in list(namespaces.keys()))
 
 
+class TestGetPrefixNamespace(TestCase):
+    def test_get_prefix_namespace_of_xml_prefix(self):
+        self.assertEqual(get_prefix_namespace(dict(), 'xml'), xml_utils_constants.XML_NAMESPACE)
+
+    def test_get_prefix_namespace_of_default_namespace(self):
+        self.assertEqual(get_prefix_namespace({None: 'urn:test'}, ''), 'urn:test')
+
+    def test_get_prefix_namespace_of_unknown_prefix_returns_none(self):
+        self.assertIsNone(get_prefix_namespace({'t': 'urn:test'}, 'x'))
+
+
 class TestGetDefautPrefix(TestCase):
     def test_get_xs_prefix(self):
         xsd_string = "<xs:schema xmlns:xs='http://www.w3.org/2001/XMLSchema'></xs:schema>"
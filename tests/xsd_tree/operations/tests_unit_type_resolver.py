@@ -0,0 +1,74 @@
+"""Unit tests for the type resolver
+"""
+from unittest import TestCase
+
+from xml_utils.commons.exceptions import XMLError
+from xml_utils.xsd_tree.operations.type_resolver import XSDTypeResolver, ELEMENT, GROUP, ATTRIBUTE_GROUP
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+XS = "{http://www.w3.org/2001/XMLSchema}"
+XSD_STRING = "<xs:schema xmlns:xs='http://www.w3.org/2001/XMLSchema' xmlns='urn:test' " \
+             "targetNamespace='urn:test'>" \
+             "<xs:element name='root' type='rootType'/>" \
+             "<xs:complexType name='rootType'><xs:complexContent><xs:extension base='baseType'>" \
+             "<xs:sequence><xs:element ref='root'/><xs:group ref='items'/></xs:sequence>" \
+             "<xs:attributeGroup ref='attributes'/>" \
+             "</xs:extension></xs:complexContent></xs:complexType>" \
+             "<xs:complexType name='baseType'><xs:simpleContent><xs:extension base='code'/>" \
+             "</xs:simpleContent></xs:complexType>" \
+             "<xs:simpleType name='code'><xs:restriction base='xs:token'/></xs:simpleType>" \
+             "<xs:group name='items'><xs:sequence/></xs:group>" \
+             "<xs:attributeGroup name='attributes'/>" \
+             "</xs:schema>"
+
+
+class TestXSDTypeResolver(TestCase):
+    def setUp(self):
+        self.xsd_tree = XSDTree.build_tree(XSD_STRING)
+        self.resolver = XSDTypeResolver(self.xsd_tree)
+
+    def test_resolve_returns_declarations_by_kind(self):
+        self.assertEqual(self.resolver.resolve("rootType").get("name"), "rootType")
+        self.assertEqual(self.resolver.resolve("{urn:test}root", ELEMENT).get("name"), "root")
+        self.assertEqual(self.resolver.resolve("items", GROUP).get("name"), "items")
+        self.assertEqual(self.resolver.resolve("attributes", ATTRIBUTE_GROUP).get("name"), "attributes")
+
+    def test_resolve_builtin_type_returns_none(self):
+        self.assertIsNone(self.resolver.resolve("xs:string"))
+        self.assertTrue(self.resolver.is_builtin_type("xs:string"))
+        self.assertFalse(self.resolver.is_builtin_type("code"))
+
+    def test_expand_qname_of_xml_prefix(self):
+        root_type = self.resolver.resolve("rootType")
+        self.assertEqual(self.resolver.expand_qname("xml:lang", root_type),
+                         "{http://www.w3.org/XML/1998/namespace}lang")
+        self.assertEqual(self.resolver.expand_qname("xml:lang"), "{http://www.w3.org/XML/1998/namespace}lang")
+
+    def test_resolve_unknown_name_raises_xml_error(self):
+        with self.assertRaises(XMLError):
+            self.resolver.resolve("rootType", ELEMENT)
+        with self.assertRaises(XMLError):
+            self.resolver.resolve("unknown:rootType")
+
+    def test_resolve_reference_uses_kind_of_element(self):
+        root_type = self.resolver.resolve("rootType")
+        element, group = root_type.iter(XS + "element", XS + "group")
+        attribute_group = next(root_type.iter(XS + "attributeGroup"))
+        self.assertEqual(self.resolver.resolve_reference(element).get("name"), "root")
+        self.assertEqual(self.resolver.resolve_reference(group).get("name"), "items")
+        self.assertEqual(self.resolver.resolve_reference(attribute_group).get("name"), "attributes")
+        self.assertTrue(self.resolver.resolve_reference(self.resolver.resolve("root", ELEMENT)) is root_type)
+
+    def test_get_base_types_returns_transitive_chain(self):
+        self.assertEqual(self.resolver.get_base_types("rootType"),
+                         ("{urn:test}baseType", "{urn:test}code", XS + "token"))
+        self.assertEqual(self.resolver.get_base_types("code"), (XS + "token",))
+        self.assertEqual(self.resolver.get_base_types("xs:string"), ())
+
+    def test_get_base_types_is_memoized(self):
+        self.assertTrue(self.resolver.get_base_types("rootType") is self.resolver.get_base_types("rootType"))
+
+    def test_get_base_types_of_circular_derivation_raises_xml_error(self):
+        xsd_tree = XSDTree.build_tree(XSD_STRING.replace("base='xs:token'", "base='rootType'"))
+        with self.assertRaises(XMLError):
+            XSDTypeResolver(xsd_tree).get_base_types("rootType")
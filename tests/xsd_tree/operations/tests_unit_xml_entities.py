@@ -61,4 +61,30 @@ class TestEscapeXmlEntities(TestCase):
         string = '&lt;&lt;&lt;&quot;&quot;&apos;&apos;&apos;&apos;&apos;&apos;&apos;&quot;&quot;&quot;&gt;&gt;&gt;'
 
         self.assertTrue(XmlEntities.unescape_xml_entities(string)[0] == '<<<""\'\'\'\'\'\'\'""">>>')
-        self.assertTrue(XmlEntities.unescape_xml_entities(string)[1] == 18)
\ No newline at end of file
+        self.assertTrue(XmlEntities.unescape_xml_entities(string)[1] == 18)
+
+
+class TestIterXmlEntities(TestCase):
+    def test_iter_escape_with_entities_split_between_chunks(self):
+        chunks = ['aaa<bbb>ccc&', 'amp;ddd&qu', 'ot;eee\'fff&']
+
+        xmlEntities = XmlEntities()
+
+        self.assertEqual(''.join(xmlEntities.iter_escape_xml_entities(chunks)),
+                         'aaa&lt;bbb&gt;ccc&amp;ddd&quot;eee&apos;fff&amp;')
+        self.assertEqual(xmlEntities.number_of_subs_made, 4)
+
+    def test_iter_escape_same_result_as_escape(self):
+        string = '<&lt;&quot;>&&&lt;'
+        chunks = [string[index:index + 3] for index in range(0, len(string), 3)]
+
+        self.assertEqual(''.join(XmlEntities().iter_escape_xml_entities(chunks)),
+                         XmlEntities().escape_xml_entities(string))
+
+    def test_iter_unescape_with_entities_split_between_chunks(self):
+        chunks = ['aaa&l', 't;bbb&amp', ';ccc&quot;&', 'apos;']
+
+        results = list(XmlEntities.iter_unescape_xml_entities(chunks))
+
+        self.assertEqual(''.join(result[0] for result in results), 'aaa<bbb&ccc"\'')
+        self.assertEqual(sum(result[1] for result in results), 4)
@@ -0,0 +1,58 @@
+""" Unit tests for the columnar extraction of records
+"""
+from unittest import TestCase
+
+from xml_utils.commons.exceptions import XMLError
+from xml_utils.xsd_tree.columnar import ColumnarExtractor
+
+XML_STRING = "<data xmlns:m='urn:meta'><header><count>3</count></header>" \
+             "<record id='1'><title>first</title><size>10</size><m:meta m:lang='en'/></record>" \
+             "<record id='2'><title>second</title><size>x</size></record>" \
+             "<record id='3'><size>30</size><m:meta m:lang='fr'/></record>" \
+             "</data>"
+FIELDS = {'id': '@id', 'title': 'title', 'size': 'size', 'lang': 'm:meta/@m:lang'}
+NAMESPACES = {'m': 'urn:meta'}
+
+
+class TestColumnarExtractor(TestCase):
+    def test_extract_returns_columns_of_records(self):
+        columns = ColumnarExtractor('record', FIELDS, namespaces=NAMESPACES, as_array=False).extract(XML_STRING)
+        self.assertEqual(columns['id'].values, ['1', '2', '3'])
+        self.assertEqual(columns['title'].values, ['first', 'second', ''])
+        self.assertEqual(columns['lang'].values, ['en', '', 'fr'])
+
+    def test_extract_coerces_typed_columns(self):
+        extractor = ColumnarExtractor('record', FIELDS, xsd_types={'id': 'xs:int', 'size': 'xs:unsignedByte'},
+                                      namespaces=NAMESPACES, as_array=False)
+        columns = extractor.extract(XML_STRING)
+        self.assertEqual(columns['id'].values, [1, 2, 3])
+        self.assertEqual(columns['size'].values, [10, None, 30])
+        self.assertEqual(columns['size'].invalid, [1])
+
+    def test_iter_chunks_yields_chunks_of_records(self):
+        extractor = ColumnarExtractor('record', {'id': '@id'}, xsd_types={'id': 'xs:int'}, chunk_size=2,
+                                      as_array=False)
+        self.assertEqual([chunk['id'].values for chunk in extractor.iter_chunks(XML_STRING)], [[1, 2], [3]])
+
+    def test_extract_concatenates_chunks(self):
+        extractor = ColumnarExtractor('record', FIELDS, xsd_types={'size': 'xs:int'}, namespaces=NAMESPACES,
+                                      chunk_size=1, as_array=False)
+        columns = extractor.extract(XML_STRING)
+        self.assertEqual(columns['size'].values, [10, None, 30])
+        self.assertEqual(columns['size'].invalid, [1])
+        self.assertEqual(columns['title'].values, ['first', 'second', ''])
+
+    def test_extract_without_records_returns_empty_columns(self):
+        columns = ColumnarExtractor('item', {'id': '@id'}, as_array=False).extract(XML_STRING)
+        self.assertEqual(columns['id'].values, [])
+
+    def test_extract_field_with_predicate(self):
+        fields = {'english': "m:meta[@m:lang='en']", 'lang': "m:meta[@m:lang='fr']/@m:lang"}
+        columns = ColumnarExtractor('record', fields, namespaces=NAMESPACES, as_array=False).extract(
+            XML_STRING.replace("<m:meta m:lang='en'/>", "<m:meta m:lang='en'>english</m:meta>"))
+        self.assertEqual(columns['english'].values, ['english', '', ''])
+        self.assertEqual(columns['lang'].values, ['', '', 'fr'])
+
+    def test_unknown_attribute_prefix_raises_xml_error(self):
+        with self.assertRaises(XMLError):
+            ColumnarExtractor('record', {'lang': 'meta/@u:lang'}, namespaces=NAMESPACES)
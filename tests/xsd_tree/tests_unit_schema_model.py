@@ -0,0 +1,86 @@
+""" Unit tests for the schema model
+"""
+import pickle
+from unittest import TestCase
+
+from xml_utils.commons.exceptions import XMLError
+from xml_utils.xsd_tree.schema_model import SchemaModel, UNBOUNDED
+
+XS = "{http://www.w3.org/2001/XMLSchema}"
+XSD_STRING = "<xs:schema xmlns:xs='http://www.w3.org/2001/XMLSchema' xmlns:t='urn:test' " \
+             "targetNamespace='urn:test'>" \
+             "<xs:element name='root' type='t:rootType'/>" \
+             "<xs:complexType name='rootType'><xs:annotation><xs:documentation>doc</xs:documentation>" \
+             "</xs:annotation><xs:sequence>" \
+             "<xs:element name='title' type='xs:string' minOccurs='0'/>" \
+             "<xs:element name='item' type='t:itemType' maxOccurs='unbounded'/>" \
+             "</xs:sequence></xs:complexType>" \
+             "<xs:simpleType name='itemType'><xs:restriction base='xs:token'>" \
+             "<xs:enumeration value='a'/><xs:enumeration value='b'/></xs:restriction></xs:simpleType>" \
+             "</xs:schema>"
+
+
+class TestSchemaModel(TestCase):
+    def setUp(self):
+        self.model = SchemaModel.from_string(XSD_STRING)
+
+    def test_global_declarations_are_indexed_by_expanded_name(self):
+        self.assertEqual(list(self.model.elements), ['{urn:test}root'])
+        self.assertEqual(list(self.model.complex_types), ['{urn:test}rootType'])
+        self.assertEqual(list(self.model.simple_types), ['{urn:test}itemType'])
+        self.assertEqual(self.model.target_namespace, 'urn:test')
+
+    def test_references_are_expanded(self):
+        root = self.model.elements['{urn:test}root']
+        self.assertEqual(root.type, '{urn:test}rootType')
+        self.assertTrue(self.model.get_type(root.type) is self.model.complex_types['{urn:test}rootType'])
+
+    def test_local_elements_have_occurs_and_builtin_types(self):
+        title, item = self.model.complex_types['{urn:test}rootType'].iter('element')
+        self.assertEqual((title.name, title.type, title.min_occurs, title.max_occurs),
+                         ('title', XS + 'string', 0, 1))
+        self.assertTrue(title.is_builtin_type())
+        self.assertEqual((item.min_occurs, item.max_occurs), (1, UNBOUNDED))
+        self.assertFalse(item.is_builtin_type())
+
+    def test_local_declarations_follow_form_defaults(self):
+        xsd_string = XSD_STRING.replace("targetNamespace='urn:test'", "targetNamespace='urn:test' "
+                                        "elementFormDefault='qualified' attributeFormDefault='qualified'")
+        xsd_string = xsd_string.replace("<xs:element name='title' type='xs:string' minOccurs='0'/>",
+                                        "<xs:element name='title' type='xs:string' minOccurs='0' form='unqualified'/>")
+        xsd_string = xsd_string.replace("</xs:sequence>", "</xs:sequence><xs:attribute name='id'/>")
+        model = SchemaModel.from_string(xsd_string)
+        root_type = model.complex_types['{urn:test}rootType']
+        self.assertEqual([element.name for element in root_type.iter('element')], ['title', '{urn:test}item'])
+        self.assertEqual([attribute.name for attribute in root_type.iter('attribute')], ['{urn:test}id'])
+
+    def test_references_to_xml_namespace_are_resolved(self):
+        xsd_string = XSD_STRING.replace("</xs:sequence>", "</xs:sequence><xs:attribute ref='xml:lang'/>")
+        model = SchemaModel.from_string(xsd_string)
+        attribute, = model.complex_types['{urn:test}rootType'].iter('attribute')
+        self.assertEqual(attribute.ref, '{http://www.w3.org/XML/1998/namespace}lang')
+
+    def test_annotations_are_ignored(self):
+        self.assertEqual(list(self.model.iter('annotation')), [])
+        self.assertEqual(self.model.complex_types['{urn:test}rootType'].children[0].kind, 'sequence')
+
+    def test_facets_have_values(self):
+        restriction = self.model.simple_types['{urn:test}itemType'].children[0]
+        self.assertEqual(restriction.base, XS + 'token')
+        self.assertEqual([facet.value for facet in restriction.children], ['a', 'b'])
+
+    def test_nodes_are_read_only(self):
+        with self.assertRaises(AttributeError):
+            self.model.elements['{urn:test}root'].name = 'other'
+        with self.assertRaises(AttributeError):
+            self.model.root = None
+
+    def test_model_can_be_pickled(self):
+        model = pickle.loads(pickle.dumps(self.model))
+        self.assertEqual([(node.kind, node.name, node.type) for node in model.iter()],
+                         [(node.kind, node.name, node.type) for node in self.model.iter()])
+        self.assertEqual(list(model.simple_types), ['{urn:test}itemType'])
+
+    def test_unknown_prefix_raises_xml_error(self):
+        with self.assertRaises(XMLError):
+            SchemaModel.from_string(XSD_STRING.replace("type='t:rootType'", "type='u:rootType'"))
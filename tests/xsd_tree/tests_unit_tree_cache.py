@@ -0,0 +1,87 @@
+""" Unit tests for the tree cache
+"""
+from unittest import TestCase
+
+from xml_utils.xsd_hash import xsd_hash
+from xml_utils.xsd_tree.operations.attribute import set_attribute
+from xml_utils.xsd_tree.operations.namespaces import get_namespaces, get_global_namespace
+from xml_utils.xsd_tree.tree_cache import XSDTreeCache
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+XSD_STRING = "<xs:schema xmlns='urn:test' xmlns:xs='http://www.w3.org/2001/XMLSchema'>" \
+             "<xs:element name='root'/></xs:schema>"
+
+
+class TestXSDTreeCache(TestCase):
+    def setUp(self):
+        self.tree_cache = XSDTreeCache()
+
+    def test_get_tree_returns_cached_tree(self):
+        xsd_tree = self.tree_cache.get_tree(XSD_STRING)
+        self.assertTrue(self.tree_cache.get_tree(XSD_STRING) is xsd_tree)
+        statistics = self.tree_cache.get_statistics()
+        self.assertEqual((statistics['hits'], statistics['misses']), (1, 1))
+
+    def test_get_tree_with_copy_returns_new_tree(self):
+        xsd_tree = self.tree_cache.get_tree(XSD_STRING)
+        xsd_tree_copy = self.tree_cache.get_tree(XSD_STRING, copy=True)
+        self.assertTrue(xsd_tree_copy is not xsd_tree)
+        self.assertEqual(XSDTree.tostring(xsd_tree_copy), XSDTree.tostring(xsd_tree))
+
+    def test_get_tree_with_different_profiles_returns_different_trees(self):
+        xsd_tree = self.tree_cache.get_tree(XSD_STRING)
+        self.assertTrue(self.tree_cache.get_tree(XSD_STRING, parser='hash') is not xsd_tree)
+
+    def test_get_tree_evicts_least_recently_used_tree(self):
+        tree_cache = XSDTreeCache(max_size=len(XSD_STRING) * 2)
+        other_xsd_string = XSD_STRING.replace('root', 'rook')
+        last_xsd_string = XSD_STRING.replace('root', 'roof')
+        tree_cache.get_tree(XSD_STRING)
+        tree_cache.get_tree(other_xsd_string)
+        tree_cache.get_tree(XSD_STRING)
+        tree_cache.get_tree(last_xsd_string)
+        tree_cache.get_tree(XSD_STRING)
+
+        statistics = tree_cache.get_statistics()
+        self.assertEqual(statistics['trees'], 2)
+        self.assertEqual(statistics['evictions'], 1)
+        self.assertEqual(statistics['hits'], 2)
+        self.assertTrue(statistics['size'] <= statistics['max_size'])
+
+    def test_clear_removes_all_trees(self):
+        self.tree_cache.get_tree(XSD_STRING)
+        self.tree_cache.clear()
+        self.assertEqual(self.tree_cache.get_statistics()['trees'], 0)
+
+
+class TestXSDTreeWithCache(TestCase):
+    def setUp(self):
+        self.tree_cache = XSDTreeCache()
+        XSDTree.set_tree_cache(self.tree_cache)
+
+    def tearDown(self):
+        XSDTree.set_tree_cache(None)
+
+    def test_operations_share_one_parse(self):
+        get_namespaces(XSD_STRING)
+        get_global_namespace(XSD_STRING)
+        set_attribute(XSD_STRING, "xs:element", "type", "xs:string")
+        self.assertEqual(self.tree_cache.get_statistics()['misses'], 1)
+
+    def test_get_namespaces_same_result_as_without_cache(self):
+        namespaces = get_namespaces(XSD_STRING)
+        XSDTree.set_tree_cache(None)
+        self.assertEqual(namespaces, get_namespaces(XSD_STRING))
+
+    def test_get_global_namespace_same_result_as_without_cache(self):
+        self.assertEqual(get_global_namespace(XSD_STRING), 'urn:test')
+
+    def test_set_attribute_does_not_modify_cached_tree(self):
+        set_attribute(XSD_STRING, "xs:element", "type", "xs:string")
+        self.assertTrue('type=' not in XSDTree.tostring(XSDTree.build_cached_tree(XSD_STRING, copy=False)))
+
+    def test_get_hash_same_result_as_without_cache(self):
+        content_hash = xsd_hash.get_hash(XSD_STRING)
+        self.assertEqual(content_hash, xsd_hash.get_hash(XSD_STRING))
+        XSDTree.set_tree_cache(None)
+        self.assertEqual(content_hash, xsd_hash.get_hash(XSD_STRING))
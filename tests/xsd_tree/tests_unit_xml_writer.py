@@ -0,0 +1,69 @@
+""" Unit tests for the incremental XML writer
+"""
+from io import BytesIO
+from unittest import TestCase
+
+from xml_utils.commons import constants as xml_utils_constants
+from xml_utils.commons.exceptions import XMLError
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+
+class TestXMLWriter(TestCase):
+    def test_write_nested_elements(self):
+        output = BytesIO()
+        with XSDTree.incremental_writer(output) as writer:
+            with writer.element('root', {'id': '1'}):
+                with writer.element('child'):
+                    writer.write('text & more')
+                writer.write(XSDTree.create_element('other'))
+
+        self.assertEqual(XSDTree.tostring(XSDTree.build_tree(output.getvalue())),
+                         '<root id="1"><child>text &amp; more</child><other/></root>')
+
+    def test_write_declares_nsmap_on_root(self):
+        output = BytesIO()
+        with XSDTree.incremental_writer(output, nsmap={'xs': xml_utils_constants.SCHEMA_NAMESPACE}) as writer:
+            with writer.element('xs:schema'):
+                with writer.element('xs:element', name='root', type='xs:string'):
+                    pass
+
+        self.assertEqual(XSDTree.tostring(XSDTree.build_tree(output.getvalue())),
+                         '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+                         '<xs:element name="root" type="xs:string"/></xs:schema>')
+
+    def test_write_resolves_known_prefixes(self):
+        output = BytesIO()
+        with XSDTree.incremental_writer(output) as writer:
+            with writer.element('root', {'xml:lang': 'en'}):
+                with writer.element('xsl:output', method='html'):
+                    pass
+
+        root = XSDTree.build_tree(output.getvalue()).getroot()
+        self.assertEqual(root.attrib['{%s}lang' % xml_utils_constants.XML_NAMESPACE], 'en')
+        self.assertEqual(root[0].tag, '{%s}output' % xml_utils_constants.XSL_NAMESPACE)
+        self.assertEqual(root[0].prefix, 'xsl')
+
+    def test_write_unknown_prefix_raises_xml_error(self):
+        output = BytesIO()
+        with self.assertRaises(XMLError):
+            with XSDTree.incremental_writer(output) as writer:
+                with writer.element('unknown:root'):
+                    pass
+
+    def test_write_flushes_periodically(self):
+        output = BytesIO()
+        with XSDTree.incremental_writer(output, flush_interval=10) as writer:
+            with writer.element('root'):
+                for index in range(20):
+                    with writer.element('item'):
+                        writer.write(str(index))
+                self.assertTrue(b'<item>19</item>' in output.getvalue())
+
+    def test_write_exception_in_element_restores_scopes(self):
+        output = BytesIO()
+        with XSDTree.incremental_writer(output) as writer:
+            with writer.element('root'):
+                with self.assertRaises(ValueError):
+                    with writer.element('child'):
+                        raise ValueError()
+                self.assertEqual(len(writer._scopes), 1)
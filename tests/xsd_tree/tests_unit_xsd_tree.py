@@ -0,0 +1,192 @@
+""" Unit tests for XSDTree
+"""
+import mmap
+import socket
+from io import BytesIO
+from os import remove
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from threading import Thread
+from unittest import TestCase
+
+from lxml import etree
+
+from xml_utils.commons.exceptions import XMLError
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+XSD_STRING = "<xs:schema xmlns:xs='http://www.w3.org/2001/XMLSchema'><xs:element name='élément'/></xs:schema>"
+
+
+class TestBuildTree(TestCase):
+    def setUp(self):
+        self.expected_string = XSDTree.tostring(XSDTree.build_tree(XSD_STRING))
+        with NamedTemporaryFile(suffix='.xsd', delete=False) as xsd_file:
+            xsd_file.write(XSD_STRING.encode('utf-8'))
+            self.xsd_path = xsd_file.name
+
+    def tearDown(self):
+        remove(self.xsd_path)
+
+    def test_build_tree_from_bytes(self):
+        xsd_tree = XSDTree.build_tree(XSD_STRING.encode('utf-8'))
+        self.assertEqual(XSDTree.tostring(xsd_tree), self.expected_string)
+
+    def test_build_tree_from_bytearray(self):
+        xsd_tree = XSDTree.build_tree(bytearray(XSD_STRING.encode('utf-8')))
+        self.assertEqual(XSDTree.tostring(xsd_tree), self.expected_string)
+
+    def test_build_tree_from_memoryview(self):
+        xsd_tree = XSDTree.build_tree(memoryview(XSD_STRING.encode('utf-8')))
+        self.assertEqual(XSDTree.tostring(xsd_tree), self.expected_string)
+
+    def test_build_tree_from_path(self):
+        xsd_tree = XSDTree.build_tree(Path(self.xsd_path))
+        self.assertEqual(XSDTree.tostring(xsd_tree), self.expected_string)
+
+    def test_build_tree_from_file_object(self):
+        with open(self.xsd_path, 'rb') as xsd_file:
+            xsd_tree = XSDTree.build_tree(xsd_file)
+        self.assertEqual(XSDTree.tostring(xsd_tree), self.expected_string)
+
+    def test_build_tree_from_mmap(self):
+        with open(self.xsd_path, 'rb') as xsd_file:
+            with mmap.mmap(xsd_file.fileno(), 0, access=mmap.ACCESS_READ) as xsd_mmap:
+                xsd_tree = XSDTree.build_tree(xsd_mmap)
+        self.assertEqual(XSDTree.tostring(xsd_tree), self.expected_string)
+
+    def test_build_tree_invalid_bytes_raises_xml_syntax_error(self):
+        with self.assertRaises(etree.XMLSyntaxError):
+            XSDTree.build_tree(BytesIO(b"invalid"))
+
+
+class TestParserProfiles(TestCase):
+    def test_get_parser_returns_same_parser_in_same_thread(self):
+        self.assertTrue(XSDTree.get_parser('hash') is XSDTree.get_parser('hash'))
+
+    def test_get_parser_returns_different_parser_in_other_thread(self):
+        parsers = []
+        thread = Thread(target=lambda: parsers.append(XSDTree.get_parser('hash')))
+        thread.start()
+        thread.join()
+        self.assertTrue(parsers[0] is not XSDTree.get_parser('hash'))
+
+    def test_get_parser_unknown_profile_raises_xml_error(self):
+        with self.assertRaises(XMLError):
+            XSDTree.get_parser('unknown')
+
+    def test_get_parser_profile_returns_copy_of_options(self):
+        options = XSDTree.get_parser_profile('strict')
+        self.assertEqual(options, dict(recover=False, resolve_entities=False, load_dtd=False, no_network=True))
+        options['recover'] = True
+        self.assertFalse(XSDTree.get_parser_profile('strict')['recover'])
+
+    def test_get_parser_profile_unknown_profile_raises_xml_error(self):
+        with self.assertRaises(XMLError):
+            XSDTree.get_parser_profile('unknown')
+
+    def test_register_existing_profile_raises_xml_error(self):
+        with self.assertRaises(XMLError):
+            XSDTree.register_parser_profile('hash', remove_blank_text=True)
+
+    def test_build_tree_with_hash_profile_removes_comments_and_blanks(self):
+        xsd_string = "<xs:schema xmlns:xs='http://www.w3.org/2001/XMLSchema'>\n" \
+                     "<!-- comment --><xs:element name='root'/>\n</xs:schema>"
+        xsd_tree = XSDTree.build_tree(xsd_string, parser='hash')
+        self.assertEqual(XSDTree.tostring(xsd_tree),
+                         '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"><xs:element name="root"/></xs:schema>')
+
+    def test_build_tree_does_not_change_default_parser(self):
+        xsd_string = "<xs:schema xmlns:xs='http://www.w3.org/2001/XMLSchema'><!-- comment --></xs:schema>"
+        XSDTree.build_tree(xsd_string, parser='hash')
+        self.assertTrue('comment' in XSDTree.tostring(XSDTree.build_tree(xsd_string)))
+
+    def test_iterparse_with_hash_profile_removes_comments(self):
+        xsd_string = "<xs:schema xmlns:xs='http://www.w3.org/2001/XMLSchema'><!-- comment --></xs:schema>"
+        events = [event for event, element in XSDTree.iterparse(xsd_string, ('end', 'comment'), profile='hash')]
+        self.assertEqual(events, ['end'])
+
+
+class TestWrite(TestCase):
+    def setUp(self):
+        self.xsd_tree = XSDTree.build_tree(XSD_STRING)
+        self.expected_bytes = XSDTree.tostring(self.xsd_tree).encode('utf-8')
+
+    def test_tostring_with_utf8_encoding_returns_bytes(self):
+        self.assertEqual(XSDTree.tostring(self.xsd_tree, encoding='utf-8'), self.expected_bytes)
+
+    def test_write_to_file_object(self):
+        output = BytesIO()
+        XSDTree.write(self.xsd_tree, output)
+        self.assertEqual(XSDTree.tostring(XSDTree.build_tree(output.getvalue())), XSDTree.tostring(self.xsd_tree))
+
+    def test_write_element_to_file_name(self):
+        with NamedTemporaryFile(suffix='.xsd') as xsd_file:
+            XSDTree.write(self.xsd_tree.getroot(), xsd_file.name)
+            self.assertEqual(XSDTree.tostring(XSDTree.build_tree(Path(xsd_file.name))),
+                             XSDTree.tostring(self.xsd_tree))
+
+    def test_write_to_socket(self):
+        sender, receiver = socket.socketpair()
+        with sender, receiver:
+            XSDTree.write(self.xsd_tree, sender)
+            sender.shutdown(socket.SHUT_WR)
+            with receiver.makefile('rb') as received:
+                received_tree = XSDTree.build_tree(received)
+        self.assertEqual(XSDTree.tostring(received_tree), XSDTree.tostring(self.xsd_tree))
+
+
+class TestStreamIterfind(TestCase):
+    def setUp(self):
+        self.xml_string = "<root xmlns:ns='urn:test'>" \
+                          "<records><record id='1'><value>1</value></record>" \
+                          "<other/><record id='2'><value>2</value></record></records>" \
+                          "<ns:record id='3'><record id='4'/></ns:record></root>"
+
+    def _get_ids(self, match):
+        return [element.attrib['id'] for element in XSDTree.stream_iterfind(self.xml_string, match)]
+
+    def test_stream_iterfind_children_path(self):
+        self.assertEqual(self._get_ids('records/record'), ['1', '2'])
+
+    def test_stream_iterfind_same_result_as_iterfind(self):
+        expected_elements = XSDTree.iterfind(self.xml_string, 'records/record')
+        self.assertEqual([XSDTree.tostring(element) for element in XSDTree.stream_iterfind(self.xml_string,
+                                                                                          'records/record')],
+                         [XSDTree.tostring(element) for element in expected_elements])
+
+    def test_stream_iterfind_descendants_path(self):
+        self.assertEqual(sorted(self._get_ids('.//record')), ['1', '2', '4'])
+
+    def test_stream_iterfind_namespace_path(self):
+        self.assertEqual(self._get_ids('{urn:test}record'), ['3'])
+        self.assertEqual(sorted(self._get_ids('.//{*}record')), ['1', '2', '3', '4'])
+
+    def test_stream_iterfind_wildcard_path(self):
+        self.assertEqual(self._get_ids('*/record'), ['1', '2', '4'])
+
+    def test_stream_iterfind_nested_match_keeps_content(self):
+        children_count = {element.attrib['id']: len(element)
+                          for element in XSDTree.stream_iterfind(self.xml_string, './/{*}record')}
+        self.assertEqual(children_count, {'1': 1, '2': 1, '3': 1, '4': 0})
+
+    def test_stream_iterfind_stops_reading_when_iteration_stops(self):
+        xml_string = "<root><record id='1'/>" + "<record id='2'/>" * 10 + "<invalid></root>"
+        elements = XSDTree.stream_iterfind(xml_string, 'record')
+        self.assertEqual(next(elements).attrib['id'], '1')
+        elements.close()
+
+    def test_stream_iterfind_deletes_processed_elements_of_nested_containers(self):
+        xml_string = "<root>" + ("<section><group>" + "<record id='1'/>" * 3 + "</group></section>") * 5 + "</root>"
+        records = list(XSDTree.stream_iterfind(xml_string, './/record'))
+        self.assertEqual(len(records), 15)
+        # only the ancestors of the last record are left
+        root = records[-1].getroottree().getroot()
+        self.assertEqual(sum(1 for _ in root.iter()), 4)
+
+    def test_stream_iterfind_unsupported_path_raises_xml_error(self):
+        with self.assertRaises(XMLError):
+            list(XSDTree.stream_iterfind(self.xml_string, "record[@id='1']"))
+
+    def test_stream_iterfind_invalid_xml_raises_xml_error(self):
+        with self.assertRaises(XMLError):
+            list(XSDTree.stream_iterfind("<root><record>", 'record'))
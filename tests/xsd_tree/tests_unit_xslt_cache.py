@@ -0,0 +1,114 @@
+""" Unit tests for the XSLT cache
+"""
+import threading
+from unittest import TestCase
+
+from xml_utils.commons.exceptions import XMLError
+from xml_utils.xsd_tree.xslt_cache import XSLTCache, transform_many, xslt_cache
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+XSLT_STRING = "<xsl:stylesheet version='1.0' xmlns:xsl='http://www.w3.org/1999/XSL/Transform'>" \
+              "<xsl:output method='text'/>" \
+              "<xsl:template match='/'><xsl:value-of select='/record/title'/></xsl:template>" \
+              "</xsl:stylesheet>"
+XML_DOCUMENTS = ["<record><title>title {}</title></record>".format(index) for index in range(5)]
+
+
+class TestXSLTCache(TestCase):
+    def setUp(self):
+        self.xslt_cache = XSLTCache(max_size=2)
+
+    def test_get_xslt_returns_same_xslt_for_same_stylesheet(self):
+        xslt = self.xslt_cache.get_xslt(XSLT_STRING)
+        self.assertTrue(self.xslt_cache.get_xslt(XSLT_STRING.encode('utf-8')) is xslt)
+
+    def test_get_xslt_returns_same_xslt_for_same_tree(self):
+        xslt = self.xslt_cache.get_xslt(XSDTree.build_tree(XSLT_STRING))
+        self.assertTrue(self.xslt_cache.get_xslt(XSDTree.build_tree(XSLT_STRING)) is xslt)
+
+    def test_get_xslt_returns_other_xslt_in_other_thread(self):
+        xslt = self.xslt_cache.get_xslt(XSLT_STRING)
+        thread_xslt = []
+        thread = threading.Thread(target=lambda: thread_xslt.append(self.xslt_cache.get_xslt(XSLT_STRING)))
+        thread.start()
+        thread.join()
+        self.assertTrue(thread_xslt[0] is not xslt)
+        self.assertEqual(str(thread_xslt[0](XSDTree.build_tree(XML_DOCUMENTS[0]))), "title 0")
+
+    def test_get_xslt_evicts_least_recently_used_xslt(self):
+        xslt = self.xslt_cache.get_xslt(XSLT_STRING)
+        self.xslt_cache.get_xslt(XSLT_STRING.replace('title', 'name'))
+        self.xslt_cache.get_xslt(XSLT_STRING.replace('title', 'label'))
+        self.assertTrue(self.xslt_cache.get_xslt(XSLT_STRING) is not xslt)
+
+    def test_clear_removes_xslt(self):
+        xslt = self.xslt_cache.get_xslt(XSLT_STRING)
+        self.xslt_cache.clear()
+        self.assertTrue(self.xslt_cache.get_xslt(XSLT_STRING) is not xslt)
+
+
+class TestTransformMany(TestCase):
+    def test_transform_many_returns_results_in_order(self):
+        self.assertEqual(transform_many(XSLT_STRING, XML_DOCUMENTS),
+                         ["title {}".format(index) for index in range(5)])
+
+    def test_transform_many_with_processes_returns_same_results(self):
+        self.assertEqual(transform_many(XSLT_STRING, XML_DOCUMENTS, processes=2, chunk_size=2),
+                         transform_many(XSLT_STRING, XML_DOCUMENTS))
+
+    def test_xsd_tree_transform_many_raises_xml_error_on_invalid_document(self):
+        with self.assertRaises(XMLError):
+            XSDTree.transform_many(XSLT_STRING, ["<record>"])
+
+    def test_xsd_tree_transform_to_xslt_cached_returns_same_xslt(self):
+        xslt = XSDTree.transform_to_xslt(XSLT_STRING, cached=True)
+        self.assertTrue(XSDTree.transform_to_xslt(XSLT_STRING, cached=True) is xslt)
+
+
+class TestStylesheetMetadata(TestCase):
+    def test_get_metadata_returns_output_settings(self):
+        xslt_string = XSLT_STRING.replace("<xsl:output method='text'/>",
+                                          "<xsl:output method='html' encoding='UTF-8' indent='yes' "
+                                          "media-type='text/html'/>")
+        metadata = XSLTCache().get_metadata(xslt_string)
+        self.assertEqual((metadata.method, metadata.encoding, metadata.indent, metadata.media_type),
+                         ('html', 'UTF-8', True, 'text/html'))
+
+    def test_get_metadata_merges_output_elements(self):
+        xslt_string = XSLT_STRING.replace("<xsl:output method='text'/>",
+                                          "<xsl:output method='xml' indent='no'/><xsl:output method='text'/>")
+        metadata = XSLTCache().get_metadata(xslt_string)
+        self.assertEqual((metadata.method, metadata.indent), ('text', False))
+
+    def test_get_metadata_without_output_returns_empty_metadata(self):
+        metadata = XSLTCache().get_metadata(XSLT_STRING.replace("<xsl:output method='text'/>", ""))
+        self.assertEqual((metadata.method, metadata.encoding, metadata.indent, metadata.media_type),
+                         (None, None, None, None))
+
+    def test_get_metadata_returns_same_metadata_for_same_stylesheet(self):
+        xslt_cache = XSLTCache()
+        self.assertTrue(xslt_cache.get_metadata(XSLT_STRING) is xslt_cache.get_metadata(XSLT_STRING))
+
+
+class TestGetExtension(TestCase):
+    def test_get_extension_returns_output_method(self):
+        self.assertEqual(XSDTree.get_extension(XSDTree.build_tree(XSLT_STRING)), 'text')
+
+    def test_get_extension_of_element_returns_output_method(self):
+        self.assertEqual(XSDTree.get_extension(XSDTree.fromstring(XSLT_STRING)), 'text')
+
+    def test_get_extension_of_string_returns_output_method(self):
+        self.assertEqual(XSDTree.get_extension(XSLT_STRING), 'text')
+
+    def test_get_extension_does_not_cache_stylesheet(self):
+        xslt_cache.clear()
+        XSDTree.get_extension(XSDTree.build_tree(XSLT_STRING))
+        self.assertEqual(len(xslt_cache._stylesheets), 0)
+
+    def test_get_extension_without_output_method_raises_xml_error(self):
+        xml_tree = XSDTree.build_tree(XSLT_STRING.replace("<xsl:output method='text'/>", ""))
+        with self.assertRaises(XMLError):
+            XSDTree.get_extension(xml_tree)
+
+    def test_get_stylesheet_metadata_returns_metadata(self):
+        self.assertEqual(XSDTree.get_stylesheet_metadata(XSLT_STRING).method, 'text')
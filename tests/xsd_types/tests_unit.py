@@ -0,0 +1,27 @@
+"""Unit tests for the XSD types utils
+"""
+from unittest import TestCase
+
+from xml_utils.xsd_types.xsd_types import get_xsd_types, get_xsd_types_set, get_xsd_numbers, \
+    get_xsd_numbers_set, get_xsd_floating_numbers, get_xsd_floating_numbers_set, is_builtin_type
+
+
+class TestXsdTypes(TestCase):
+    def test_get_xsd_types_has_no_duplicates(self):
+        xsd_types = get_xsd_types('xs')
+        self.assertEqual(len(xsd_types), len(set(xsd_types)))
+
+    def test_sets_have_same_types_as_lists(self):
+        self.assertEqual(get_xsd_types_set('xs'), set(get_xsd_types('xs')))
+        self.assertEqual(get_xsd_numbers_set(), set(get_xsd_numbers()))
+        self.assertEqual(get_xsd_floating_numbers_set('xsd'), set(get_xsd_floating_numbers('xsd')))
+
+    def test_sets_are_computed_once_per_prefix(self):
+        self.assertTrue(get_xsd_types_set('xs') is get_xsd_types_set('xs'))
+        self.assertTrue('xs:string' in get_xsd_types_set('xs'))
+        self.assertFalse('xs:string' in get_xsd_types_set('xsd'))
+
+    def test_is_builtin_type_uses_expanded_names(self):
+        self.assertTrue(is_builtin_type('{http://www.w3.org/2001/XMLSchema}string'))
+        self.assertFalse(is_builtin_type('xs:string'))
+        self.assertFalse(is_builtin_type('{urn:test}string'))
@@ -0,0 +1,84 @@
+"""Unit tests for the coercion of values to builtin types
+"""
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from unittest import TestCase, skipIf
+
+from xml_utils.commons.exceptions import XMLError
+from xml_utils.xsd_types import coercion
+from xml_utils.xsd_types.coercion import coerce_column, coerce_columns, get_type_category, INTEGER, \
+    DECIMAL, FLOATING, BOOLEAN, DATE_TIME, STRING
+
+
+class TestGetTypeCategory(TestCase):
+    def test_get_type_category_accepts_all_name_forms(self):
+        self.assertEqual(get_type_category('int'), INTEGER)
+        self.assertEqual(get_type_category('xs:decimal'), DECIMAL)
+        self.assertEqual(get_type_category('{http://www.w3.org/2001/XMLSchema}double'), FLOATING)
+        self.assertEqual(get_type_category('xsd:boolean'), BOOLEAN)
+        self.assertEqual(get_type_category('xs:dateTime'), DATE_TIME)
+        self.assertEqual(get_type_category('xs:token'), STRING)
+
+
+class TestCoerceColumn(TestCase):
+    def test_coerce_integers(self):
+        column = coerce_column([' 1', '+2', '-3 '], 'xs:int', as_array=False)
+        self.assertEqual(column.values, [1, 2, -3])
+        self.assertEqual(column.invalid, [])
+
+    def test_coerce_integers_reports_invalid_positions(self):
+        column = coerce_column(['1', '1.5', '1_000', 'a', '٣'], 'xs:integer', as_array=False)
+        self.assertEqual(column.values, [1, None, None, None, None])
+        self.assertEqual(column.invalid, [1, 2, 3, 4])
+
+    def test_coerce_integers_checks_range_of_bounded_types(self):
+        column = coerce_column(['127', '128', '-129', 'x'], 'xs:byte', as_array=False)
+        self.assertEqual(column.invalid, [1, 2, 3])
+        column = coerce_column(['1', '0'], 'xs:positiveInteger', as_array=False)
+        self.assertEqual(column.invalid, [1])
+
+    def test_coerce_decimals_and_floats(self):
+        self.assertEqual(coerce_column(['1.50', '.5'], 'xs:decimal', as_array=False).values,
+                         [Decimal('1.50'), Decimal('0.5')])
+        column = coerce_column(['1e3', 'INF', '-INF', 'inf', '1e3\n2'], 'xs:double', as_array=False)
+        self.assertEqual(column.values[:3], [1000.0, float('inf'), float('-inf')])
+        self.assertEqual(column.invalid, [3, 4])
+
+    def test_coerce_booleans(self):
+        column = coerce_column(['true', '0', 'True'], 'xs:boolean', as_array=False)
+        self.assertEqual(column.values, [True, False, None])
+        self.assertEqual(column.invalid, [2])
+
+    def test_coerce_dates(self):
+        column = coerce_column(['2020-01-31', '2020-02-30', '2020-03-01Z'], 'xs:date', as_array=False)
+        self.assertEqual(column.values, [date(2020, 1, 31), None, date(2020, 3, 1)])
+        self.assertEqual(column.invalid, [1])
+
+    def test_coerce_date_times(self):
+        column = coerce_column(['2020-01-31T10:00:00Z', '2020-01-31T10:00:00.5+02:00', '2020-01-31'],
+                               'xs:dateTime', as_array=False)
+        self.assertEqual(column.values[:2], [datetime(2020, 1, 31, 10, tzinfo=timezone.utc),
+                                             datetime(2020, 1, 31, 10, 0, 0, 500000,
+                                                      tzinfo=timezone(timedelta(hours=2)))])
+        self.assertEqual(column.invalid, [2])
+
+    def test_coerce_strings_keeps_values(self):
+        self.assertEqual(coerce_column([' a '], 'xs:string', as_array=False).values, [' a '])
+
+    def test_coerce_columns_by_name(self):
+        columns = coerce_columns({'a': ['1'], 'b': ['x']}, {'a': 'xs:long'}, as_array=False)
+        self.assertEqual((columns['a'].values, columns['b'].values), ([1], ['x']))
+
+    @skipIf(coercion.numpy is not None, "NumPy is installed")
+    def test_coerce_to_array_without_numpy_raises_xml_error(self):
+        with self.assertRaises(XMLError):
+            coerce_column(['1'], 'xs:int', as_array=True)
+
+    @skipIf(coercion.numpy is None, "NumPy is not installed")
+    def test_coerce_to_array(self):
+        column = coerce_column(['1', 'x', '3'], 'xs:int', as_array=True)
+        self.assertEqual(column.values.tolist(), [1, 0, 3])
+        self.assertEqual(column.invalid, [1])
+        column = coerce_column(['1.5', 'x'], 'xs:float', as_array=True)
+        self.assertEqual(column.values[0], 1.5)
+        self.assertTrue(coercion.numpy.isnan(column.values[1]))
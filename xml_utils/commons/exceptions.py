@@ -14,3 +14,8 @@ class HTMLError(Exception):
     """
     def __init__(self, message):
         self.message = message
+
+
+class ValidationBackendError(XMLError):
+    """ Exception raised when a validation backend is unavailable (timeout, server offline...)
+    """
@@ -0,0 +1,228 @@
+""" Bounded and cached diff of HTML fragments
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from html import escape
+
+from lxml import html
+from lxml.html.defs import block_tags
+from lxml.html.diff import htmldiff
+
+from xml_utils.commons.exceptions import HTMLError
+
+# text replaced by the content of a wrapper, to serialize its start and end tags
+CONTENT_MARKER = '\ue000'
+
+
+class HTMLDiffEngine(object):
+    """ Diff of HTML fragments, bounded in size and time.
+
+    Small fragments are diffed at once with lxml htmldiff. Larger fragments are
+    split into top-level blocks: identical blocks are matched by hash and only
+    changed blocks go through the token diff. Fragments made of a single block
+    with the same start and end tags in both versions (e.g. a wrapping div) are
+    split inside this block. Changed regions larger than the
+    size budget, or reached once the time budget is spent, are marked as
+    deleted and inserted as a whole. Results are cached by digest of both fragments.
+    """
+
+    def __init__(self, block_threshold=2000, max_region_size=20000, time_budget=1.0, cache_size=256):
+        """ Initializes the engine
+
+        Params:
+            block_threshold: size (characters) of the fragments above which they are diffed block by block
+            max_region_size: maximum size (characters) of changed blocks diffed token by token
+            time_budget: time (seconds) after which changed blocks are no longer diffed token by token
+            cache_size: number of results kept
+        """
+        self.block_threshold = block_threshold
+        self.max_region_size = max_region_size
+        self.time_budget = time_budget
+        self.cache_size = cache_size
+        # (old digest, new digest) -> diff
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def diff(self, old_html, new_html):
+        """ Returns the diff of two HTML fragments
+
+        Params:
+            old_html:
+            new_html:
+
+        Returns:
+        """
+        key = (_get_digest(old_html), _get_digest(new_html))
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                return result
+
+        if len(old_html) + len(new_html) <= self.block_threshold:
+            result = htmldiff(old_html, new_html)
+        else:
+            result = self._diff_blocks(old_html, new_html)
+
+        with self._lock:
+            self._results[key] = result
+            if len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        return result
+
+    def clear(self):
+        """ Removes all results from the cache
+
+        Returns:
+        """
+        with self._lock:
+            self._results.clear()
+
+    def _diff_blocks(self, old_html, new_html):
+        """ Returns the diff of two fragments, block by block
+
+        Params:
+            old_html:
+            new_html:
+
+        Returns:
+        """
+        old_blocks = split_blocks(old_html)
+        new_blocks = split_blocks(new_html)
+        if len(old_blocks) == 1 and len(new_blocks) == 1:
+            old_wrapper = split_wrapper(old_blocks[0])
+            new_wrapper = split_wrapper(new_blocks[0])
+            if old_wrapper is not None and new_wrapper is not None and \
+                    (old_wrapper[0], old_wrapper[2]) == (new_wrapper[0], new_wrapper[2]):
+                # the blocks of the wrapper are diffed instead
+                return old_wrapper[0] + self._diff_blocks(old_wrapper[1], new_wrapper[1]) + old_wrapper[2]
+
+        deadline = time.monotonic() + self.time_budget
+
+        matcher = SequenceMatcher(None, [_get_digest(block) for block in old_blocks],
+                                  [_get_digest(block) for block in new_blocks], autojunk=False)
+        parts = []
+        for operation, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+            if operation == 'equal':
+                parts.extend(new_blocks[new_start:new_end])
+                continue
+
+            old_region = ''.join(old_blocks[old_start:old_end])
+            new_region = ''.join(new_blocks[new_start:new_end])
+            if len(old_region) + len(new_region) <= self.max_region_size and time.monotonic() < deadline:
+                parts.append(_diff_region(old_region, new_region))
+            else:
+                parts.append(_mark_region(old_region, new_region))
+
+        return ''.join(parts)
+
+
+def split_blocks(html_text):
+    """ Splits an HTML fragment into top-level blocks (serialized with their tail),
+    consecutive inline content being kept in the same block
+
+    Params:
+        html_text:
+
+    Returns:
+    """
+    if not html_text.strip():
+        return []
+    try:
+        fragments = html.fragments_fromstring(html_text)
+    except Exception as e:
+        raise HTMLError(str(e))
+
+    blocks = []
+    inline_parts = []
+    for fragment in fragments:
+        if isinstance(fragment, str):
+            # leading text, returned unescaped by the parser
+            inline_parts.append(escape(fragment, quote=False))
+        elif fragment.tag in block_tags:
+            if inline_parts:
+                blocks.append(''.join(inline_parts))
+                inline_parts = []
+            blocks.append(html.tostring(fragment, encoding='unicode'))
+        else:
+            inline_parts.append(html.tostring(fragment, encoding='unicode'))
+
+    if inline_parts:
+        blocks.append(''.join(inline_parts))
+    return blocks
+
+
+def split_wrapper(block):
+    """ Splits a block into its start tag, its content, and its end tag with its tail
+
+    Params:
+        block:
+
+    Returns:
+        None if the block is not a single element with content
+    """
+    try:
+        fragments = html.fragments_fromstring(block)
+    except Exception as e:
+        raise HTMLError(str(e))
+    if len(fragments) != 1 or isinstance(fragments[0], str):
+        return None
+    element = fragments[0]
+    if not element.text and len(element) == 0:
+        return None
+
+    shell = element.makeelement(element.tag, element.attrib)
+    shell.text = CONTENT_MARKER
+    start_tag, end_tag = html.tostring(shell, encoding='unicode').rsplit(CONTENT_MARKER, 1)
+    content = escape(element.text or '', quote=False) + \
+        ''.join(html.tostring(child, encoding='unicode') for child in element)
+    return start_tag, content, end_tag + escape(element.tail or '', quote=False)
+
+
+def _diff_region(old_region, new_region):
+    """ Returns the token diff of a changed region
+
+    Params:
+        old_region:
+        new_region:
+
+    Returns:
+    """
+    result = htmldiff(old_region, new_region)
+    # htmldiff adds an empty marker when one of the regions is empty
+    if not old_region:
+        return result.replace(' <del></del>', '')
+    if not new_region:
+        return result.replace('<ins></ins> ', '')
+    return result
+
+
+def _mark_region(old_region, new_region):
+    """ Marks a changed region as inserted and deleted as a whole (same order as htmldiff)
+
+    Params:
+        old_region:
+        new_region:
+
+    Returns:
+    """
+    parts = []
+    if new_region:
+        parts.append('<ins>%s</ins>' % new_region)
+    if old_region:
+        parts.append('<del>%s</del>' % old_region)
+    return ' '.join(parts)
+
+
+def _get_digest(text):
+    """ Returns the digest of a text
+
+    Params:
+        text:
+
+    Returns:
+    """
+    return hashlib.sha1(text.encode('utf-8')).digest()
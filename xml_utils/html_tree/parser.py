@@ -1,11 +1,20 @@
 """ Package parsing HTML
 """
 from lxml import html
-from lxml.html.diff import htmldiff
 
 from xml_utils.commons.exceptions import HTMLError
+from xml_utils.html_tree.diff import HTMLDiffEngine
+from xml_utils.html_tree.sanitizer import HTMLSanitizer
 from xml_utils.xsd_tree.xsd_tree import XSDTree
 
+# parser profile of rich text fragments
+FRAGMENT_PARSER_PROFILE = 'html_fragment'
+
+# diff engine shared by html_diff
+html_diff_engine = HTMLDiffEngine()
+# sanitizer used by safe_html
+default_sanitizer = HTMLSanitizer()
+
 
 def parse_html(html_text, parent_tag=''):
     """ Try to parse and unparse HTML to verify that is correctly formatted
@@ -18,20 +27,74 @@ def parse_html(html_text, parent_tag=''):
 
     Raises:
     """
+    # the fragment is fed between the parent tags, without building the wrapped string
+    parser = XSDTree.get_parser(FRAGMENT_PARSER_PROFILE)
     try:
-        return XSDTree.fromstring("<%s>%s</%s>" % (parent_tag, html_text, parent_tag))
+        parser.feed("<%s>" % parent_tag)
+        parser.feed(html_text)
+        parser.feed("</%s>" % parent_tag)
+        return parser.close()
     except Exception as e:
+        _reset_parser(parser)
         raise HTMLError(str(e))
 
 
-def safe_html(html_text):
+def parse_many(html_texts, parent_tag=''):
+    """ Parses several HTML fragments (e.g. all rich text fields of a record) with the same parser
+
+    Params:
+        html_texts: list of fragments, or dict of name -> fragment
+        parent_tag:
+
+    Returns:
+        list of parsed fragments, or dict of name -> parsed fragment
+
+    Raises:
+        HTMLError: listing all the fragments that could not be parsed
+    """
+    items = html_texts.items() if isinstance(html_texts, dict) else enumerate(html_texts)
+    parsed = dict()
+    errors = []
+    for key, html_text in items:
+        try:
+            parsed[key] = parse_html(html_text, parent_tag)
+        except HTMLError as e:
+            errors.append("%s: %s" % (key, e.message))
+
+    if errors:
+        raise HTMLError("\n".join(errors))
+    return parsed if isinstance(html_texts, dict) else list(parsed.values())
+
+
+def _reset_parser(parser):
+    """ Resets a feed parser after a failed parsing
+
+    Params:
+        parser:
+
+    Returns:
+    """
+    try:
+        parser.close()
+    except Exception:
+        pass
+
+
+def safe_html(html_text, sanitizer=None):
     """ Returns safe HTML from input
 
     Parameters:
         html_text:
+        sanitizer: HTMLSanitizer (or True for the default allowlist) to stream the input
+            through an allowlist instead of parsing it into a tree
 
     Returns:
     """
+    if sanitizer:
+        if not isinstance(sanitizer, HTMLSanitizer):
+            sanitizer = default_sanitizer
+        # same output as the tree serialization: ASCII, with character references
+        return sanitizer.sanitize(html_text, parent_tag='div').encode('ascii', 'xmlcharrefreplace')
     return html.tostring(html.fragment_fromstring(html_text, create_parent='div'))
 
 
@@ -77,5 +140,8 @@ def html_diff(old_html, new_html):
     """ Do a diff of the old and new document.  The documents are HTML
     *fragments* (str/UTF8 or unicode), they are not complete documents
     (i.e., no <html> tag).
+
+    Large fragments are diffed block by block, within the budgets of
+    html_diff_engine, and results are cached (see HTMLDiffEngine).
     """
-    return htmldiff(old_html, new_html)
+    return html_diff_engine.diff(old_html, new_html)
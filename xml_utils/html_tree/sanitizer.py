@@ -0,0 +1,304 @@
+""" Streaming allowlist sanitizer of HTML fragments
+"""
+import codecs
+import re
+import threading
+from html import escape
+
+from lxml import etree
+from lxml.html.defs import empty_tags
+
+from xml_utils.commons.exceptions import HTMLError
+
+# tags kept in the output
+ALLOWED_TAGS = frozenset(['a', 'abbr', 'b', 'blockquote', 'br', 'caption', 'cite', 'code', 'dd', 'del', 'div', 'dl',
+                          'dt', 'em', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'ins', 'li', 'ol', 'p',
+                          'pre', 's', 'small', 'span', 'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'tfoot', 'th',
+                          'thead', 'tr', 'u', 'ul'])
+# attributes kept on allowed tags
+ALLOWED_ATTRIBUTES = frozenset(['alt', 'class', 'colspan', 'height', 'href', 'rowspan', 'src', 'title', 'width'])
+# tags removed with their content, other tags not allowed are replaced by their content
+REMOVED_TAGS = frozenset(['embed', 'iframe', 'noscript', 'object', 'script', 'style', 'template', 'title'])
+# schemes allowed in URL attributes, relative URLs are always allowed
+ALLOWED_SCHEMES = frozenset(['ftp', 'http', 'https', 'mailto'])
+URL_ATTRIBUTES = frozenset(['href', 'src'])
+# tags added by the HTML parser around the fragment
+DOCUMENT_TAGS = frozenset(['html', 'head', 'body'])
+# the fragment is fed in a wrapper, so that the parser does not wrap its text in a paragraph
+WRAPPER_TAG = 'div'
+# depth of the wrapper, inside html and body
+WRAPPER_DEPTH = 3
+WRAPPER_NOT_STARTED, WRAPPER_OPEN, WRAPPER_CLOSED = range(3)
+
+SCHEME_REGEX = re.compile(r'([a-z][a-z0-9+.\-]*):')
+# characters ignored by browsers in URLs (e.g. "java\tscript:")
+URL_IGNORED_CHARACTERS = dict.fromkeys(range(0x21))
+
+
+class HTMLSanitizer(object):
+    """ Sanitizes HTML fragments with a tag and attribute allowlist.
+
+    Fragments are fed to an HTML parser whose target writes the sanitized
+    output as parsing events arrive, so no tree is built and large inputs can
+    be streamed. Tags outside the allowlist are replaced by their content,
+    except removed tags (scripts, styles...) which are dropped with it.
+    Comments and processing instructions are dropped.
+    """
+
+    def __init__(self, allowed_tags=ALLOWED_TAGS, allowed_attributes=ALLOWED_ATTRIBUTES,
+                 removed_tags=REMOVED_TAGS, allowed_schemes=ALLOWED_SCHEMES):
+        """ Initializes the sanitizer
+
+        Params:
+            allowed_tags:
+            allowed_attributes: attributes kept on all allowed tags
+            removed_tags: tags removed with their content
+            allowed_schemes: schemes allowed in href and src attributes
+        """
+        self.allowed_tags = frozenset(allowed_tags)
+        self.allowed_attributes = frozenset(allowed_attributes)
+        self.removed_tags = frozenset(removed_tags)
+        self.allowed_schemes = frozenset(allowed_schemes)
+        # parser and target are reused by each thread
+        self._local = threading.local()
+
+    def sanitize(self, html_text, parent_tag=''):
+        """ Returns a sanitized HTML fragment
+
+        Params:
+            html_text:
+            parent_tag: tag wrapping the sanitized fragment, none if empty
+
+        Returns:
+
+        Raises:
+        """
+        parts = []
+        self.sanitize_stream([html_text], parts.append, parent_tag)
+        return ''.join(parts)
+
+    def sanitize_stream(self, source, write, parent_tag='', chunk_size=65536):
+        """ Sanitizes an HTML fragment chunk by chunk, writing the output as it is produced
+
+        Params:
+            source: file object (text or binary, UTF-8), or iterable of str or bytes chunks
+            write: function called with each sanitized chunk (e.g. file.write)
+            parent_tag: tag wrapping the sanitized fragment, none if empty
+            chunk_size: size of the chunks read from a file object
+
+        Returns:
+
+        Raises:
+        """
+        chunks = iter(lambda: source.read(chunk_size), source.read(0)) if hasattr(source, 'read') else source
+        parser, target = self._get_pipeline()
+        decoder = codecs.getincrementaldecoder('utf-8')()
+
+        target.reset(write)
+        if parent_tag:
+            write("<%s>" % parent_tag)
+        try:
+            parser.feed("<%s>" % WRAPPER_TAG)
+            for chunk in chunks:
+                if isinstance(chunk, bytes):
+                    chunk = decoder.decode(chunk)
+                if chunk:
+                    parser.feed(chunk)
+                    target.flush()
+            parser.feed(decoder.decode(b'', final=True) + "</%s>" % WRAPPER_TAG)
+            parser.close()
+        except Exception as e:
+            # the output of the failed fragment is discarded while resetting the parser
+            target.reset(_discard)
+            try:
+                parser.close()
+            except Exception:
+                pass
+            raise HTMLError(str(e))
+        if parent_tag:
+            write("</%s>" % parent_tag)
+
+    def sanitize_many(self, html_texts, parent_tag=''):
+        """ Sanitizes several HTML fragments with the same parser
+
+        Params:
+            html_texts: list of fragments, or dict of name -> fragment
+            parent_tag: tag wrapping each sanitized fragment, none if empty
+
+        Returns:
+            list of sanitized fragments, or dict of name -> sanitized fragment
+
+        Raises:
+            HTMLError: listing all the fragments that could not be sanitized
+        """
+        items = html_texts.items() if isinstance(html_texts, dict) else enumerate(html_texts)
+        sanitized = dict()
+        errors = []
+        for key, html_text in items:
+            try:
+                sanitized[key] = self.sanitize(html_text, parent_tag)
+            except HTMLError as e:
+                errors.append("%s: %s" % (key, e.message))
+
+        if errors:
+            raise HTMLError("\n".join(errors))
+        return sanitized if isinstance(html_texts, dict) else list(sanitized.values())
+
+    def _get_pipeline(self):
+        """ Returns the parser and target of the current thread
+
+        Returns:
+        """
+        pipeline = getattr(self._local, 'pipeline', None)
+        if pipeline is None:
+            target = _SanitizerTarget(self)
+            pipeline = self._local.pipeline = (etree.HTMLParser(target=target), target)
+        return pipeline
+
+
+class _SanitizerTarget(object):
+    """ Parser target writing the sanitized fragment
+    """
+
+    def __init__(self, sanitizer):
+        """ Initializes the target
+
+        Params:
+            sanitizer:
+        """
+        self.sanitizer = sanitizer
+        # start tags without attributes and end tags of the allowed elements
+        allowed_tags = sanitizer.allowed_tags - DOCUMENT_TAGS
+        self.start_tags = {tag: "<%s>" % tag for tag in allowed_tags}
+        self.end_tags = {tag: "</%s>" % tag for tag in allowed_tags - empty_tags}
+        self.reset(None)
+
+    def reset(self, write):
+        """ Prepares the target for a new fragment
+
+        Params:
+            write:
+
+        Returns:
+        """
+        self.write = write
+        self.parts = []
+        # number of open elements, and of open removed elements
+        self.depth = 0
+        self.removed_depth = 0
+        # state of the wrapper of the fragment: not started, open, closed
+        self.wrapper_state = WRAPPER_NOT_STARTED
+
+    def flush(self):
+        """ Writes the output produced so far
+
+        Returns:
+        """
+        if self.parts:
+            self.write(''.join(self.parts))
+            self.parts = []
+
+    def start(self, tag, attrib):
+        """ Writes an allowed start tag and its allowed attributes
+
+        Params:
+            tag:
+            attrib:
+
+        Returns:
+        """
+        self.depth += 1
+        if self.removed_depth or tag in self.sanitizer.removed_tags:
+            self.removed_depth += 1
+        elif self.depth == WRAPPER_DEPTH and self.wrapper_state == WRAPPER_NOT_STARTED:
+            self.wrapper_state = WRAPPER_OPEN
+        elif tag in self.start_tags:
+            if attrib:
+                attributes = ''.join(' %s="%s"' % (name, escape(value))
+                                     for name, value in attrib.items() if self._is_allowed(name, value))
+                self.parts.append("<%s%s>" % (tag, attributes))
+            else:
+                self.parts.append(self.start_tags[tag])
+
+    def end(self, tag):
+        """ Writes an allowed end tag
+
+        Params:
+            tag:
+
+        Returns:
+        """
+        if self.removed_depth:
+            self.removed_depth -= 1
+        elif self.depth == WRAPPER_DEPTH and self.wrapper_state == WRAPPER_OPEN:
+            self.wrapper_state = WRAPPER_CLOSED
+        elif tag in self.end_tags:
+            self.parts.append(self.end_tags[tag])
+        self.depth -= 1
+
+    def data(self, data):
+        """ Writes escaped text
+
+        Params:
+            data:
+
+        Returns:
+        """
+        if not self.removed_depth:
+            # most text has no character to escape
+            if '&' in data or '<' in data or '>' in data:
+                data = escape(data, quote=False)
+            self.parts.append(data)
+
+    def comment(self, text):
+        """ Drops comments
+
+        Params:
+            text:
+
+        Returns:
+        """
+
+    def pi(self, target, data=None):
+        """ Drops processing instructions
+
+        Params:
+            target:
+            data:
+
+        Returns:
+        """
+
+    def close(self):
+        """ Writes the end of the output
+
+        Returns:
+        """
+        self.flush()
+        self.write = None
+
+    def _is_allowed(self, name, value):
+        """ Returns True if the attribute is kept
+
+        Params:
+            name:
+            value:
+
+        Returns:
+        """
+        if name not in self.sanitizer.allowed_attributes:
+            return False
+        if name not in URL_ATTRIBUTES:
+            return True
+        match = SCHEME_REGEX.match(value.translate(URL_IGNORED_CHARACTERS).lower())
+        return match is None or match.group(1) in self.sanitizer.allowed_schemes
+
+
+def _discard(text):
+    """ Discards output
+
+    Params:
+        text:
+
+    Returns:
+    """
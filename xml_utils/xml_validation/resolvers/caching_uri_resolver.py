@@ -0,0 +1,99 @@
+""" Caching URI Resolver
+"""
+import threading
+from collections import OrderedDict
+
+import xml_utils.commons.exceptions as exceptions
+from xml_utils.xml_validation.resolvers.content_uri_resolver import ContentURIResolver
+
+
+class CachingURIResolver(ContentURIResolver):
+    """ Caching URI Resolver: keeps the documents resolved by another resolver.
+
+    Contents are kept in an LRU bounded by their total size, shared by all the
+    schema compilations using the resolver. Documents are fetched with the
+    get_content method of the wrapped resolver (e.g. DictURIResolver,
+    DirectoryURIResolver): resolvers only implementing resolve (e.g.
+    DefaultURIResolver) do not give access to the content of the documents, and
+    are not supported. Documents are never fetched from their URL by the cache itself.
+    """
+    def __init__(self, resolver, max_size=16 * 1024 * 1024):
+        """ Initializes the resolver
+
+        Args:
+            resolver: resolver of the documents, with a get_content method (e.g. ContentURIResolver)
+            max_size: maximum total size (bytes) of the cached documents
+
+        Raises:
+            XMLError: the resolver has no get_content method
+        """
+        if not callable(getattr(resolver, 'get_content', None)):
+            raise exceptions.XMLError('The resolver must return the content of the documents (get_content).')
+        self.resolver = resolver
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # URL -> content
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_content(self, url):
+        """ Returns the content of a document, fetching it only if not cached
+
+        Args:
+            url:
+
+        Returns:
+
+        """
+        with self._lock:
+            content = self._documents.get(url)
+            if content is not None:
+                self._documents.move_to_end(url)
+                self.hits += 1
+                return content
+            self.misses += 1
+
+        content = self.resolver.get_content(url)
+        if content is None:
+            return None
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+
+        with self._lock:
+            if len(content) <= self.max_size and url not in self._documents:
+                self._documents[url] = content
+                self.size += len(content)
+                while self.size > self.max_size:
+                    _, evicted = self._documents.popitem(last=False)
+                    self.size -= len(evicted)
+                    self.evictions += 1
+        return content
+
+    def clear(self):
+        """ Removes all documents from the cache
+
+        Returns:
+
+        """
+        with self._lock:
+            self._documents.clear()
+            self.size = 0
+
+    def get_statistics(self):
+        """ Returns the statistics of the cache
+
+        Returns:
+
+        """
+        with self._lock:
+            return {
+                'documents': len(self._documents),
+                'size': self.size,
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,57 @@
+""" Base URI Resolver returning the content of the resolved documents
+"""
+import posixpath
+from abc import ABCMeta, abstractmethod
+from urllib.parse import urlsplit
+
+from lxml import etree
+
+
+class ContentURIResolver(etree.Resolver, metaclass=ABCMeta):
+    """ Base URI Resolver: subclasses return the content of a document from its URL
+    """
+    def resolve(self, url, id, context):
+        """ Resolve URL: returns the content of the document, or to the next resolver if not found.
+
+        Args:
+            url:
+            id:
+            context:
+
+        Returns:
+
+        """
+        content = self.get_content(url)
+        if content is None:
+            # return None to use the next registered resolver (or lxml default resolver)
+            return None
+        # the URL is kept as base of the relative imports and includes of the document
+        return self.resolve_string(content, context, base_url=url)
+
+    @abstractmethod
+    def get_content(self, url):
+        """ Returns the content of a document, None if not found
+
+        Args:
+            url:
+
+        Returns:
+            bytes or string
+
+        """
+        pass
+
+
+def get_path_suffixes(url):
+    """ Returns the paths of an URL, from the full path to the file name (http://host/a/b.xsd -> a/b.xsd, b.xsd)
+
+    Args:
+        url:
+
+    Returns:
+
+    """
+    path = posixpath.normpath(urlsplit(url).path).lstrip('/')
+    segments = path.split('/')
+    return ['/'.join(segments[index:]) for index in range(len(segments))
+            if segments[index] not in ('', '.', '..')]
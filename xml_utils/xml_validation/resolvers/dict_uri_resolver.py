@@ -0,0 +1,36 @@
+""" Dict URI Resolver
+"""
+from xml_utils.xml_validation.resolvers.content_uri_resolver import ContentURIResolver, get_path_suffixes
+
+
+class DictURIResolver(ContentURIResolver):
+    """ Dict URI Resolver: resolves documents from a bundle in memory.
+
+    Documents are found by URL, then by path (http://host/a/b.xsd is found as
+    a/b.xsd, then b.xsd).
+    """
+    def __init__(self, documents):
+        """ Initializes the resolver
+
+        Args:
+            documents: dict of URL or path -> content (string or bytes)
+        """
+        self.documents = documents
+
+    def get_content(self, url):
+        """ Returns the content of a document from the bundle, None if not found
+
+        Args:
+            url:
+
+        Returns:
+
+        """
+        content = self.documents.get(url)
+        if content is not None:
+            return content
+        for path in get_path_suffixes(url):
+            content = self.documents.get(path)
+            if content is not None:
+                return content
+        return None
@@ -0,0 +1,36 @@
+""" Directory URI Resolver
+"""
+import os
+
+from xml_utils.xml_validation.resolvers.content_uri_resolver import ContentURIResolver, get_path_suffixes
+
+
+class DirectoryURIResolver(ContentURIResolver):
+    """ Directory URI Resolver: resolves documents from the files of a directory.
+
+    Documents are found by path in the directory (http://host/a/b.xsd is found
+    as a/b.xsd, then b.xsd). Files outside the directory are never read.
+    """
+    def __init__(self, directory):
+        """ Initializes the resolver
+
+        Args:
+            directory:
+        """
+        self.directory = os.path.realpath(directory)
+
+    def get_content(self, url):
+        """ Returns the content of a file of the directory, None if not found
+
+        Args:
+            url:
+
+        Returns:
+
+        """
+        for path in get_path_suffixes(url):
+            file_path = os.path.realpath(os.path.join(self.directory, path))
+            if os.path.commonpath([self.directory, file_path]) == self.directory and os.path.isfile(file_path):
+                with open(file_path, 'rb') as document_file:
+                    return document_file.read()
+        return None
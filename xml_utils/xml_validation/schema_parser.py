@@ -0,0 +1,73 @@
+""" Parsers compiling XML schemas with their own URI resolver chain
+"""
+import threading
+
+from lxml import etree
+
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+
+class SchemaParser(object):
+    """ Compiles XML schemas with a dedicated parser, owning exactly one resolver chain.
+
+    Imports and includes of a schema are resolved by the parser of its tree,
+    so a tree built with another parser is parsed again with the dedicated
+    parser before compilation. Resolvers are registered once, when the parser
+    of a thread is instantiated, and are never added to other parsers.
+    """
+
+    def __init__(self, uri_resolvers=(), profile=None):
+        """ Initializes the schema parser
+
+        Args:
+            uri_resolvers: resolvers of the chain, in order
+            profile: name of the parser profile (see XSDTree.get_parser), default options if None
+        """
+        self.uri_resolvers = tuple(uri_resolvers)
+        self.profile = profile
+        # parser instantiated by each thread
+        self._local = threading.local()
+
+    @property
+    def parser(self):
+        """ Returns the parser of the current thread
+
+        Returns:
+
+        """
+        parser = getattr(self._local, 'parser', None)
+        if parser is None:
+            options = XSDTree.get_parser_profile(self.profile) if self.profile is not None else dict()
+            parser = etree.XMLParser(**options)
+            for uri_resolver in self.uri_resolvers:
+                parser.resolvers.add(uri_resolver)
+            self._local.parser = parser
+        return parser
+
+    def build_tree(self, xsd_string, base_url=None):
+        """ Returns the tree of a schema, parsed with the dedicated parser
+
+        Args:
+            xsd_string: XML string or bytes
+            base_url: URL of the schema, base of its relative imports and includes
+
+        Returns:
+
+        """
+        xsd_bytes = xsd_string.encode('utf-8') if isinstance(xsd_string, str) else xsd_string
+        return etree.ElementTree(etree.fromstring(xsd_bytes, self.parser, base_url=base_url))
+
+    def compile(self, xsd_tree):
+        """ Returns the XMLSchema of a schema tree
+
+        Args:
+            xsd_tree: element or tree of the schema
+
+        Returns:
+
+        """
+        if isinstance(xsd_tree, etree._Element):
+            xsd_tree = xsd_tree.getroottree()
+        if xsd_tree.parser is not self.parser:
+            xsd_tree = self.build_tree(etree.tostring(xsd_tree), base_url=xsd_tree.docinfo.URL)
+        return etree.XMLSchema(xsd_tree)
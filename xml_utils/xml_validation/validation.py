@@ -6,6 +6,7 @@ import json
 
 from lxml import etree
 
+from xml_utils.xml_validation.schema_parser import SchemaParser
 from xml_utils.xsd_tree.xsd_tree import XSDTree
 from .xerces.client import send_message
 
@@ -49,7 +50,7 @@ def lxml_validate_xsd(xsd_tree, uri_resolver=None):
 
     Args:
         xsd_tree:
-        uri_resolver:
+        uri_resolver: resolver, or SchemaParser to reuse
 
     Returns:
         errors
@@ -69,7 +70,7 @@ def lxml_validate_xml(xsd_tree, xml_tree, uri_resolver=None):
     Args:
         xsd_tree:
         xml_tree:
-        uri_resolver:
+        uri_resolver: resolver, or SchemaParser to reuse
 
     Returns:
         errors
@@ -124,12 +125,13 @@ def _build_etree_schema(xsd_tree, uri_resolver=None):
 
     Args:
         xsd_tree:
-        uri_resolver:
+        uri_resolver: resolver, or SchemaParser to reuse
 
     Returns:
 
     """
-    if uri_resolver:
-        xsd_tree.parser.resolvers.add(uri_resolver)
-    xml_schema = etree.XMLSchema(xsd_tree)
-    return xml_schema
+    if not uri_resolver:
+        return etree.XMLSchema(xsd_tree)
+    # the resolver is registered on a dedicated parser, never on the parser of the tree
+    schema_parser = uri_resolver if isinstance(uri_resolver, SchemaParser) else SchemaParser([uri_resolver])
+    return schema_parser.compile(xsd_tree)
@@ -0,0 +1,331 @@
+""" Validation of documents with lxml in a pool of worker processes
+"""
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from lxml import etree
+
+import xml_utils.commons.exceptions as exceptions
+from xml_utils.xml_validation.schema_parser import SchemaParser
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+
+class ValidationService(object):
+    """ Validates documents against schemas in a pool of worker processes.
+
+    lxml validation holds the GIL, so documents are validated by worker
+    processes. Each worker keeps its compiled schemas in an LRU cache, warmed
+    at start with the registered schemas. Documents are sent as bytes or file
+    paths, never as trees, and schemas are sent by name once registered.
+    The number of pending tasks is bounded: submissions wait for a free slot.
+    Results have the shape of lxml_validate_xml: None if valid, errors otherwise.
+    """
+
+    def __init__(self, schemas=None, processes=None, max_pending=None, schema_cache_size=32,
+                 uri_resolver_factory=None):
+        """ Initializes the service and starts the worker processes
+
+        Args:
+            schemas: dict of name -> schema (string, bytes or path), compiled by each worker at start
+            processes: number of worker processes, number of CPUs if None
+            max_pending: maximum number of pending tasks, 4 per process if None
+            schema_cache_size: number of compiled schemas kept by each worker
+            uri_resolver_factory: function returning the resolver of the imports and includes,
+                called by each worker (must be picklable, e.g. a module-level function)
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self.max_pending = max_pending or 4 * self.processes
+        self.schemas = {name: _get_schema_bytes(schema) for name, schema in (schemas or dict()).items()}
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                             initargs=(self.schemas, schema_cache_size, uri_resolver_factory))
+
+    def submit(self, schema, xml_document, timeout=None):
+        """ Submits the validation of a document, waiting for a free slot if too many tasks are pending
+
+        Args:
+            schema: name of a registered schema, or schema as bytes or string (sent with the task)
+            xml_document: document as bytes or string, or path (os.PathLike) of the document
+            timeout: maximum time (seconds) to wait for a free slot, no limit if None
+
+        Returns:
+            concurrent.futures.Future of the validation errors (None if valid)
+
+        Raises:
+            XMLError: no free slot before the timeout
+        """
+        return self._submit(_validate_in_worker, schema, _get_document_source(xml_document), timeout)
+
+    def validate(self, schema, xml_document):
+        """ Validates a document
+
+        Args:
+            schema: name of a registered schema, or schema as bytes or string
+            xml_document: document as bytes or string, or path (os.PathLike) of the document
+
+        Returns:
+            errors, None if valid
+
+        """
+        return self.submit(schema, xml_document).result()
+
+    def validate_many(self, schema, xml_documents, chunk_size=16):
+        """ Validates several documents against the same schema, sent by chunks to the workers
+
+        Args:
+            schema: name of a registered schema, or schema as bytes or string
+            xml_documents: documents as bytes or strings, or paths (os.PathLike) of the documents
+            chunk_size: number of documents sent at once to a worker process
+
+        Returns:
+            list of errors of each document, None if valid
+
+        """
+        futures = []
+        chunk = []
+        for xml_document in xml_documents:
+            chunk.append(_get_document_source(xml_document))
+            if len(chunk) == chunk_size:
+                futures.append(self._submit(_validate_chunk_in_worker, schema, chunk))
+                chunk = []
+        if chunk:
+            futures.append(self._submit(_validate_chunk_in_worker, schema, chunk))
+
+        return [error for future in futures for error in future.result()]
+
+    async def validate_async(self, schema, xml_document):
+        """ Validates a document without blocking the event loop
+
+        Args:
+            schema: name of a registered schema, or schema as bytes or string
+            xml_document: document as bytes or string, or path (os.PathLike) of the document
+
+        Returns:
+            errors, None if valid
+
+        """
+        source = _get_document_source(xml_document)
+        if not self._slots.acquire(blocking=False):
+            # the slot is awaited in a thread, so that the event loop keeps running
+            acquisition = asyncio.get_running_loop().run_in_executor(None, self._slots.acquire)
+            try:
+                # shielded: a cancellation does not stop the thread, which still acquires the slot
+                await asyncio.shield(acquisition)
+            except asyncio.CancelledError:
+                acquisition.add_done_callback(lambda _: self._slots.release())
+                raise
+        return await asyncio.wrap_future(self._submit_with_slot(_validate_in_worker, schema, source))
+
+    def close(self, wait=True):
+        """ Stops the worker processes
+
+        Args:
+            wait: waits for the pending tasks
+
+        Returns:
+
+        """
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _submit(self, function, schema, source, timeout=None):
+        """ Submits a task once a slot is free
+
+        Args:
+            function:
+            schema:
+            source:
+            timeout:
+
+        Returns:
+
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise exceptions.XMLError('Too many pending validations.')
+        return self._submit_with_slot(function, schema, source)
+
+    def _submit_with_slot(self, function, schema, source):
+        """ Submits a task, the slot being released when it is done
+
+        Args:
+            function:
+            schema:
+            source:
+
+        Returns:
+
+        """
+        try:
+            future = self._executor.submit(function, *self._get_schema_reference(schema), source)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _get_schema_reference(self, schema):
+        """ Returns the key of a schema, and its content if it has to be sent to the worker
+
+        Args:
+            schema:
+
+        Returns:
+
+        """
+        if isinstance(schema, str) and schema in self.schemas:
+            return schema, None
+        if not isinstance(schema, (str, bytes)):
+            raise exceptions.XMLError('Schema must be a registered name, a string or bytes.')
+        schema_bytes = _get_schema_bytes(schema)
+        return hashlib.sha1(schema_bytes).hexdigest(), schema_bytes
+
+
+def _get_schema_bytes(schema):
+    """ Returns the content of a schema as bytes
+
+    Args:
+        schema: string, bytes or path (os.PathLike)
+
+    Returns:
+
+    """
+    if isinstance(schema, os.PathLike):
+        with open(schema, 'rb') as schema_file:
+            return schema_file.read()
+    return schema.encode('utf-8') if isinstance(schema, str) else schema
+
+
+def _get_document_source(xml_document):
+    """ Returns a document as sent to the workers: bytes, or path as a string
+
+    Args:
+        xml_document:
+
+    Returns:
+
+    """
+    if isinstance(xml_document, os.PathLike):
+        return os.fspath(xml_document)
+    if isinstance(xml_document, str):
+        return xml_document.encode('utf-8')
+    if isinstance(xml_document, bytes):
+        return xml_document
+    raise exceptions.XMLError('Document must be bytes, a string or a path.')
+
+
+# state of the current worker process
+_worker_schemas = dict()
+_worker_compiled_schemas = OrderedDict()
+_worker_state = dict(cache_size=32, schema_parser=None)
+
+
+def _init_worker(schemas, cache_size, uri_resolver_factory):
+    """ Compiles the registered schemas once per worker process
+
+    Args:
+        schemas:
+        cache_size:
+        uri_resolver_factory:
+
+    Returns:
+
+    """
+    _worker_schemas.update(schemas)
+    _worker_state['cache_size'] = cache_size
+    if uri_resolver_factory is not None:
+        _worker_state['schema_parser'] = SchemaParser([uri_resolver_factory()])
+    for name in list(schemas)[:cache_size]:
+        _get_compiled_schema(name, None)
+
+
+def _get_compiled_schema(key, schema_bytes):
+    """ Returns a compiled schema from the cache of the worker, compiling it if needed
+
+    Args:
+        key: name or digest of the schema
+        schema_bytes: content of the schema, None for registered schemas
+
+    Returns:
+
+    """
+    xml_schema = _worker_compiled_schemas.get(key)
+    if xml_schema is not None:
+        _worker_compiled_schemas.move_to_end(key)
+        return xml_schema
+
+    if schema_bytes is None:
+        schema_bytes = _worker_schemas[key]
+    schema_parser = _worker_state['schema_parser']
+    if schema_parser is None:
+        xml_schema = etree.XMLSchema(etree.fromstring(schema_bytes))
+    else:
+        xml_schema = schema_parser.compile(schema_parser.build_tree(schema_bytes))
+
+    _worker_compiled_schemas[key] = xml_schema
+    if len(_worker_compiled_schemas) > _worker_state['cache_size']:
+        _worker_compiled_schemas.popitem(last=False)
+    return xml_schema
+
+
+def _validate_in_worker(key, schema_bytes, source):
+    """ Validates a document in a worker process
+
+    Args:
+        key:
+        schema_bytes:
+        source: bytes or path of the document
+
+    Returns:
+
+    """
+    try:
+        xml_schema = _get_compiled_schema(key, schema_bytes)
+    except Exception as e:
+        return str(e)
+    return _validate(xml_schema, source)
+
+
+def _validate_chunk_in_worker(key, schema_bytes, sources):
+    """ Validates several documents in a worker process
+
+    Args:
+        key:
+        schema_bytes:
+        sources:
+
+    Returns:
+
+    """
+    try:
+        xml_schema = _get_compiled_schema(key, schema_bytes)
+    except Exception as e:
+        return [str(e)] * len(sources)
+    return [_validate(xml_schema, source) for source in sources]
+
+
+def _validate(xml_schema, source):
+    """ Validates a document, returns the errors as lxml_validate_xml does
+
+    Args:
+        xml_schema:
+        source:
+
+    Returns:
+
+    """
+    try:
+        # paths are read by libxml2
+        xml_tree = XSDTree.build_tree(source) if isinstance(source, bytes) else etree.parse(source)
+        xml_schema.assertValid(xml_tree)
+    except Exception as e:
+        return str(e)
+    return None
@@ -0,0 +1,477 @@
+""" Validation of schemas and documents through pluggable backends (lxml, Xerces)
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from lxml import etree
+
+import xml_utils.commons.exceptions as exceptions
+from xml_utils.xml_validation.schema_parser import SchemaParser
+from xml_utils.xml_validation.xerces.client import send_message, SERVER_OFFLINE_ERROR
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+# names of the backends
+LXML = 'lxml'
+XERCES = 'xerces'
+
+# XSD 1.1 constructs, not supported by lxml (assertions, type alternatives, open contents, overrides, versioning)
+XSD_11_REGEX = re.compile(r'<(?:[\w.\-]+:)?(?:assert|assertion|alternative|openContent|defaultOpenContent|override)'
+                          r'[\s/>]|minVersion\s*=\s*["\']1\.1')
+
+
+class ValidationResult(object):
+    """ Result of a validation: errors (None if valid), backend used and duration (seconds)
+    """
+    __slots__ = ('errors', 'backend', 'duration')
+
+    def __init__(self, errors, backend, duration):
+        """ Initializes the result
+
+        Args:
+            errors:
+            backend:
+            duration:
+        """
+        self.errors = errors
+        self.backend = backend
+        self.duration = duration
+
+    @property
+    def is_valid(self):
+        """ Returns True if there is no error
+
+        Returns:
+
+        """
+        return self.errors is None
+
+
+class LxmlBackend(object):
+    """ In-process validation with lxml.
+
+    Compiled schemas are kept in an LRU by digest of the schema, per thread
+    since compiled schemas must not be shared between threads.
+    """
+    name = LXML
+
+    def __init__(self, uri_resolver=None, cache_size=32):
+        """ Initializes the backend
+
+        Args:
+            uri_resolver: resolver of the imports and includes, or SchemaParser
+            cache_size: number of compiled schemas kept by each thread
+        """
+        if uri_resolver is None or isinstance(uri_resolver, SchemaParser):
+            self.schema_parser = uri_resolver
+        else:
+            self.schema_parser = SchemaParser([uri_resolver])
+        self.cache_size = cache_size
+        self._local = threading.local()
+
+    def validate_xsd(self, xsd_string):
+        """ Validates a schema
+
+        Args:
+            xsd_string:
+
+        Returns:
+            errors, None if valid
+
+        """
+        try:
+            self._get_schema(xsd_string)
+        except Exception as e:
+            return str(e)
+        return None
+
+    def validate_xml(self, xsd_string, xml_string):
+        """ Validates a document against a schema
+
+        Args:
+            xsd_string:
+            xml_string:
+
+        Returns:
+            errors, None if valid
+
+        """
+        try:
+            self._get_schema(xsd_string).assertValid(XSDTree.build_tree(xml_string))
+        except Exception as e:
+            return str(e)
+        return None
+
+    def _get_schema(self, xsd_string):
+        """ Returns the compiled schema, compiling it if not cached
+
+        Args:
+            xsd_string:
+
+        Returns:
+
+        """
+        schemas = getattr(self._local, 'schemas', None)
+        if schemas is None:
+            schemas = self._local.schemas = OrderedDict()
+
+        xsd_bytes = xsd_string.encode('utf-8') if isinstance(xsd_string, str) else xsd_string
+        key = hashlib.sha1(xsd_bytes).digest()
+        xml_schema = schemas.get(key)
+        if xml_schema is not None:
+            schemas.move_to_end(key)
+            return xml_schema
+
+        if self.schema_parser is None:
+            xml_schema = etree.XMLSchema(XSDTree.build_tree(xsd_bytes))
+        else:
+            xml_schema = self.schema_parser.compile(self.schema_parser.build_tree(xsd_bytes))
+        schemas[key] = xml_schema
+        if len(schemas) > self.cache_size:
+            schemas.popitem(last=False)
+        return xml_schema
+
+
+class XercesBackend(object):
+    """ Validation by the Xerces server (see xerces.server), or its stub (see xerces.stub_server)
+    """
+    name = XERCES
+
+    def __init__(self, endpoint="tcp://127.0.0.1:5555", timeout=3000, retries=1):
+        """ Initializes the backend
+
+        Args:
+            endpoint: endpoint of the server
+            timeout: time (milliseconds) waited for each reply
+            retries: number of attempts before the server is considered offline
+        """
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.retries = retries
+
+    def validate_xsd(self, xsd_string):
+        """ Validates a schema
+
+        Args:
+            xsd_string:
+
+        Returns:
+            errors, None if valid
+
+        Raises:
+            ValidationBackendError: the server did not answer
+        """
+        return self._send({'xsd_string': _to_text(xsd_string)})
+
+    def validate_xml(self, xsd_string, xml_string):
+        """ Validates a document against a schema
+
+        Args:
+            xsd_string:
+            xml_string:
+
+        Returns:
+            errors, None if valid
+
+        Raises:
+            ValidationBackendError: the server did not answer
+        """
+        return self._send({'xsd_string': _to_text(xsd_string), 'xml_string': _to_text(xml_string)})
+
+    def _send(self, message):
+        """ Sends a request to the server, returns the errors
+
+        Args:
+            message:
+
+        Returns:
+
+        """
+        reply = send_message(json.dumps(message), endpoint=self.endpoint, timeout=self.timeout,
+                             retries=self.retries)
+        if reply == SERVER_OFFLINE_ERROR:
+            raise exceptions.ValidationBackendError(reply)
+        return None if reply in (None, 'ok') else reply
+
+
+class LatencyTracker(object):
+    """ Latencies observed by backend and size of document.
+
+    Sizes are grouped by power of 4 bytes, each group keeping an exponentially
+    weighted moving average of the latencies. Failures count as a latency of
+    the time spent before the failure, at least failure_penalty. Averages not
+    updated for max_age seconds are discarded, so that a backend no longer
+    chosen because of its failures is estimated, and tried, again.
+    """
+
+    def __init__(self, weight=0.2, failure_penalty=10.0, max_age=60.0, clock=time.monotonic):
+        """ Initializes the tracker
+
+        Args:
+            weight: weight of the last latency in the moving averages
+            failure_penalty: minimum latency (seconds) recorded for a failure
+            max_age: time (seconds) after which an average that was not updated is discarded
+            clock: function returning the current time (seconds)
+        """
+        self.weight = weight
+        self.failure_penalty = failure_penalty
+        self.max_age = max_age
+        self.clock = clock
+        # backend -> size group -> (average latency, time of the last update)
+        self._latencies = dict()
+        # backend -> [calls, failures]
+        self._counts = dict()
+        self._lock = threading.Lock()
+
+    def record(self, backend, size, duration, failed=False):
+        """ Records the latency of a validation
+
+        Args:
+            backend: name of the backend
+            size: size of the document (schema for schema validations)
+            duration: seconds
+            failed: the backend was unavailable
+
+        Returns:
+
+        """
+        if failed:
+            duration = max(duration, self.failure_penalty)
+        group = _get_size_group(size)
+        now = self.clock()
+        with self._lock:
+            latencies = self._latencies.setdefault(backend, dict())
+            average = self._get_average(latencies.get(group), now)
+            latencies[group] = (duration if average is None else average + self.weight * (duration - average), now)
+            counts = self._counts.setdefault(backend, [0, 0])
+            counts[0] += 1
+            counts[1] += failed
+
+    def estimate(self, backend, size):
+        """ Returns the average latency of a backend for documents of this size, None if unknown
+
+        Args:
+            backend:
+            size:
+
+        Returns:
+
+        """
+        with self._lock:
+            return self._get_average(self._latencies.get(backend, dict()).get(_get_size_group(size)),
+                                     self.clock())
+
+    def get_statistics(self):
+        """ Returns the calls, failures and average latencies (by maximum size of document) of each backend
+
+        Returns:
+
+        """
+        now = self.clock()
+        statistics = dict()
+        with self._lock:
+            for backend, counts in self._counts.items():
+                averages = ((group, self._get_average(entry, now))
+                            for group, entry in sorted(self._latencies[backend].items()))
+                statistics[backend] = {'calls': counts[0],
+                                       'failures': counts[1],
+                                       'latencies': {4 ** group: average
+                                                     for group, average in averages if average is not None}}
+        return statistics
+
+    def _get_average(self, entry, now):
+        """ Returns the average latency of an entry, None if missing or too old
+
+        Args:
+            entry: (average latency, time of the last update)
+            now:
+
+        Returns:
+
+        """
+        if entry is None or now - entry[1] > self.max_age:
+            return None
+        return entry[0]
+
+
+class RoutingPolicy(object):
+    """ Default routing policy.
+
+    Schemas using XSD 1.1 constructs go to Xerces only. Other documents go
+    in-process up to max_inline_size, to Xerces above, each falling back on
+    the other. Once both backends have latencies for documents of a given
+    size, the fastest observed is tried first (if adaptive).
+    """
+
+    def __init__(self, max_inline_size=256 * 1024, adaptive=True):
+        """ Initializes the policy
+
+        Args:
+            max_inline_size: maximum size (characters or bytes) of documents validated in-process first
+            adaptive: orders the backends by observed latency
+        """
+        self.max_inline_size = max_inline_size
+        self.adaptive = adaptive
+
+    def route(self, xsd_string, xml_string, latency_tracker):
+        """ Returns the names of the backends to try, in order
+
+        Args:
+            xsd_string:
+            xml_string: None for schema validations
+            latency_tracker:
+
+        Returns:
+
+        """
+        if requires_xsd_11(xsd_string):
+            return [XERCES]
+
+        size = len(xsd_string if xml_string is None else xml_string)
+        backends = [LXML, XERCES] if size <= self.max_inline_size else [XERCES, LXML]
+        if self.adaptive:
+            estimates = [latency_tracker.estimate(backend, size) for backend in backends]
+            if None not in estimates:
+                # sort is stable: equal latencies keep the order of the policy
+                backends = [backend for _, backend in sorted(zip(estimates, backends), key=lambda item: item[0])]
+        return backends
+
+
+class Validator(object):
+    """ Validates schemas and documents with the backend chosen by a routing policy.
+
+    Backends are tried in the order of the policy, the next one being used
+    when a backend is unavailable (timeout, server offline). The latency of
+    each call is recorded, so adaptive policies follow observed performance.
+    """
+
+    def __init__(self, backends=None, policy=None, latency_tracker=None):
+        """ Initializes the validator
+
+        Args:
+            backends: list of backends (objects with name, validate_xsd and validate_xml), lxml only if None
+            policy: object with a route method (see RoutingPolicy), default policy if None
+            latency_tracker: default tracker if None
+        """
+        backends = [LxmlBackend()] if backends is None else backends
+        self.backends = OrderedDict((backend.name, backend) for backend in backends)
+        self.policy = RoutingPolicy() if policy is None else policy
+        self.latency_tracker = LatencyTracker() if latency_tracker is None else latency_tracker
+
+    def validate_xsd(self, xsd_string):
+        """ Validates a schema
+
+        Args:
+            xsd_string: schema as string, bytes or tree
+
+        Returns:
+            ValidationResult
+
+        Raises:
+            ValidationBackendError: no backend available
+        """
+        xsd_string = _to_string(xsd_string)
+        return self._validate(xsd_string, None, lambda backend: backend.validate_xsd(xsd_string))
+
+    def validate_xml(self, xsd_string, xml_string):
+        """ Validates a document against a schema
+
+        Args:
+            xsd_string: schema as string, bytes or tree
+            xml_string: document as string, bytes or tree
+
+        Returns:
+            ValidationResult
+
+        Raises:
+            ValidationBackendError: no backend available
+        """
+        xsd_string = _to_string(xsd_string)
+        xml_string = _to_string(xml_string)
+        return self._validate(xsd_string, xml_string, lambda backend: backend.validate_xml(xsd_string, xml_string))
+
+    def _validate(self, xsd_string, xml_string, validate):
+        """ Validates with the backends of the policy, until one is available
+
+        Args:
+            xsd_string:
+            xml_string:
+            validate: function(backend) returning the errors
+
+        Returns:
+
+        """
+        size = len(xsd_string if xml_string is None else xml_string)
+        errors = []
+        for name in self.policy.route(xsd_string, xml_string, self.latency_tracker):
+            backend = self.backends.get(name)
+            if backend is None:
+                continue
+            start = time.perf_counter()
+            try:
+                result_errors = validate(backend)
+            except exceptions.ValidationBackendError as e:
+                self.latency_tracker.record(name, size, time.perf_counter() - start, failed=True)
+                errors.append('{}: {}'.format(name, e.message))
+                continue
+            duration = time.perf_counter() - start
+            self.latency_tracker.record(name, size, duration)
+            return ValidationResult(result_errors, name, duration)
+
+        raise exceptions.ValidationBackendError('No validation backend available.' +
+                                                ''.join('\n' + error for error in errors))
+
+
+def requires_xsd_11(xsd_string):
+    """ Returns True if a schema uses XSD 1.1 constructs (detected from its text)
+
+    Args:
+        xsd_string:
+
+    Returns:
+
+    """
+    if isinstance(xsd_string, bytes):
+        xsd_string = xsd_string.decode('utf-8', 'replace')
+    return XSD_11_REGEX.search(xsd_string) is not None
+
+
+def _get_size_group(size):
+    """ Returns the group of a size: 0 up to 1 byte, 1 up to 4 bytes, 2 up to 16 bytes...
+
+    Args:
+        size:
+
+    Returns:
+
+    """
+    return (max(size - 1, 0).bit_length() + 1) // 2
+
+
+def _to_string(xml_input):
+    """ Returns a string or bytes from a string, bytes or tree
+
+    Args:
+        xml_input:
+
+    Returns:
+
+    """
+    if isinstance(xml_input, (str, bytes)):
+        return xml_input
+    return XSDTree.tostring(xml_input)
+
+
+def _to_text(xml_string):
+    """ Returns a string, decoding bytes
+
+    Args:
+        xml_string:
+
+    Returns:
+
+    """
+    return xml_string.decode('utf-8') if isinstance(xml_string, bytes) else xml_string
@@ -8,12 +8,15 @@ import zmq
 
 logger = logging.getLogger(__name__)
 
+# error returned when the server does not answer
+SERVER_OFFLINE_ERROR = "Error: XML Validation server seems to be offline, please contact the administrator."
+
 
 def send_message(message, endpoint="tcp://127.0.0.1:5555", timeout=3000, retries=3, context_zmq=7):
     """     Send a message to the Schema validation server
 
     Args:
-        message: JSON structure containing parameters
+        message: JSON structure containing parameters (string or bytes)
         endpoint:
         timeout:
         retries:
@@ -22,6 +25,8 @@ def send_message(message, endpoint="tcp://127.0.0.1:5555", timeout=3000, retries
     Returns:
 
     """
+    if isinstance(message, str):
+        message = message.encode('utf-8')
     context = zmq.Context(context_zmq)
 
     logger.debug("Connecting to server...")
@@ -45,7 +50,7 @@ def send_message(message, endpoint="tcp://127.0.0.1:5555", timeout=3000, retries
         while expect_reply:
             socks = dict(poll.poll(timeout))
             if socks.get(socket) == zmq.POLLIN:
-                reply = socket.recv()
+                reply = socket.recv().decode('utf-8')
                 if not reply:
                     break
                 else:
@@ -62,8 +67,7 @@ def send_message(message, endpoint="tcp://127.0.0.1:5555", timeout=3000, retries
                 poll.unregister(socket)
                 retries_left -= 1
                 if retries_left == 0:
-                    reply = "Error: XML Validation server seems to be offline, please contact " \
-                            "the administrator."
+                    reply = SERVER_OFFLINE_ERROR
                     break
 
                 logger.info("Reconnecting and resending...")
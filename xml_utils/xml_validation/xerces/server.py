@@ -160,7 +160,7 @@ def main(argv):
 
                 logger.debug(response)
 
-                socket.send(str(response))
+                socket.send(str(response).encode('utf-8'))
                 mutex = True
                 logger.debug("Sent response")
             except Exception as e:
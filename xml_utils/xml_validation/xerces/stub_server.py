@@ -0,0 +1,130 @@
+""" Local stub of the Xerces validation server, for tests.
+"""
+import json
+import threading
+import time
+
+import zmq
+
+from xml_utils.xml_validation.validation import lxml_validate_xml, lxml_validate_xsd
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+
+class StubValidationServer(object):
+    """ Stub of the Xerces validation server, answering in a thread of the current process.
+
+    The server speaks the protocol of xerces.server (JSON requests, "ok" or
+    errors as replies) and validates with lxml by default, so the Xerces
+    backend can be tested without Xerces.
+    """
+
+    def __init__(self, endpoint="tcp://127.0.0.1:*", delay=0, validate_xsd=None, validate_xml=None):
+        """ Initializes the server
+
+        Args:
+            endpoint: listening endpoint, on a random port by default
+            delay: time (seconds) waited before each reply, to simulate a slow server
+            validate_xsd: function(xsd_string) returning errors, lxml validation if None
+            validate_xml: function(xsd_string, xml_string) returning errors, lxml validation if None
+        """
+        self.endpoint = endpoint
+        self.delay = delay
+        self.validate_xsd = validate_xsd or _lxml_validate_xsd
+        self.validate_xml = validate_xml or _lxml_validate_xml
+        self.requests = 0
+        self._context = None
+        self._thread = None
+        self._running = threading.Event()
+
+    def start(self):
+        """ Starts the server, returns the endpoint it listens to
+
+        Returns:
+
+        """
+        self._context = zmq.Context()
+        socket = self._context.socket(zmq.REP)
+        socket.setsockopt(zmq.LINGER, 0)
+        socket.bind(self.endpoint)
+        self.endpoint = socket.getsockopt_string(zmq.LAST_ENDPOINT)
+        self._running.set()
+        self._thread = threading.Thread(target=self._serve, args=(socket,), daemon=True)
+        self._thread.start()
+        return self.endpoint
+
+    def stop(self):
+        """ Stops the server
+
+        Returns:
+
+        """
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._context is not None:
+            self._context.term()
+            self._context = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _serve(self, socket):
+        """ Answers the requests until the server is stopped
+
+        Args:
+            socket:
+
+        Returns:
+
+        """
+        poller = zmq.Poller()
+        poller.register(socket, zmq.POLLIN)
+        while self._running.is_set():
+            if not poller.poll(50):
+                continue
+            message = json.loads(socket.recv().decode('utf-8'))
+            self.requests += 1
+            if "xml_string" in message:
+                error = self.validate_xml(message["xsd_string"], message["xml_string"])
+            else:
+                error = self.validate_xsd(message["xsd_string"])
+            if self.delay:
+                time.sleep(self.delay)
+            socket.send(("ok" if error is None else str(error)).encode('utf-8'))
+        socket.close()
+
+
+def _lxml_validate_xsd(xsd_string):
+    """ Validates a schema with lxml
+
+    Args:
+        xsd_string:
+
+    Returns:
+
+    """
+    try:
+        return lxml_validate_xsd(XSDTree.build_tree(xsd_string))
+    except Exception as e:
+        return str(e)
+
+
+def _lxml_validate_xml(xsd_string, xml_string):
+    """ Validates a document with lxml
+
+    Args:
+        xsd_string:
+        xml_string:
+
+    Returns:
+
+    """
+    try:
+        return lxml_validate_xml(XSDTree.build_tree(xsd_string), XSDTree.build_tree(xml_string))
+    except Exception as e:
+        return str(e)
@@ -2,8 +2,6 @@
 """
 from abc import ABCMeta, abstractmethod
 
-import lxml.etree as etree
-
 import xml_utils.commons.constants as constants
 from xml_utils.xsd_tree.xsd_tree import XSDTree
 
@@ -30,13 +28,8 @@ class XSDFlattener(object, metaclass=ABCMeta):
         Returns:
 
         """
-        # builds the parser
-        parser = etree.XMLParser(remove_blank_text=True, remove_comments=True, remove_pis=True)
-        # sets the parser
-        etree.set_default_parser(parser=parser)
-
         # parse the XML String removing blanks, comments, processing instructions
-        xml_tree = XSDTree.build_tree(self.xml_string)
+        xml_tree = XSDTree.build_tree(self.xml_string, parser='hash')
 
         # replace the includes by their content
         return self._replace_all_includes_by_content(xml_tree)
@@ -57,7 +50,7 @@ class XSDFlattener(object, metaclass=ABCMeta):
                 # get the content of the dependency
                 dependency_content = self.get_dependency_content(uri)
                 # build the tree
-                xml_tree = XSDTree.build_tree(dependency_content)
+                xml_tree = XSDTree.build_tree(dependency_content, parser='hash')
                 # replace the includes by their content
                 return self._replace_all_includes_by_content(xml_tree)
             else:
@@ -102,7 +95,7 @@ class XSDFlattener(object, metaclass=ABCMeta):
         """
         if dependency_content is not None:
             # build the tree of the dependency
-            dependency_tree = XSDTree.fromstring(dependency_content)
+            dependency_tree = XSDTree.fromstring(dependency_content, parser='hash')
             # get elements from dependency
             dependency_elements = dependency_tree.getchildren()
             # appends elements from dependency to tree
@@ -6,7 +6,6 @@ from collections import OrderedDict
 
 import six
 import xmltodict
-from lxml import etree
 
 from xml_utils.xsd_tree.xsd_tree import XSDTree
 
@@ -22,11 +21,8 @@ def get_hash(xml_string):
     Returns:
         str: SHA-1 hash of the XML string
     """
-    # Load the required parser
-    hash_parser = etree.XMLParser(remove_blank_text=True, remove_comments=True, remove_pis=True)
-    etree.set_default_parser(parser=hash_parser)
-
-    xml_tree = XSDTree.build_tree(xml_string)
+    # Parse with the hash parser (removes blank text, comments and processing instructions)
+    xml_tree = XSDTree.build_cached_tree(xml_string, parser='hash')
 
     # Remove all annotations
     annotations = xml_tree.findall(".//{http://www.w3.org/2001/XMLSchema}annotation")
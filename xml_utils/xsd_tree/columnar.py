@@ -0,0 +1,192 @@
+""" Columnar extraction of repeated records, streamed from an XML document
+"""
+from itertools import chain
+
+import xml_utils.commons.exceptions as exceptions
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+from xml_utils.xsd_types.coercion import coerce_column, numpy, STRING, CoercedColumn
+
+
+class ColumnarExtractor(object):
+    """ Extracts fields of repeated records into columns, chunk by chunk.
+
+    Records are found with XSDTree.stream_iterfind, so only the records of the
+    current chunk are kept in memory. Fields are paths relative to a record:
+    child paths (title, meta/date) for text, and attributes (@id, meta/@lang).
+    Missing fields are empty strings, hence invalid for non-string types.
+    """
+
+    def __init__(self, record_path, fields, xsd_types=None, namespaces=None, chunk_size=10000, as_array=None):
+        """ Initializes the extractor
+
+        Args:
+            record_path: path of the records, supported by stream_iterfind
+            fields: dict of column name -> path of the field in the record
+            xsd_types: dict of column name -> builtin type, columns without type are kept as strings
+            namespaces: namespaces of the prefixes used in field paths
+            chunk_size: number of records per chunk
+            as_array: returns columns as NumPy arrays (see coerce_column)
+        """
+        self.record_path = record_path
+        self.fields = fields
+        self.xsd_types = dict() if xsd_types is None else xsd_types
+        self.chunk_size = chunk_size
+        self.as_array = as_array
+        # text of child elements is read in one pass over the children of the record,
+        # other fields with a getter
+        self._child_positions = dict()
+        self._getters = []
+        for position, path in enumerate(fields.values()):
+            child_tag = _get_child_tag(path, namespaces)
+            if child_tag is not None and child_tag not in self._child_positions:
+                self._child_positions[child_tag] = position
+            else:
+                self._getters.append((position, _get_field_getter(path, namespaces)))
+
+    def iter_chunks(self, xml_string):
+        """ Yields the columns of the records, chunk by chunk
+
+        Args:
+            xml_string: XML string, bytes, path or file object (see stream_iterfind)
+
+        Returns:
+            generator of dicts of column name -> CoercedColumn
+
+        """
+        child_positions = self._child_positions
+        getters = self._getters
+        empty_row = [None] * len(self.fields)
+        rows = []
+
+        for record in XSDTree.stream_iterfind(xml_string, self.record_path):
+            row = empty_row[:]
+            if child_positions:
+                for child in record:
+                    position = child_positions.get(child.tag)
+                    # the first matching child is used, as findtext does
+                    if position is not None and row[position] is None:
+                        row[position] = child.text or ''
+            for position, getter in getters:
+                row[position] = getter(record)
+            rows.append(row)
+
+            if len(rows) == self.chunk_size:
+                yield self._coerce(rows)
+                rows = []
+
+        if rows:
+            yield self._coerce(rows)
+
+    def extract(self, xml_string):
+        """ Returns the columns of all the records
+
+        Args:
+            xml_string: XML string, bytes, path or file object (see stream_iterfind)
+
+        Returns:
+            dict of column name -> CoercedColumn
+
+        """
+        chunks = list(self.iter_chunks(xml_string))
+        if not chunks:
+            return self._coerce([])
+        if len(chunks) == 1:
+            return chunks[0]
+
+        return {name: _concatenate([chunk[name] for chunk in chunks]) for name in self.fields}
+
+    def _coerce(self, rows):
+        """ Returns the typed columns of a chunk
+
+        Args:
+            rows: list of values of each record
+
+        Returns:
+
+        """
+        columns = zip(*rows) if rows else [()] * len(self.fields)
+        # missing child elements are empty strings
+        return {name: coerce_column([value or '' for value in column_values] if None in column_values
+                                    else list(column_values),
+                                    self.xsd_types.get(name, STRING), as_array=self.as_array)
+                for name, column_values in zip(self.fields, columns)}
+
+
+def _get_child_tag(path, namespaces):
+    """ Returns the tag ({namespace}local) of a field path made of a child element, None for other paths
+
+    Args:
+        path:
+        namespaces:
+
+    Returns:
+
+    """
+    if path.startswith('{'):
+        return path if '/' not in path.split('}', 1)[1] and '@' not in path else None
+    if any(character in path for character in '/@[*.()'):
+        return None
+    if ':' not in path:
+        return path
+
+    prefix, local_name = path.split(':', 1)
+    try:
+        return '{{{0}}}{1}'.format(namespaces[prefix], local_name)
+    except (KeyError, TypeError):
+        raise exceptions.XMLError('Unknown namespace prefix: {}.'.format(prefix))
+
+
+def _get_field_getter(path, namespaces):
+    """ Returns a function returning the value of a field in a record
+
+    Args:
+        path:
+        namespaces:
+
+    Returns:
+
+    """
+    # only a last step starting with @ is an attribute (not a predicate, e.g. meta[@lang='en'])
+    element_path, _, last_step = path.rpartition('/')
+    if not last_step.startswith('@'):
+        return lambda record: record.findtext(path, '', namespaces)
+
+    attribute = last_step[1:]
+
+    if ':' in attribute:
+        prefix, local_name = attribute.split(':', 1)
+        try:
+            attribute = '{{{0}}}{1}'.format(namespaces[prefix], local_name)
+        except (KeyError, TypeError):
+            raise exceptions.XMLError('Unknown namespace prefix: {}.'.format(prefix))
+    if not element_path:
+        return lambda record: record.get(attribute, '')
+
+    def get_attribute(record):
+        element = record.find(element_path, namespaces)
+        return '' if element is None else element.get(attribute, '')
+
+    return get_attribute
+
+
+def _concatenate(columns):
+    """ Concatenates the columns of several chunks
+
+    Args:
+        columns: CoercedColumn of each chunk
+
+    Returns:
+
+    """
+    invalid = []
+    offset = 0
+    for column in columns:
+        invalid.extend(position + offset for position in column.invalid)
+        offset += len(column.values)
+
+    first_column = columns[0]
+    if isinstance(first_column.values, list):
+        values = list(chain.from_iterable(column.values for column in columns))
+    else:
+        values = numpy.concatenate([column.values for column in columns])
+    return CoercedColumn(first_column.xsd_type, first_column.category, values, invalid)
@@ -1,5 +1,7 @@
 """XSD Tree operations on annotations
 """
+from lxml import etree
+
 from xml_utils.commons import constants as xml_utils_constants
 
 
@@ -16,3 +18,98 @@ def remove_annotations(xsd_tree):
     annotations = xsd_tree.findall(".//{}annotation".format(xml_utils_constants.LXML_SCHEMA_NAMESPACE))
     for annotation in annotations:
         annotation.getparent().remove(annotation)
+
+
+def stream_remove_annotations(source, sink, encoding="utf-8"):
+    """Writes an XSD without annotations, comments and processing instructions,
+    element by element, without building the whole tree
+
+    Args:
+        source: file name or file object to read from
+        sink: file name or file object to write to
+        encoding:
+
+    Returns:
+
+    """
+    annotation_tag = "{}annotation".format(xml_utils_constants.LXML_SCHEMA_NAMESPACE)
+    # number of annotation elements opened at the current position
+    annotation_depth = 0
+    # elements being written
+    element_writers = []
+    # element whose text (or tail) is complete only when the next event is received
+    pending_element, pending_tail = None, False
+
+    with etree.xmlfile(sink, encoding=encoding) as xml_file:
+        xml_file.write_declaration()
+        for event, element in etree.iterparse(source, events=("start", "end"),
+                                              remove_comments=True, remove_pis=True):
+            if pending_element is not None:
+                _write_text(xml_file, pending_element, pending_tail)
+                pending_element = None
+
+            # skip annotations and their content
+            if element.tag == annotation_tag or annotation_depth > 0:
+                annotation_depth += 1 if event == "start" else -1
+                if annotation_depth == 0:
+                    element.getparent().remove(element)
+                continue
+
+            if event == "start":
+                nsmap, attrib = _get_namespace_declarations(element)
+                attrib.update(element.attrib)
+                element_writer = xml_file.element(element.tag, attrib, nsmap=nsmap)
+                element_writer.__enter__()
+                element_writers.append(element_writer)
+                pending_element, pending_tail = element, False
+            else:
+                element_writers.pop().__exit__(None, None, None)
+                pending_element, pending_tail = element, True
+
+
+def _write_text(xml_file, element, tail):
+    """Writes the text or the tail of an element, then drops the element once written
+
+    Args:
+        xml_file:
+        element:
+        tail:
+
+    Returns:
+
+    """
+    text = element.tail if tail else element.text
+    if text is not None:
+        xml_file.write(text)
+
+    parent = element.getparent()
+    if tail and parent is not None:
+        parent.remove(element)
+
+
+def _get_namespace_declarations(element):
+    """Returns the namespaces declared by an element, split between the nsmap of
+    the writer (one prefix per namespace) and xmlns attributes (other prefixes)
+
+    Args:
+        element:
+
+    Returns:
+
+    """
+    parent = element.getparent()
+    # only declare namespaces not declared by the parent
+    namespaces = element.nsmap if parent is None else \
+        {prefix: url for prefix, url in element.nsmap.items() if parent.nsmap.get(prefix) != url}
+
+    nsmap = dict()
+    attrib = dict()
+    # declare the prefix of the element first, so the writer keeps it for the tag
+    for prefix, url in sorted(namespaces.items(), key=lambda item: item[0] != element.prefix):
+        if url in nsmap.values():
+            # the writer only keeps one prefix per namespace
+            attrib["xmlns:{}".format(prefix) if prefix else "xmlns"] = url
+        else:
+            nsmap[prefix] = url
+
+    return nsmap, attrib
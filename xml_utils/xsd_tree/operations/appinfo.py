@@ -1,5 +1,7 @@
 """XSD Tree operations on appinfo
 """
+from functools import lru_cache
+
 from lxml import etree
 
 from xml_utils.commons import constants as xml_utils_constants
@@ -38,6 +40,51 @@ def delete_appinfo_element(xsd_string, xpath, attribute_name):
     return _update_appinfo_element(xsd_string, xpath, attribute_name)
 
 
+def get_appinfo_by_xpath(xsd_tree):
+    """Returns the appinfo of all the elements of the tree, in a single pass
+
+    Args:
+        xsd_tree:
+
+    Returns:
+        dict: canonical xpath of the element -> dict of appinfo name and value
+
+    """
+    appinfo_by_xpath = dict()
+    appinfo_tag = "{}appinfo".format(xml_utils_constants.LXML_SCHEMA_NAMESPACE)
+    annotation_tag = "{}annotation".format(xml_utils_constants.LXML_SCHEMA_NAMESPACE)
+
+    for appinfo in xsd_tree.iter(appinfo_tag):
+        annotation = appinfo.getparent()
+        if annotation is None or annotation.tag != annotation_tag or annotation.getparent() is None:
+            continue
+
+        xpath = xsd_tree.getelementpath(annotation.getparent())
+        element_appinfo = appinfo_by_xpath.setdefault(xpath, dict())
+        for appinfo_element in appinfo.iterchildren(etree.Element):
+            appinfo_name = etree.QName(appinfo_element).localname
+            if appinfo_name in element_appinfo:
+                raise XMLError("{} appinfo found multiple times in the same element".format(appinfo_name))
+            element_appinfo[appinfo_name] = appinfo_element.text
+
+    return appinfo_by_xpath
+
+
+@lru_cache(maxsize=32)
+def get_appinfo_by_xpath_from_string(xsd_string):
+    """Returns the appinfo of all the elements of an XSD string, cached by content.
+    The returned dictionary is shared between callers and must not be modified.
+
+    Args:
+        xsd_string:
+
+    Returns:
+        dict: canonical xpath of the element -> dict of appinfo name and value
+
+    """
+    return get_appinfo_by_xpath(XSDTree.build_tree(xsd_string))
+
+
 def _get_appinfo_element(element, element_name, namespace):
     """Get an element from the appinfo
 
@@ -72,8 +119,8 @@ def _update_appinfo_element(xsd_string, xpath, appinfo_name, value=None):
     Returns:
 
     """
-    # Build the XSD tree
-    xsd_tree = XSDTree.build_tree(xsd_string)
+    # Build the XSD tree (copy of the cached tree if the cache is enabled)
+    xsd_tree = XSDTree.build_cached_tree(xsd_string)
     # Get namespaces
     namespaces = get_namespaces(xsd_string)
     # Get XSD element using its xpath
@@ -92,13 +139,14 @@ def _update_appinfo_element(xsd_string, xpath, appinfo_name, value=None):
     return updated_xsd_string
 
 
-def add_appinfo_child_to_element(element, appinfo_name, value):
+def add_appinfo_child_to_element(element, appinfo_name, value, xsd_tree_index=None):
     """Adds an appinfo child to an etree element
 
     Args:
         element:
         appinfo_name:
         value:
+        xsd_tree_index: XSDTreeIndex of the tree to keep up to date
 
     Returns:
 
@@ -117,16 +165,21 @@ def add_appinfo_child_to_element(element, appinfo_name, value):
         # get attribute tag
         appinfo_element = _get_or_create_element(appinfo, appinfo_name)
 
+        if xsd_tree_index is not None:
+            # elements may have been created anywhere under the element
+            xsd_tree_index.element_added(annotation)
+
     # set the value of the appinfo
     appinfo_element.text = value
 
 
-def delete_appinfo_child_from_element(element, appinfo_name):
+def delete_appinfo_child_from_element(element, appinfo_name, xsd_tree_index=None):
     """Deletes an appinfo child an etree element
 
     Args:
         element:
         appinfo_name: name of the appinfo to delete
+        xsd_tree_index: XSDTreeIndex of the tree to keep up to date
 
     Returns:
 
@@ -136,7 +189,11 @@ def delete_appinfo_child_from_element(element, appinfo_name):
 
     # if appinfo is present, deletes it
     if appinfo_element is not None:
-        appinfo_element.getparent().remove(appinfo_element)
+        appinfo = appinfo_element.getparent()
+        appinfo.remove(appinfo_element)
+
+        if xsd_tree_index is not None:
+            xsd_tree_index.element_removed(appinfo)
 
 
 def _get_or_create_element(parent, element_tag, namespace=""):
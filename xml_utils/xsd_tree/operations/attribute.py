@@ -46,14 +46,34 @@ def _update_attribute(xsd_string, xpath, attribute, value=None):
     Returns:
 
     """
-    # Build the XSD tree
-    xsd_tree = XSDTree.build_tree(xsd_string)
+    # Build the XSD tree (copy of the cached tree if the cache is enabled)
+    xsd_tree = XSDTree.build_cached_tree(xsd_string)
     # Get namespaces
     namespaces = get_namespaces(xsd_string)
     # Get XSD element using its xpath
     element = get_element_by_xpath(xsd_tree, xpath, namespaces)
 
-    # Add or update the attribute
+    # Add, update or delete the attribute
+    update_element_attribute(element, attribute, value)
+
+    # Converts XSD tree back to string
+    updated_xsd_string = XSDTree.tostring(xsd_tree)
+
+    return updated_xsd_string
+
+
+def update_element_attribute(element, attribute, value=None, xsd_tree_index=None):
+    """Updates an attribute of an etree element (sets the value or deletes)
+
+    Args:
+        element:
+        attribute: name of the attribute to update
+        value: value of the attribute to set
+        xsd_tree_index: XSDTreeIndex of the tree to keep up to date
+
+    Returns:
+
+    """
     if value is not None:
         # Set element attribute with value
         element.attrib[attribute] = value
@@ -62,7 +82,5 @@ def _update_attribute(xsd_string, xpath, attribute, value=None):
         if attribute in element.attrib:
             del element.attrib[attribute]
 
-    # Converts XSD tree back to string
-    updated_xsd_string = XSDTree.tostring(xsd_tree)
-
-    return updated_xsd_string
+    if xsd_tree_index is not None:
+        xsd_tree_index.attribute_updated(element, attribute)
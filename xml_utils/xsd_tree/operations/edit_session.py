@@ -0,0 +1,120 @@
+"""XSD Tree edit session, applying several edits with a single parse and serialization
+"""
+from xml_utils.xsd_tree.operations.appinfo import add_appinfo_child_to_element, \
+    delete_appinfo_child_from_element
+from xml_utils.xsd_tree.operations.attribute import update_element_attribute
+from xml_utils.xsd_tree.operations.element_index import XSDTreeIndex
+from xml_utils.xsd_tree.operations.namespaces import get_namespaces
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+
+class XSDEditSession(object):
+    """ Batch of attribute and appinfo edits on an XSD string.
+
+    The XSD string is parsed once. Edits are queued, applied together on
+    commit, and the tree is serialized once. If an edit fails, the session
+    goes back to its last committed state.
+    """
+
+    def __init__(self, xsd_string):
+        """ Initializes the session
+
+        Args:
+            xsd_string:
+        """
+        self.xsd_string = xsd_string
+        self.namespaces = get_namespaces(xsd_string)
+        self.pending_edits = []
+        self._load(xsd_string)
+
+    def set_attribute(self, xpath, attribute, value):
+        """Queues setting an attribute of an element
+
+        Args:
+            xpath:
+            attribute:
+            value:
+
+        Returns:
+
+        """
+        self.pending_edits.append((xpath, update_element_attribute, (attribute, value)))
+
+    def delete_attribute(self, xpath, attribute):
+        """Queues deleting an attribute from an element
+
+        Args:
+            xpath:
+            attribute:
+
+        Returns:
+
+        """
+        self.pending_edits.append((xpath, update_element_attribute, (attribute, None)))
+
+    def add_appinfo_element(self, xpath, appinfo_name, value):
+        """Queues adding appinfo to an element
+
+        Args:
+            xpath:
+            appinfo_name:
+            value:
+
+        Returns:
+
+        """
+        self.pending_edits.append((xpath, add_appinfo_child_to_element, (appinfo_name, value)))
+
+    def delete_appinfo_element(self, xpath, appinfo_name):
+        """Queues deleting appinfo from an element
+
+        Args:
+            xpath:
+            appinfo_name:
+
+        Returns:
+
+        """
+        self.pending_edits.append((xpath, delete_appinfo_child_from_element, (appinfo_name,)))
+
+    def commit(self):
+        """Applies the pending edits and returns the updated XSD string
+
+        Returns:
+
+        """
+        try:
+            for xpath, operation, args in self.pending_edits:
+                element = self.xsd_tree_index.get_element_by_xpath(xpath)
+                operation(element, *args, xsd_tree_index=self.xsd_tree_index)
+        except Exception:
+            # restore the last committed state
+            self._load(self.xsd_string)
+            self.pending_edits = []
+            raise
+
+        self.pending_edits = []
+        # Converts XSD tree back to string
+        self.xsd_string = XSDTree.tostring(self.xsd_tree)
+
+        return self.xsd_string
+
+    def rollback(self):
+        """Discards the pending edits
+
+        Returns:
+
+        """
+        self.pending_edits = []
+
+    def _load(self, xsd_string):
+        """Builds the tree and its index
+
+        Args:
+            xsd_string:
+
+        Returns:
+
+        """
+        self.xsd_tree = XSDTree.build_tree(xsd_string)
+        self.xsd_tree_index = XSDTreeIndex(self.xsd_tree, self.namespaces)
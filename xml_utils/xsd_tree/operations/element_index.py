@@ -0,0 +1,204 @@
+"""XSD Tree element index, for repeated lookups on the same tree
+"""
+from lxml import etree
+
+from xml_utils.commons import constants as xml_utils_constants
+from xml_utils.commons.exceptions import XMLError
+from xml_utils.xsd_tree.operations.xpath import get_element_by_xpath, get_lxml_xpath
+
+# tags of the global declarations indexed by name
+GLOBAL_ELEMENT_TAG = "{}element".format(xml_utils_constants.LXML_SCHEMA_NAMESPACE)
+GLOBAL_TYPE_TAGS = ("{}complexType".format(xml_utils_constants.LXML_SCHEMA_NAMESPACE),
+                    "{}simpleType".format(xml_utils_constants.LXML_SCHEMA_NAMESPACE))
+
+
+class XSDTreeIndex(object):
+    """ Index of the elements of an XSD tree, built once per tree.
+
+    Maps canonical xpaths (as returned by getelementpath) and names of global
+    elements and types to element references. Edit operations receiving the
+    index keep it up to date.
+    """
+
+    def __init__(self, xsd_tree, namespaces=None):
+        """ Builds the index
+
+        Args:
+            xsd_tree: result of build_tree
+            namespaces: namespaces used to translate prefixed xpaths
+        """
+        self.xsd_tree = xsd_tree
+        self.namespaces = namespaces
+        # canonical xpath -> element
+        self._elements = dict()
+        # element -> canonical xpath
+        self._paths = dict()
+        # xpath given by a caller -> element
+        self._lookups = dict()
+        # (tag, name) -> global element or type
+        self._globals = dict()
+
+        root = xsd_tree.getroot()
+        self._elements["."] = root
+        self._paths[root] = "."
+        self._index_subtree(root)
+        self._index_globals()
+
+    def get_element_by_xpath(self, xpath):
+        """ Returns an element from its xpath
+
+        Args:
+            xpath:
+
+        Returns:
+
+        """
+        element = self._lookups.get(xpath)
+        if element is None:
+            element = self._elements.get(get_lxml_xpath(xpath, self.namespaces))
+            if element is None:
+                # not a canonical xpath, resolve it on the tree
+                element = get_element_by_xpath(self.xsd_tree, xpath, self.namespaces)
+            self._lookups[xpath] = element
+
+        return element
+
+    def get_xpath(self, element):
+        """ Returns the canonical xpath of an element
+
+        Args:
+            element:
+
+        Returns:
+
+        """
+        try:
+            return self._paths[element]
+        except KeyError:
+            raise XMLError('Element not found in the index.')
+
+    def get_global_element(self, name):
+        """ Returns a global element from its name
+
+        Args:
+            name:
+
+        Returns:
+
+        """
+        return self._get_global(GLOBAL_ELEMENT_TAG, name)
+
+    def get_global_type(self, name):
+        """ Returns a global complex or simple type from its name
+
+        Args:
+            name:
+
+        Returns:
+
+        """
+        return self._get_global(GLOBAL_TYPE_TAGS, name)
+
+    def element_added(self, element):
+        """ Updates the index after an element was inserted in the tree
+
+        Args:
+            element: inserted element
+
+        Returns:
+
+        """
+        self._reindex_subtree(element.getparent())
+
+    def element_removed(self, parent):
+        """ Updates the index after an element was removed from the tree
+
+        Args:
+            parent: former parent of the removed element
+
+        Returns:
+
+        """
+        self._reindex_subtree(parent)
+
+    def attribute_updated(self, element, attribute):
+        """ Updates the index after an attribute of an element was set or deleted
+
+        Args:
+            element:
+            attribute:
+
+        Returns:
+
+        """
+        # attribute predicates of cached xpaths may not match anymore
+        self._lookups.clear()
+        if attribute == "name" and element.getparent() is self.xsd_tree.getroot():
+            self._index_globals()
+
+    def _get_global(self, tags, name):
+        """ Returns a global declaration from its tag(s) and name
+
+        Args:
+            tags:
+            name:
+
+        Returns:
+
+        """
+        if not isinstance(tags, tuple):
+            tags = (tags,)
+
+        for tag in tags:
+            element = self._globals.get((tag, name))
+            if element is not None:
+                return element
+
+        raise XMLError('Unable to find a global declaration named {}.'.format(name))
+
+    def _index_subtree(self, parent):
+        """ Indexes all the descendants of an element
+
+        Args:
+            parent:
+
+        Returns:
+
+        """
+        for element in parent.iterdescendants(etree.Element):
+            path = self.xsd_tree.getelementpath(element)
+            self._elements[path] = element
+            self._paths[element] = path
+
+    def _reindex_subtree(self, parent):
+        """ Drops then indexes again all the descendants of an element
+
+        Args:
+            parent:
+
+        Returns:
+
+        """
+        parent_path = self._paths[parent]
+        prefix = "" if parent_path == "." else parent_path + "/"
+        stale_paths = [path for path in self._elements if path != parent_path and path.startswith(prefix)]
+        for path in stale_paths:
+            del self._paths[self._elements.pop(path)]
+
+        self._index_subtree(parent)
+        # positions may have changed, cached xpaths are no longer reliable
+        self._lookups.clear()
+        if parent is self.xsd_tree.getroot():
+            self._index_globals()
+
+    def _index_globals(self):
+        """ Indexes the global elements and types by name
+
+        Returns:
+
+        """
+        self._globals.clear()
+        for element in self.xsd_tree.getroot().iterchildren(GLOBAL_ELEMENT_TAG, *GLOBAL_TYPE_TAGS):
+            name = element.attrib.get("name")
+            if name is not None:
+                self._globals[(element.tag, name)] = element
@@ -13,10 +13,18 @@ def get_namespaces(xsd_string):
     Returns:
 
     """
-    # events to look for during iterparse
-    events = "start", "start-ns"
     # initialize namespaces dictionary
     namespaces = {'xml': xml_utils_constants.XML_NAMESPACE}
+
+    if XSDTree.tree_cache is not None:
+        # namespaces declared by the root element of the cached tree
+        for prefix, url in XSDTree.build_cached_tree(xsd_string, copy=False).getroot().nsmap.items():
+            if prefix and url:
+                namespaces[prefix] = url
+        return namespaces
+
+    # events to look for during iterparse
+    events = "start", "start-ns"
     # iterate file namespaces
     for event, elem in XSDTree.iterparse(xsd_string, events):
         if event == "start-ns":
@@ -28,6 +36,22 @@ def get_namespaces(xsd_string):
     return namespaces
 
 
+def get_prefix_namespace(namespaces, prefix):
+    """Returns the namespace of a prefix, None if not declared (the xml prefix is always bound)
+
+    Args:
+        namespaces: prefix -> namespace, default namespace with the None prefix (e.g. nsmap of an element)
+        prefix: prefix, empty for the default namespace
+
+    Returns:
+
+    """
+    # the xml prefix is implicitly declared, and never part of the nsmap of an element
+    if prefix == 'xml':
+        return xml_utils_constants.XML_NAMESPACE
+    return namespaces.get(prefix or None)
+
+
 def get_default_prefix(namespaces):
     """Returns the default prefix used in the schema
 
@@ -52,6 +76,10 @@ def get_global_namespace(xsd_string):
     Returns:
 
     """
+    if XSDTree.tree_cache is not None:
+        # default namespace declared by the root element of the cached tree
+        return XSDTree.build_cached_tree(xsd_string, copy=False).getroot().nsmap.get(None)
+
     # events to look for during iterparse
     events = "start", "start-ns"
     # Initialize global namespace
@@ -0,0 +1,212 @@
+"""XSD Tree type resolution, to resolve type and ref references without searching the tree
+"""
+from lxml import etree
+
+from xml_utils.commons import constants as xml_utils_constants
+from xml_utils.commons.exceptions import XMLError
+from xml_utils.xsd_tree.operations.namespaces import get_target_namespace, get_prefix_namespace
+from xml_utils.xsd_types.xsd_types import is_builtin_type
+
+# kinds of global declarations (symbol spaces) and their tags
+ELEMENT = "element"
+TYPE = "type"
+GROUP = "group"
+ATTRIBUTE_GROUP = "attributeGroup"
+DECLARATION_KINDS = {
+    "{}element".format(xml_utils_constants.LXML_SCHEMA_NAMESPACE): ELEMENT,
+    "{}complexType".format(xml_utils_constants.LXML_SCHEMA_NAMESPACE): TYPE,
+    "{}simpleType".format(xml_utils_constants.LXML_SCHEMA_NAMESPACE): TYPE,
+    "{}group".format(xml_utils_constants.LXML_SCHEMA_NAMESPACE): GROUP,
+    "{}attributeGroup".format(xml_utils_constants.LXML_SCHEMA_NAMESPACE): ATTRIBUTE_GROUP,
+}
+# elements holding the base of a type, and simple or complex contents holding them
+DERIVATION_TAGS = ("{}restriction".format(xml_utils_constants.LXML_SCHEMA_NAMESPACE),
+                   "{}extension".format(xml_utils_constants.LXML_SCHEMA_NAMESPACE))
+CONTENT_TAGS = ("{}simpleContent".format(xml_utils_constants.LXML_SCHEMA_NAMESPACE),
+                "{}complexContent".format(xml_utils_constants.LXML_SCHEMA_NAMESPACE))
+
+
+class XSDTypeResolver(object):
+    """ Index of the global declarations of an XSD tree, by kind and expanded QName.
+
+    Built in one pass over the children of the schema element. QNames can be
+    expanded ({namespace}local) or prefixed, prefixes being resolved with the
+    namespaces in scope of the referencing element, or of the schema element.
+    """
+
+    def __init__(self, xsd_tree, namespaces=None):
+        """ Builds the index
+
+        Args:
+            xsd_tree: result of build_tree
+            namespaces: namespaces used to expand prefixed QNames, in addition to the ones of the schema element
+        """
+        root = xsd_tree.getroot()
+        self.namespaces = dict(root.nsmap)
+        if namespaces is not None:
+            self.namespaces.update(namespaces)
+        self.target_namespace, _ = get_target_namespace(xsd_tree, self.namespaces)
+        # (kind, expanded QName) -> declaration
+        self._declarations = dict()
+        # prefixed QName -> expanded QName, for QNames resolved with the namespaces of the index
+        self._qnames = dict()
+        # expanded QName -> base type chain
+        self._base_types = dict()
+
+        name_prefix = "{%s}" % self.target_namespace if self.target_namespace else ""
+        for element in root.iterchildren(*DECLARATION_KINDS):
+            name = element.get("name")
+            if name is not None:
+                self._declarations[(DECLARATION_KINDS[element.tag], name_prefix + name)] = element
+
+    def expand_qname(self, qname, element=None):
+        """ Returns the expanded QName of a QName
+
+        Args:
+            qname: prefixed or expanded QName
+            element: element where the QName is used, for the namespaces in scope
+
+        Returns:
+
+        """
+        if qname.startswith("{"):
+            return qname
+        if element is not None:
+            return _expand_qname(qname, element.nsmap)
+
+        expanded_qname = self._qnames.get(qname)
+        if expanded_qname is None:
+            expanded_qname = self._qnames[qname] = _expand_qname(qname, self.namespaces)
+        return expanded_qname
+
+    def is_builtin_type(self, qname, element=None):
+        """ Returns True if the QName is a builtin XSD type
+
+        Args:
+            qname: prefixed or expanded QName
+            element: element where the QName is used
+
+        Returns:
+
+        """
+        return is_builtin_type(self.expand_qname(qname, element))
+
+    def resolve(self, qname, kind=TYPE, element=None):
+        """ Returns the global declaration of a QName, None for types of the XSD namespace
+
+        Args:
+            qname: prefixed or expanded QName
+            kind: ELEMENT, TYPE, GROUP or ATTRIBUTE_GROUP
+            element: element where the QName is used
+
+        Returns:
+
+        """
+        expanded_qname = self.expand_qname(qname, element)
+        declaration = self._declarations.get((kind, expanded_qname))
+        if declaration is None:
+            if kind == TYPE and expanded_qname.startswith(xml_utils_constants.LXML_SCHEMA_NAMESPACE):
+                return None
+            raise XMLError("Unable to find the declaration of the {0} {1}.".format(kind, expanded_qname))
+        return declaration
+
+    def resolve_reference(self, element):
+        """ Returns the declaration referenced by an element (type or ref attribute)
+
+        Args:
+            element: element with a type or ref attribute, group or attribute group with a ref attribute
+
+        Returns:
+
+        """
+        type_name = element.get("type")
+        if type_name is not None:
+            return self.resolve(type_name, TYPE, element)
+
+        ref = element.get("ref")
+        if ref is None:
+            raise XMLError("The element has no type or ref attribute.")
+        kind = DECLARATION_KINDS.get(element.tag)
+        if kind is None or kind == TYPE:
+            raise XMLError("References of {} elements are not indexed.".format(etree.QName(element).localname))
+        return self.resolve(ref, kind, element)
+
+    def get_base_types(self, qname, element=None):
+        """ Returns the chain of base types of a type, from its direct base to a builtin type
+
+        Args:
+            qname: prefixed or expanded QName of the type
+            element: element where the QName is used
+
+        Returns:
+            tuple of expanded QNames
+
+        """
+        expanded_qname = self.expand_qname(qname, element)
+        base_types = self._base_types.get(expanded_qname)
+        if base_types is None:
+            base_types = self._get_base_types(expanded_qname, set())
+        return base_types
+
+    def _get_base_types(self, expanded_qname, visited):
+        """ Computes and memoizes the base type chains of a type and of its bases
+
+        Args:
+            expanded_qname:
+            visited: types of the chain being computed, to detect circular derivations
+
+        Returns:
+
+        """
+        base_types = self._base_types.get(expanded_qname)
+        if base_types is not None:
+            return base_types
+        if expanded_qname in visited:
+            raise XMLError("Circular derivation of the type {}.".format(expanded_qname))
+        visited.add(expanded_qname)
+
+        base_types = ()
+        declaration = self.resolve(expanded_qname, TYPE)
+        if declaration is not None:
+            derivation = _get_derivation(declaration)
+            base = derivation.get("base") if derivation is not None else None
+            if base is not None:
+                base_qname = self.expand_qname(base, derivation)
+                base_types = (base_qname,) + self._get_base_types(base_qname, visited)
+
+        self._base_types[expanded_qname] = base_types
+        return base_types
+
+
+def _get_derivation(declaration):
+    """ Returns the restriction or extension element of a type declaration, None if not derived
+
+    Args:
+        declaration:
+
+    Returns:
+
+    """
+    for child in declaration.iterchildren(*(DERIVATION_TAGS + CONTENT_TAGS)):
+        if child.tag in CONTENT_TAGS:
+            return next(child.iterchildren(*DERIVATION_TAGS), None)
+        return child
+    return None
+
+
+def _expand_qname(qname, namespaces):
+    """ Returns the expanded QName of a prefixed QName
+
+    Args:
+        qname:
+        namespaces: prefix -> namespace
+
+    Returns:
+
+    """
+    prefix, _, local_name = qname.rpartition(":")
+    # unprefixed QNames are in the default namespace
+    namespace = get_prefix_namespace(namespaces, prefix)
+    if namespace is None and prefix:
+        raise XMLError("Unknown namespace prefix: {}.".format(prefix))
+    return etree.QName(namespace, local_name).text if namespace else local_name
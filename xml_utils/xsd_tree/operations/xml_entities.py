@@ -2,6 +2,30 @@
 """
 import re
 
+# predefined xml entities (other than ampersand) and their escaped version
+ESCAPE_TABLE = (
+    (">", "&gt;"),
+    ("<", "&lt;"),
+    ("'", "&apos;"),
+    ('"', "&quot;"),
+)
+# escaped predefined xml entities and their unescaped version, in substitution order
+UNESCAPE_TABLE = (
+    ("&amp;", "&"),
+    ("&gt;", ">"),
+    ("&lt;", "<"),
+    ("&apos;", "'"),
+    ("&quot;", '"'),
+)
+
+# ampersands not already part of an escaped predefined xml entity
+AMPERSAND_REGEX = re.compile("&(?!amp;|gt;|lt;|apos;|quot;)")
+
+# number of characters after an ampersand needed to know if it has to be escaped
+ESCAPE_LOOKAHEAD = len("quot;")
+# number of characters after an ampersand needed to unescape it ("&amp;" followed by an entity)
+UNESCAPE_LOOKAHEAD = len("&amp;quot;") - 1
+
 
 class XmlEntities(object):
 
@@ -19,47 +43,27 @@ class XmlEntities(object):
     def escape_xml_entities(self, xml_string):
 
         self.unescaped_xml_string = xml_string
-        self.escaped_xml_string = xml_string
-
-        # table which match a escaped predefined xml entities with a regex to find those occurence
-        regex_match_table = [
-            {
-                "escape_char": "&amp;",
-                "regex": "(&)(?!amp;)(?!gt;)(?!lt;)(?!apos;)(?!quot;)"
-            },
-            {
-                "escape_char": "&gt;",
-                "regex": "(>)"
-            },
-            {
-                "escape_char": "&lt;",
-                "regex": "(<)"
-            },
-            {
-                "escape_char": "&apos;",
-                "regex": "(')"
-            },
-            {
-                "escape_char": "&quot;",
-                "regex": '(")'
-            }
-        ]
-
-        # for all predefined xml entities in the match table
-        for subn_regex in regex_match_table:
-
-            # compile the regex
-            regex = re.compile(subn_regex["regex"])
-
-            # substitute the predefined xml entities found by this escaped version
-            subn_tuple = re.subn(regex, subn_regex["escape_char"], self.escaped_xml_string)
-
-            # get the escaped xml string and the number of substitution
-            self.escaped_xml_string = subn_tuple[0]
-            self.number_of_subs_made += subn_tuple[1]
+
+        self.escaped_xml_string, subs_number = _escape(xml_string)
+        self.number_of_subs_made += subs_number
 
         return self.escaped_xml_string
 
+    def iter_escape_xml_entities(self, xml_chunks):
+        """Escape all the predefined xml entities of a string given in chunks
+
+        Args:
+            xml_chunks: iterable of strings
+
+        Returns:
+            generator of escaped strings
+
+        """
+        for chunk in _iter_safe_chunks(xml_chunks, ESCAPE_LOOKAHEAD):
+            escaped_chunk, subs_number = _escape(chunk)
+            self.number_of_subs_made += subs_number
+            yield escaped_chunk
+
     @staticmethod
     def unescape_xml_entities(xml_string):
         """Unescape all the predefined xml entities
@@ -71,43 +75,75 @@ class XmlEntities(object):
             tuple<string, number>: Tuple with the unescaped string and the number of substitutions done
 
         """
-
         unescape_string = xml_string
         subs_number = 0
-        # table which match a escaped predefined xml entities with a regex to find those occurence
-        regex_match_table = [
-            {
-                "char": "&",
-                "regex": "(&amp;)"
-            },
-            {
-                "char": ">",
-                "regex": "(&gt;)"
-            },
-            {
-                "char": "<",
-                "regex": "(&lt;)"
-            },
-            {
-                "char": "'",
-                "regex": "(&apos;)"
-            },
-            {
-                "char": '"',
-                "regex": '(&quot;)'
-            }
-        ]
-
-        # for all escaped predefined xml entities in the match table
-        for subn_regex in regex_match_table:
-
-            # compile the regex
-            regex = re.compile(subn_regex["regex"])
-
-            # substitute the predefined xml entities found by this unescaped version
-            subn_tuple = re.subn(regex, subn_regex["char"], unescape_string)
-
-            unescape_string = subn_tuple[0]
-            subs_number += subn_tuple[1]
+
+        # for all escaped predefined xml entities in the table
+        for escape_char, char in UNESCAPE_TABLE:
+            occurrences = unescape_string.count(escape_char)
+            if occurrences > 0:
+                unescape_string = unescape_string.replace(escape_char, char)
+                subs_number += occurrences
 
         return unescape_string, subs_number
+
+    @staticmethod
+    def iter_unescape_xml_entities(xml_chunks):
+        """Unescape all the predefined xml entities of a string given in chunks
+
+        Args:
+            xml_chunks: iterable of strings
+
+        Returns:
+            generator of tuple<string, number>: unescaped strings and the number of substitutions done
+
+        """
+        for chunk in _iter_safe_chunks(xml_chunks, UNESCAPE_LOOKAHEAD):
+            yield XmlEntities.unescape_xml_entities(chunk)
+
+
+def _escape(xml_string):
+    """Escape all the predefined xml entities
+
+    Args:
+        xml_string:
+
+    Returns:
+        tuple<string, number>: Tuple with the escaped string and the number of substitutions done
+
+    """
+    # the ampersand is the only entity depending on its context, others are plain substitutions
+    escaped_xml_string, subs_number = AMPERSAND_REGEX.subn("&amp;", xml_string)
+
+    for char, escape_char in ESCAPE_TABLE:
+        occurrences = escaped_xml_string.count(char)
+        if occurrences > 0:
+            escaped_xml_string = escaped_xml_string.replace(char, escape_char)
+            subs_number += occurrences
+
+    return escaped_xml_string, subs_number
+
+
+def _iter_safe_chunks(xml_chunks, lookahead):
+    """Regroups chunks so that no ampersand sequence is split between two chunks
+
+    Args:
+        xml_chunks: iterable of strings
+        lookahead: number of characters needed after an ampersand
+
+    Returns:
+
+    """
+    carry = ''
+    for chunk in xml_chunks:
+        buffer = carry + chunk
+        # keep the end of the buffer from the first ampersand that may be incomplete
+        cut = buffer.find("&", max(len(buffer) - lookahead, 0))
+        if cut == -1:
+            cut = len(buffer)
+        carry = buffer[cut:]
+        if cut > 0:
+            yield buffer[:cut]
+
+    if carry:
+        yield carry
@@ -16,12 +16,7 @@ def get_element_by_xpath(xsd_tree, xpath, namespaces=None):
     Returns:
 
     """
-    if namespaces is not None:
-        # Get default prefix
-        default_prefix = get_default_prefix(namespaces)
-
-        # Transform xpath into LXML format
-        xpath = xpath.replace(default_prefix + ":", xml_utils_constants.LXML_SCHEMA_NAMESPACE)
+    xpath = get_lxml_xpath(xpath, namespaces)
 
     try:
         element = xsd_tree.find(xpath)
@@ -32,3 +27,23 @@ def get_element_by_xpath(xsd_tree, xpath, namespaces=None):
         return element
     else:
         raise XMLError('Unable to find an element for the given Xpath.')
+
+
+def get_lxml_xpath(xpath, namespaces=None):
+    """Returns the xpath in LXML format (schema prefix replaced by the schema namespace)
+
+    Args:
+        xpath:
+        namespaces:
+
+    Returns:
+
+    """
+    if namespaces is not None:
+        # Get default prefix
+        default_prefix = get_default_prefix(namespaces)
+
+        # Transform xpath into LXML format
+        xpath = xpath.replace(default_prefix + ":", xml_utils_constants.LXML_SCHEMA_NAMESPACE)
+
+    return xpath
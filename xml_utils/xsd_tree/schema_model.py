@@ -0,0 +1,306 @@
+""" Compact read-only model of the structure of an XSD, for read paths that do not need the lxml tree
+"""
+import sys
+
+from lxml import etree
+
+from xml_utils.commons import constants as xml_utils_constants
+from xml_utils.commons.exceptions import XMLError
+from xml_utils.xsd_tree.operations.namespaces import get_prefix_namespace
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+from xml_utils.xsd_types.xsd_types import is_builtin_type
+
+# elements of the schema that are not part of the model, with their content
+IGNORED_KINDS = frozenset(('annotation',))
+# length of the namespace part of XSD tags, in lxml format
+SCHEMA_NAMESPACE_LENGTH = len(xml_utils_constants.LXML_SCHEMA_NAMESPACE)
+# global declarations indexed by the model, by kind
+GLOBAL_KINDS = ('element', 'complexType', 'simpleType', 'attribute', 'group', 'attributeGroup')
+# value of maxOccurs for unbounded particles
+UNBOUNDED = None
+# values of the form, elementFormDefault and attributeFormDefault attributes
+QUALIFIED = 'qualified'
+UNQUALIFIED = 'unqualified'
+
+
+class SchemaNode(object):
+    """ Read-only node of the schema model.
+
+    kind is the local name of the XSD element (element, complexType, sequence...),
+    name/type/ref/base are expanded QNames ({namespace}local), interned.
+    """
+
+    __slots__ = ('kind', 'name', 'type', 'ref', 'base', 'min_occurs', 'max_occurs', 'value', 'children')
+
+    def __init__(self, kind, name=None, type=None, ref=None, base=None, min_occurs=1, max_occurs=1,
+                 value=None, children=()):
+        """ Initializes the node
+
+        Args:
+            kind:
+            name:
+            type:
+            ref:
+            base:
+            min_occurs:
+            max_occurs: UNBOUNDED (None) if unbounded
+            value: value of facets (enumeration, pattern...)
+            children: tuple of child nodes
+        """
+        set_attribute = object.__setattr__
+        set_attribute(self, 'kind', kind)
+        set_attribute(self, 'name', name)
+        set_attribute(self, 'type', type)
+        set_attribute(self, 'ref', ref)
+        set_attribute(self, 'base', base)
+        set_attribute(self, 'min_occurs', min_occurs)
+        set_attribute(self, 'max_occurs', max_occurs)
+        set_attribute(self, 'value', value)
+        set_attribute(self, 'children', children)
+
+    def __setattr__(self, key, value):
+        raise AttributeError('SchemaNode is read-only.')
+
+    def __reduce__(self):
+        return SchemaNode, tuple(getattr(self, slot) for slot in SchemaNode.__slots__)
+
+    def __repr__(self):
+        return 'SchemaNode({}, {})'.format(self.kind, self.name or self.ref or '')
+
+    def is_builtin_type(self):
+        """ Returns True if the type of the node is a builtin XSD type
+
+        Returns:
+
+        """
+        return is_builtin_type(self.type)
+
+    def iter(self, kind=None):
+        """ Iterates over the node and its descendants, in document order
+
+        Args:
+            kind: only returns nodes of this kind if set
+
+        Returns:
+
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if kind is None or node.kind == kind:
+                yield node
+            stack.extend(reversed(node.children))
+
+
+class SchemaModel(object):
+    """ Read-only model of a schema, built once from its XSD tree.
+
+    Global declarations are indexed by expanded QName. The model only holds
+    Python objects (no reference to the lxml tree) and can be pickled.
+    """
+
+    __slots__ = ('target_namespace', 'root', 'elements', 'complex_types', 'simple_types',
+                 'attributes', 'groups', 'attribute_groups', '_nodes_by_kind')
+
+    def __init__(self, target_namespace, root):
+        """ Initializes the model from its root node
+
+        Args:
+            target_namespace:
+            root: node of the schema element
+        """
+        set_attribute = object.__setattr__
+        set_attribute(self, 'target_namespace', target_namespace)
+        set_attribute(self, 'root', root)
+
+        declarations = {kind: dict() for kind in GLOBAL_KINDS}
+        for node in root.children:
+            if node.kind in declarations and node.name is not None:
+                declarations[node.kind][node.name] = node
+        set_attribute(self, 'elements', declarations['element'])
+        set_attribute(self, 'complex_types', declarations['complexType'])
+        set_attribute(self, 'simple_types', declarations['simpleType'])
+        set_attribute(self, 'attributes', declarations['attribute'])
+        set_attribute(self, 'groups', declarations['group'])
+        set_attribute(self, 'attribute_groups', declarations['attributeGroup'])
+
+        # all nodes in document order, by kind, so that iterating over them does not walk the model
+        nodes_by_kind = dict()
+        for node in root.iter():
+            nodes_by_kind.setdefault(node.kind, []).append(node)
+        set_attribute(self, '_nodes_by_kind', {kind: tuple(nodes) for kind, nodes in nodes_by_kind.items()})
+
+    def __setattr__(self, key, value):
+        raise AttributeError('SchemaModel is read-only.')
+
+    def __reduce__(self):
+        return SchemaModel, (self.target_namespace, self.root)
+
+    @classmethod
+    def from_tree(cls, xsd_tree):
+        """ Builds the model of an XSD tree
+
+        Args:
+            xsd_tree: result of build_tree
+
+        Returns:
+
+        """
+        root = xsd_tree.getroot() if hasattr(xsd_tree, 'getroot') else xsd_tree
+        if not root.tag.startswith(xml_utils_constants.LXML_SCHEMA_NAMESPACE):
+            raise XMLError('The root element is not an XSD element.')
+        target_namespace = root.get('targetNamespace')
+        builder = _SchemaModelBuilder(target_namespace,
+                                      element_form_default=root.get('elementFormDefault', UNQUALIFIED),
+                                      attribute_form_default=root.get('attributeFormDefault', UNQUALIFIED))
+        return cls(target_namespace, builder.build_node(root))
+
+    @classmethod
+    def from_string(cls, xsd_string):
+        """ Builds the model of an XSD string
+
+        Args:
+            xsd_string:
+
+        Returns:
+
+        """
+        return cls.from_tree(XSDTree.build_tree(xsd_string))
+
+    def get_type(self, qname):
+        """ Returns the global complex or simple type of a name, None if builtin or not found
+
+        Args:
+            qname: expanded QName
+
+        Returns:
+
+        """
+        return self.complex_types.get(qname) or self.simple_types.get(qname)
+
+    def iter(self, kind=None):
+        """ Iterates over all nodes of the model, in document order
+
+        Args:
+            kind: only returns nodes of this kind if set
+
+        Returns:
+
+        """
+        if kind is None:
+            return self.root.iter()
+        return iter(self._nodes_by_kind.get(kind, ()))
+
+
+class _SchemaModelBuilder(object):
+    """ Builds the nodes of a schema model, interning the names once per build
+    """
+
+    def __init__(self, target_namespace, element_form_default=UNQUALIFIED, attribute_form_default=UNQUALIFIED):
+        """ Initializes the builder
+
+        Args:
+            target_namespace:
+            element_form_default: form of the local elements without form attribute
+            attribute_form_default: form of the local attributes without form attribute
+        """
+        self.target_namespace = target_namespace
+        # kind -> form of the local declarations without form attribute
+        self.form_defaults = {'element': element_form_default, 'attribute': attribute_form_default}
+        # (namespace, local name) -> interned expanded QName
+        self._names = dict()
+
+    def build_node(self, element, is_global=False):
+        """ Builds the node of an element and of its descendants
+
+        Args:
+            element:
+            is_global: True for the children of the schema element
+
+        Returns:
+
+        """
+        kind = self._intern(None, element.tag[SCHEMA_NAMESPACE_LENGTH:])
+
+        children = []
+        for child in element.iterchildren(tag=etree.Element):
+            child_tag = child.tag
+            if child_tag.startswith(xml_utils_constants.LXML_SCHEMA_NAMESPACE) \
+                    and child_tag[SCHEMA_NAMESPACE_LENGTH:] not in IGNORED_KINDS:
+                children.append(self.build_node(child, is_global=kind == 'schema'))
+
+        get = element.get
+        name = get('name')
+        if name is not None:
+            # global declarations, and local ones if qualified, are in the target namespace
+            is_qualified = is_global or get('form', self.form_defaults.get(kind)) == QUALIFIED
+            name = self._intern(self.target_namespace if is_qualified else None, name)
+
+        type_name, ref, base = get('type'), get('ref'), get('base')
+        if type_name is not None or ref is not None or base is not None:
+            nsmap = element.nsmap
+            type_name, ref, base = (self._resolve(nsmap, type_name), self._resolve(nsmap, ref),
+                                    self._resolve(nsmap, base))
+
+        return SchemaNode(kind,
+                          name=name,
+                          type=type_name,
+                          ref=ref,
+                          base=base,
+                          min_occurs=_get_occurs(get('minOccurs', '1')),
+                          max_occurs=_get_occurs(get('maxOccurs', '1')),
+                          value=get('value'),
+                          children=tuple(children))
+
+    def _resolve(self, nsmap, qname):
+        """ Returns the expanded QName of a prefixed QName
+
+        Args:
+            nsmap: namespaces in scope
+            qname:
+
+        Returns:
+
+        """
+        if qname is None:
+            return None
+
+        prefix, _, local_name = qname.rpartition(':')
+        namespace = get_prefix_namespace(nsmap, prefix)
+        if prefix and namespace is None:
+            raise XMLError('Unknown namespace prefix: {}.'.format(prefix))
+        return self._intern(namespace, local_name)
+
+    def _intern(self, namespace, local_name):
+        """ Returns the interned expanded QName of a local name
+
+        Args:
+            namespace:
+            local_name:
+
+        Returns:
+
+        """
+        key = (namespace, local_name)
+        name = self._names.get(key)
+        if name is None:
+            name = sys.intern("{{{0}}}{1}".format(namespace, local_name) if namespace else local_name)
+            self._names[key] = name
+        return name
+
+
+def _get_occurs(occurs):
+    """ Returns the value of minOccurs or maxOccurs
+
+    Args:
+        occurs:
+
+    Returns:
+
+    """
+    if occurs == 'unbounded':
+        return UNBOUNDED
+    try:
+        return int(occurs)
+    except ValueError:
+        raise XMLError('Invalid occurrence value: {}.'.format(occurs))
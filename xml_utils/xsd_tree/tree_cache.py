@@ -0,0 +1,111 @@
+""" Cache of parsed XSD trees, keyed by digest of the content
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+
+class XSDTreeCache(object):
+    """ Cache of parsed trees, keyed by digest of the content and parser profile.
+
+    Trees returned without copy are shared between callers and must not be modified.
+    The size of the cache is bounded by the total size of the cached contents.
+    """
+
+    def __init__(self, max_size=64 * 1024 * 1024):
+        """ Initializes the cache
+
+        Args:
+            max_size: maximum total size (bytes) of the contents of the cached trees
+        """
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # (digest, parser profile) -> (tree, size)
+        self._trees = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_tree(self, xml_string, parser=None, copy=False):
+        """ Returns the tree of an XML string, parsing it only if not cached
+
+        Args:
+            xml_string: XML string or bytes
+            parser: name of a parser profile, default parser if None
+            copy: returns a copy of the cached tree, that can be modified
+
+        Returns:
+
+        """
+        xml_bytes = xml_string.encode('utf-8') if isinstance(xml_string, str) else xml_string
+        key = (hashlib.sha1(xml_bytes).hexdigest(), parser)
+
+        with self._lock:
+            cached = self._trees.get(key)
+            if cached is not None:
+                self._trees.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if cached is None:
+            xml_tree = XSDTree.build_tree(xml_bytes, parser=parser)
+            self._add(key, xml_tree, len(xml_bytes))
+        else:
+            xml_tree = cached[0]
+
+        return deepcopy(xml_tree) if copy else xml_tree
+
+    def clear(self):
+        """ Removes all trees from the cache
+
+        Returns:
+
+        """
+        with self._lock:
+            self._trees.clear()
+            self.size = 0
+
+    def get_statistics(self):
+        """ Returns the statistics of the cache
+
+        Returns:
+
+        """
+        with self._lock:
+            return {
+                'trees': len(self._trees),
+                'size': self.size,
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def _add(self, key, xml_tree, size):
+        """ Adds a tree to the cache, evicting least recently used trees if needed
+
+        Args:
+            key:
+            xml_tree:
+            size:
+
+        Returns:
+
+        """
+        if size > self.max_size:
+            return
+
+        with self._lock:
+            if key in self._trees:
+                return
+            self._trees[key] = (xml_tree, size)
+            self.size += size
+            while self.size > self.max_size:
+                _, (_, evicted_size) = self._trees.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
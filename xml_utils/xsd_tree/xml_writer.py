@@ -0,0 +1,153 @@
+""" Incremental XML writer, to generate large documents without building their tree
+"""
+from contextlib import contextmanager
+
+import lxml.etree as etree
+
+import xml_utils.commons.constants as xml_constants
+import xml_utils.commons.exceptions as exceptions
+
+# prefixes resolved even if not given to the writer (xml is always kept as is)
+KNOWN_PREFIXES = {
+    'xs': xml_constants.SCHEMA_NAMESPACE,
+    'xsl': xml_constants.XSL_NAMESPACE,
+}
+# names in the xml namespace, in lxml format
+LXML_XML_NAMESPACE = "{" + xml_constants.XML_NAMESPACE + "}"
+
+
+class XMLWriter(object):
+    """ Incremental XML writer built on lxml.etree.xmlfile.
+
+    Elements are opened with nested context managers and written as soon as possible.
+    Tags and attributes can be given in lxml format ({namespace}name) or prefixed
+    (prefix:name), prefixes being resolved with the namespaces given to the writer,
+    then with the known prefixes (xs, xsl).
+    """
+
+    def __init__(self, sink, encoding='utf-8', nsmap=None, flush_interval=1000, xml_declaration=True):
+        """ Initializes the writer
+
+        Args:
+            sink: file name or file object
+            encoding:
+            nsmap: namespaces declared by the root element (prefix -> namespace)
+            flush_interval: number of elements written between two flushes, never flushes if None
+            xml_declaration:
+        """
+        self.nsmap = dict() if nsmap is None else dict(nsmap)
+        self.flush_interval = flush_interval
+        self.xml_declaration = xml_declaration
+        self.elements_written = 0
+        # prefixes in scope for each open element
+        self._scopes = []
+        self._xml_file_context = etree.xmlfile(sink, encoding=encoding)
+        self._xml_file = None
+
+    def __enter__(self):
+        self._xml_file = self._xml_file_context.__enter__()
+        if self.xml_declaration:
+            self._xml_file.write_declaration()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return self._xml_file_context.__exit__(exc_type, exc_val, exc_tb)
+
+    @contextmanager
+    def element(self, tag, attrib=None, **extra):
+        """ Opens an element, closed at the end of the context
+
+        Args:
+            tag:
+            attrib:
+            extra: additional attributes
+
+        Returns:
+
+        """
+        attributes = dict(attrib) if attrib is not None else dict()
+        attributes.update(extra)
+
+        if self._scopes:
+            scope = self._scopes[-1]
+            declarations = dict()
+        else:
+            # the root element declares the namespaces of the writer
+            scope = dict()
+            declarations = dict(self.nsmap)
+
+        tag = self._resolve(tag, scope, declarations)
+        if attributes:
+            attributes = {self._resolve(name, scope, declarations): value for name, value in attributes.items()}
+        if declarations:
+            scope = dict(scope)
+            scope.update(declarations)
+
+        self._scopes.append(scope)
+        try:
+            with self._xml_file.element(tag, attributes, nsmap=declarations):
+                yield self
+        finally:
+            self._scopes.pop()
+        self._element_written()
+
+    def write(self, *contents):
+        """ Writes text or lxml elements in the current element
+
+        Args:
+            contents:
+
+        Returns:
+
+        """
+        self._xml_file.write(*contents)
+        for content in contents:
+            if not isinstance(content, str):
+                self._element_written()
+
+    def flush(self):
+        """ Flushes the written content to the sink
+
+        Returns:
+
+        """
+        self._xml_file.flush()
+
+    def _element_written(self):
+        """ Counts written elements and flushes periodically
+
+        Returns:
+
+        """
+        self.elements_written += 1
+        if self.flush_interval is not None and self.elements_written % self.flush_interval == 0:
+            self.flush()
+
+    def _resolve(self, name, scope, declarations):
+        """ Returns the name in lxml format, declaring its namespace if not in scope
+
+        Args:
+            name:
+            scope: prefixes in scope of the element
+            declarations: namespaces declared by the element, updated if needed
+
+        Returns:
+
+        """
+        # xmlfile does not map the xml namespace to its reserved prefix
+        if name.startswith(LXML_XML_NAMESPACE):
+            return 'xml:' + name[len(LXML_XML_NAMESPACE):]
+        if name.startswith('{') or ':' not in name:
+            return name
+
+        prefix, local_name = name.split(':', 1)
+        if prefix == 'xml':
+            return name
+        namespace = scope.get(prefix) or declarations.get(prefix)
+        if namespace is None:
+            namespace = self.nsmap.get(prefix, KNOWN_PREFIXES.get(prefix))
+            if namespace is None:
+                raise exceptions.XMLError('Unknown namespace prefix: {}.'.format(prefix))
+            declarations[prefix] = namespace
+
+        return '{{{0}}}{1}'.format(namespace, local_name)
@@ -1,66 +1,187 @@
 """ XSD tree operation, build, parse
 """
+import re
+import threading
 from io import BytesIO
+from os import PathLike, fspath
 
 import lxml.etree as etree
 from lxml.etree import Element, SubElement
 
-import xml_utils.commons.constants as xml_constants
 import xml_utils.commons.exceptions as exceptions
+from xml_utils.xsd_tree.xml_writer import XMLWriter
+from xml_utils.xsd_tree.xslt_cache import xslt_cache, transform_many, StylesheetMetadata
+
+# options of the named parser profiles
+PARSER_PROFILES = {
+    # no recovery, no external entities, DTDs or network access
+    'strict': dict(recover=False, resolve_entities=False, load_dtd=False, no_network=True),
+    # drop everything that does not change the content of the document
+    'hash': dict(remove_blank_text=True, remove_comments=True, remove_pis=True, collect_ids=False),
+    # large documents, without xml:id bookkeeping
+    'huge_tree': dict(huge_tree=True, collect_ids=False),
+    # untrusted documents
+    'no_network': dict(no_network=True, resolve_entities=False, load_dtd=False),
+    # rich text fragments (html_tree), parsed through the feed interface
+    'html_fragment': dict(collect_ids=False),
+}
+# parser options not supported by iterparse
+ITERPARSE_IGNORED_OPTIONS = ('collect_ids',)
+
+# parsers instantiated by the current thread, by profile
+_thread_parsers = threading.local()
+
+# steps (tag, {namespace}tag, {*}tag or *) of the paths supported by stream_iterfind
+STREAM_PATH_STEP_REGEX = re.compile(r'(?:\{[^}]*\})?[^/{}\[\]@()=]+')
 
 
 class XSDTree(object):
     """ XSD tree class
     """
 
+    # opt-in cache of parsed trees (XSDTreeCache), disabled if None
+    tree_cache = None
+
     @staticmethod
-    def build_tree(xml_string):
+    def build_tree(xml_string, parser=None):
         """ Returns a lxml etree from an XML string (xml, xsd...)
 
         Args:
-            xml_string:
+            xml_string: XML string, bytes, bytearray, memoryview, path (os.PathLike) or file object (including mmap)
+            parser: parser or name of a parser profile, default parser if None
 
         Returns:
 
         """
-        try:
-            xml_string = BytesIO(xml_string.encode('utf-8'))
-        except Exception:
-            xml_string = BytesIO(xml_string)
+        return etree.parse(_get_xml_source(xml_string), parser=XSDTree._get_parser(parser))
+
+    @staticmethod
+    def build_cached_tree(xml_string, parser=None, copy=True):
+        """ Returns a lxml etree from an XML string, from the tree cache if enabled
 
-        return etree.parse(xml_string)
+        Args:
+            xml_string: XML string or bytes
+            parser: name of a parser profile, default parser if None
+            copy: if False, the tree may be shared with other callers and must not be modified
+
+        Returns:
+
+        """
+        if XSDTree.tree_cache is None:
+            return XSDTree.build_tree(xml_string, parser=parser)
+        return XSDTree.tree_cache.get_tree(xml_string, parser=parser, copy=copy)
 
     @staticmethod
-    def tostring(xml_tree, pretty=False):
+    def set_tree_cache(tree_cache):
+        """ Enables the cache of parsed trees (disables it if None)
+
+        Args:
+            tree_cache: XSDTreeCache
+
+        Returns:
+
+        """
+        XSDTree.tree_cache = tree_cache
+
+    @staticmethod
+    def tostring(xml_tree, pretty=False, encoding='unicode'):
         """ Return an XML String from a lxml etree
 
         Args:
             xml_tree:
             pretty:
+            encoding: 'unicode' returns a string, any other encoding (e.g. 'utf-8') returns bytes
 
         Returns:
 
         """
         try:
-            return etree.tostring(xml_tree, pretty_print=pretty, encoding='unicode')
+            return etree.tostring(xml_tree, pretty_print=pretty, encoding=encoding)
         except Exception as e:
             raise exceptions.XMLError(str(e))
 
     @staticmethod
-    def transform_to_xslt(xml_parsed):
+    def write(xml_tree, sink, encoding='utf-8', pretty=False):
+        """ Write a lxml etree to a file or a socket, without building the XML string in memory
+
+        Args:
+            xml_tree: tree or element
+            sink: file name, file object or socket
+            encoding:
+            pretty:
+
+        Returns:
+
+        """
+        if not hasattr(xml_tree, 'write'):
+            xml_tree = etree.ElementTree(xml_tree)
+
+        try:
+            if hasattr(sink, 'sendall') and not hasattr(sink, 'write'):
+                # sockets are written through a buffered file object
+                with sink.makefile('wb') as socket_file:
+                    xml_tree.write(socket_file, encoding=encoding, pretty_print=pretty)
+            else:
+                xml_tree.write(sink, encoding=encoding, pretty_print=pretty)
+        except Exception as e:
+            raise exceptions.XMLError(str(e))
+
+    @staticmethod
+    def incremental_writer(sink, encoding='utf-8', nsmap=None, flush_interval=1000):
+        """ Returns an incremental writer, to generate a document element by element
+
+        Args:
+            sink: file name or file object
+            encoding:
+            nsmap: namespaces declared by the root element
+            flush_interval: number of elements written between two flushes
+
+        Returns:
+            XMLWriter, to use as a context manager
+
+        """
+        return XMLWriter(sink, encoding=encoding, nsmap=nsmap, flush_interval=flush_interval)
+
+    @staticmethod
+    def transform_to_xslt(xml_parsed, cached=False):
         """ Turn an XML document into an XSLT object.
 
         Args:
             xml_parsed:
+            cached: returns the XSLT object compiled by the current thread for the same stylesheet
 
         Returns:
 
         """
+        if cached:
+            try:
+                return xslt_cache.get_xslt(xml_parsed)
+            except Exception as e:
+                raise exceptions.XMLError(str(e))
+
         try:
             return etree.XSLT(xml_parsed)
         except:
             return etree.XSLT(xml_parsed.encode('utf-8'))
 
+    @staticmethod
+    def transform_many(xslt, xml_documents, processes=None):
+        """ Transforms several documents with the same (cached) stylesheet.
+
+        Args:
+            xslt: stylesheet (tree or element), string or bytes
+            xml_documents: XML strings or bytes
+            processes: number of worker processes, transforms in the current process if None
+
+        Returns:
+            list of transformation results, as strings
+
+        """
+        try:
+            return transform_many(xslt, xml_documents, processes=processes)
+        except Exception as e:
+            raise exceptions.XMLError(str(e))
+
     @staticmethod
     def transform_to_xml(xml_string):
         """ Turn an XML document into an XML object.
@@ -82,13 +203,13 @@ class XSDTree(object):
 
         Args:
             xml_string:
-            parser:
+            parser: parser or name of a parser profile, default parser if None
 
         Returns:
 
         """
         try:
-            return etree.fromstring(xml_string, parser=parser)
+            return etree.fromstring(xml_string, parser=XSDTree._get_parser(parser))
         except Exception as e:
             raise exceptions.XMLError(str(e))
 
@@ -110,22 +231,145 @@ class XSDTree(object):
             raise exceptions.XMLError(str(e))
 
     @staticmethod
-    def iterparse(xml_string, events):
+    def stream_iterfind(xml_string, match):
+        """ Finds all matching sub elements while parsing, without building the whole tree.
+
+        Only supports paths made of tags (tag, {namespace}tag, {*}tag or *) separated by /,
+        optionally starting with .// to match at any depth. Matching elements are yielded
+        when their end tag is parsed, then cleared with their processed siblings, and the
+        processed siblings of their ancestors, when the next element is requested. Stopping
+        the iteration stops reading the document.
+
+        Args:
+            xml_string: XML string, bytes, bytearray, memoryview, path (os.PathLike) or file object
+            match: Pattern to match
+
+        Returns:
+            A generator yielding all matching elements.
+
+        """
+        descendants, steps = _parse_stream_path(match)
+        # only generate events for the last tag of the path
+        tag = None if steps[-1] == '*' else steps[-1]
+        # matching status of the open elements, and number of open matching elements
+        open_elements = []
+        open_matches = 0
+
+        try:
+            for event, element in etree.iterparse(_get_xml_source(xml_string), ('start', 'end'), tag=tag):
+                if event == 'start':
+                    # ancestors are known when the start tag is parsed
+                    is_match = _match_stream_path(element, descendants, steps)
+                    open_elements.append(is_match)
+                    open_matches += is_match
+                    continue
+
+                if open_elements.pop():
+                    open_matches -= 1
+                    yield element
+
+                # keep the content of matching elements not yielded yet
+                if open_matches == 0 and element.getparent() is not None:
+                    element.clear()
+                    # delete processed siblings, at every level (ancestors not matching get no events)
+                    node = element
+                    parent = node.getparent()
+                    while parent is not None:
+                        while node.getprevious() is not None:
+                            del parent[0]
+                        node = parent
+                        parent = node.getparent()
+        except Exception as e:
+            raise exceptions.XMLError(str(e))
+
+    @staticmethod
+    def iterparse(xml_string, events, profile=None):
         """ Returns etree.iterparse
 
         Args:
             xml_string:
             events:
+            profile: name of a parser profile, iterparse creates its own parser from its options
 
         Returns:
 
         """
         try:
             xml_file = BytesIO(xml_string.encode('utf-8'))
-            return etree.iterparse(xml_file, events)
+            options = dict()
+            if profile is not None:
+                options = {option: value for option, value in XSDTree.get_parser_profile(profile).items()
+                           if option not in ITERPARSE_IGNORED_OPTIONS}
+            return etree.iterparse(xml_file, events, **options)
         except Exception as e:
             raise exceptions.XMLError(str(e))
 
+    @staticmethod
+    def get_parser(profile):
+        """ Returns the parser of a profile, instantiated once per thread and reused
+
+        Args:
+            profile: name of the parser profile
+
+        Returns:
+
+        """
+        parsers = getattr(_thread_parsers, 'parsers', None)
+        if parsers is None:
+            parsers = _thread_parsers.parsers = dict()
+
+        parser = parsers.get(profile)
+        if parser is None:
+            parser = etree.XMLParser(**XSDTree.get_parser_profile(profile))
+            parsers[profile] = parser
+
+        return parser
+
+    @staticmethod
+    def register_parser_profile(profile, **options):
+        """ Registers a new parser profile
+
+        Args:
+            profile: name of the parser profile
+            options: options of the parser
+
+        Returns:
+
+        """
+        if profile in PARSER_PROFILES:
+            raise exceptions.XMLError('Parser profile {} is already registered.'.format(profile))
+        PARSER_PROFILES[profile] = options
+
+    @staticmethod
+    def get_parser_profile(profile):
+        """ Returns the options of a parser profile
+
+        Args:
+            profile: name of the parser profile
+
+        Returns:
+            copy of the options of the parser
+
+        """
+        try:
+            return dict(PARSER_PROFILES[profile])
+        except KeyError:
+            raise exceptions.XMLError('Unknown parser profile: {}.'.format(profile))
+
+    @staticmethod
+    def _get_parser(parser):
+        """ Returns the parser to use from a parser or a profile name
+
+        Args:
+            parser:
+
+        Returns:
+
+        """
+        if isinstance(parser, str):
+            return XSDTree.get_parser(parser)
+        return parser
+
     @staticmethod
     def get_extension(xml_tree):
         """ Returns the extension file from a parsed xml
@@ -135,10 +379,29 @@ class XSDTree(object):
 
         Returns:
 
+        """
+        if isinstance(xml_tree, (str, bytes)):
+            xml_tree = XSDTree.build_tree(xml_tree)
+        # read from the tree: no serialization, and the XSLT cache is kept for compiled stylesheets
+        method = StylesheetMetadata.from_stylesheet(xml_tree).method
+        if method is None:
+            raise exceptions.XMLError('The stylesheet does not declare an output method.')
+        return method
+
+    @staticmethod
+    def get_stylesheet_metadata(xslt):
+        """ Returns the output settings (method, encoding, indent, media type) of a stylesheet,
+        cached with its compiled XSLT
+
+        Args:
+            xslt: stylesheet (tree or element), string or bytes
+
+        Returns:
+            StylesheetMetadata
+
         """
         try:
-            return xml_tree.find("//xsl:output",
-                                 namespaces={'xsl': xml_constants.XSL_NAMESPACE}).attrib['method']
+            return xslt_cache.get_metadata(xslt)
         except Exception as e:
             raise exceptions.XMLError(str(e))
 
@@ -172,3 +435,115 @@ class XSDTree(object):
         Returns:
         """
         return SubElement(parent, tag, attrib, nsmap, **extra)
+
+
+def _get_xml_source(xml_string):
+    """ Returns a source for the lxml parsers from an XML input
+
+    Args:
+        xml_string: XML string, bytes, bytearray, memoryview, path (os.PathLike) or file object (including mmap)
+
+    Returns:
+
+    """
+    if isinstance(xml_string, str):
+        return BytesIO(xml_string.encode('utf-8'))
+    elif isinstance(xml_string, bytes):
+        # bytes are shared by BytesIO, not copied
+        return BytesIO(xml_string)
+    elif isinstance(xml_string, (bytearray, memoryview)):
+        # buffers are read by chunks, not copied as a whole
+        return _BufferReader(xml_string)
+    elif isinstance(xml_string, PathLike):
+        # files are read by libxml2
+        return fspath(xml_string)
+    elif hasattr(xml_string, 'read'):
+        return xml_string
+    return BytesIO(xml_string)
+
+
+def _parse_stream_path(match):
+    """ Returns the steps of a path supported by stream_iterfind
+
+    Args:
+        match:
+
+    Returns:
+        tuple<bool, list>: True if matching at any depth, list of tags
+
+    """
+    descendants = match.startswith('.//')
+    path = match[3:] if descendants else match[2:] if match.startswith('./') else match
+    steps = STREAM_PATH_STEP_REGEX.findall(path)
+
+    if len(steps) == 0 or '/'.join(steps) != path or any(step in ('.', '..') for step in steps):
+        raise exceptions.XMLError('Unsupported path for stream_iterfind: {}.'.format(match))
+
+    return descendants, steps
+
+
+def _match_stream_path(element, descendants, steps):
+    """ Checks if an element matches the steps of a path, from its ancestors
+
+    Args:
+        element:
+        descendants: True if matching at any depth
+        steps:
+
+    Returns:
+
+    """
+    for step in reversed(steps):
+        if element is None or not _match_stream_step(element.tag, step):
+            return False
+        element = element.getparent()
+
+    # the first step is a child of the root, or a descendant if matching at any depth
+    if element is None:
+        return False
+    return descendants or element.getparent() is None
+
+
+def _match_stream_step(tag, step):
+    """ Checks if a tag matches a step of a path
+
+    Args:
+        tag:
+        step:
+
+    Returns:
+
+    """
+    if step == '*':
+        return True
+    if step.startswith('{*}'):
+        return tag.rsplit('}', 1)[-1] == step[3:]
+    return tag == step
+
+
+class _BufferReader(object):
+    """ File-like reader over a buffer (bytearray, memoryview), returning chunks of it
+    """
+
+    def __init__(self, buffer):
+        """ Initializes the reader
+
+        Args:
+            buffer:
+        """
+        self.buffer = memoryview(buffer).cast('B')
+        self.position = 0
+
+    def read(self, size=-1):
+        """ Returns the next chunk of the buffer
+
+        Args:
+            size:
+
+        Returns:
+
+        """
+        end = len(self.buffer) if size is None or size < 0 else self.position + size
+        chunk = self.buffer[self.position:end].tobytes()
+        self.position += len(chunk)
+        return chunk
@@ -0,0 +1,226 @@
+""" Cache of compiled XSLT stylesheets, keyed by digest of the stylesheet
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import lxml.etree as etree
+
+import xml_utils.commons.constants as xml_constants
+
+# tag of the xsl:output element, in lxml format
+XSL_OUTPUT_TAG = "{" + xml_constants.XSL_NAMESPACE + "}output"
+
+
+class StylesheetMetadata(object):
+    """ Output settings of a stylesheet (xsl:output).
+    """
+
+    __slots__ = ('method', 'encoding', 'indent', 'media_type')
+
+    def __init__(self, method=None, encoding=None, indent=None, media_type=None):
+        """ Initializes the metadata
+
+        Args:
+            method: output method (xml, html, text...), None if not set
+            encoding:
+            indent: True if the output is indented, None if not set
+            media_type:
+        """
+        self.method = method
+        self.encoding = encoding
+        self.indent = indent
+        self.media_type = media_type
+
+    @classmethod
+    def from_stylesheet(cls, stylesheet):
+        """ Reads the metadata from the top-level xsl:output elements of a stylesheet
+
+        Args:
+            stylesheet: parsed stylesheet (tree or element)
+
+        Returns:
+
+        """
+        root = stylesheet.getroot() if hasattr(stylesheet, 'getroot') else stylesheet
+        attributes = dict()
+        # xsl:output is a top-level element, later declarations take precedence
+        for output in root.iterchildren(XSL_OUTPUT_TAG):
+            attributes.update(output.attrib)
+
+        indent = attributes.get('indent')
+        return cls(method=attributes.get('method'),
+                   encoding=attributes.get('encoding'),
+                   indent=None if indent is None else indent.strip() == 'yes',
+                   media_type=attributes.get('media-type'))
+
+
+class XSLTCache(object):
+    """ Cache of compiled XSLT stylesheets.
+
+    XSLT objects are not thread safe: stylesheets are parsed once and shared,
+    with their metadata, but each thread compiles and keeps its own XSLT objects.
+    """
+
+    def __init__(self, max_size=32):
+        """ Initializes the cache
+
+        Args:
+            max_size: maximum number of stylesheets kept (per thread for compiled ones)
+        """
+        self.max_size = max_size
+        # digest -> (parsed stylesheet, metadata)
+        self._stylesheets = OrderedDict()
+        self._lock = threading.Lock()
+        # digest -> compiled XSLT, for the current thread
+        self._thread_transformers = threading.local()
+
+    def get_xslt(self, xslt):
+        """ Returns the compiled XSLT of a stylesheet, for the current thread
+
+        Args:
+            xslt: parsed stylesheet (tree or element), string or bytes
+
+        Returns:
+
+        """
+        digest, (stylesheet, _) = self._get_stylesheet(xslt)
+
+        transformers = getattr(self._thread_transformers, 'transformers', None)
+        if transformers is None:
+            transformers = self._thread_transformers.transformers = OrderedDict()
+
+        transformer = transformers.get(digest)
+        if transformer is None:
+            transformer = etree.XSLT(stylesheet)
+            transformers[digest] = transformer
+            if len(transformers) > self.max_size:
+                transformers.popitem(last=False)
+        else:
+            transformers.move_to_end(digest)
+
+        return transformer
+
+    def get_metadata(self, xslt):
+        """ Returns the metadata of a stylesheet, read once per stylesheet
+
+        Args:
+            xslt: parsed stylesheet (tree or element), string or bytes
+
+        Returns:
+            StylesheetMetadata
+
+        """
+        _, (_, metadata) = self._get_stylesheet(xslt)
+        return metadata
+
+    def clear(self):
+        """ Removes all stylesheets from the cache (compiled ones are dropped by the current thread only)
+
+        Returns:
+
+        """
+        with self._lock:
+            self._stylesheets.clear()
+        self._thread_transformers.transformers = OrderedDict()
+
+    def _get_stylesheet(self, xslt):
+        """ Returns the digest and the shared parsed stylesheet and metadata
+
+        Args:
+            xslt:
+
+        Returns:
+
+        """
+        if isinstance(xslt, str):
+            xslt = xslt.encode('utf-8')
+        xslt_bytes = xslt if isinstance(xslt, bytes) else etree.tostring(xslt)
+        digest = hashlib.sha1(xslt_bytes).hexdigest()
+
+        with self._lock:
+            cached = self._stylesheets.get(digest)
+            if cached is not None:
+                self._stylesheets.move_to_end(digest)
+                return digest, cached
+
+        stylesheet = etree.XML(xslt_bytes).getroottree()
+        cached = (stylesheet, StylesheetMetadata.from_stylesheet(stylesheet))
+        with self._lock:
+            self._stylesheets[digest] = cached
+            if len(self._stylesheets) > self.max_size:
+                self._stylesheets.popitem(last=False)
+
+        return digest, cached
+
+
+# cache shared by XSDTree
+xslt_cache = XSLTCache()
+
+
+def transform_many(xslt, xml_documents, processes=None, chunk_size=16):
+    """ Transforms several documents with the same stylesheet
+
+    Args:
+        xslt: stylesheet (tree or element), string or bytes
+        xml_documents: XML strings or bytes
+        processes: number of worker processes, transforms in the current process if None or 1
+        chunk_size: number of documents sent at once to a worker process
+
+    Returns:
+        list of transformation results, as strings
+
+    """
+    if processes is None or processes <= 1:
+        transformer = xslt_cache.get_xslt(xslt)
+        return [_transform(transformer, xml_document) for xml_document in xml_documents]
+
+    if not isinstance(xslt, (str, bytes)):
+        xslt = etree.tostring(xslt)
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(xslt,)) as executor:
+        return list(executor.map(_transform_in_worker, xml_documents, chunksize=chunk_size))
+
+
+# stylesheet of the current worker process
+_worker_xslt = None
+
+
+def _init_worker(xslt):
+    """ Compiles the stylesheet once per worker process
+
+    Args:
+        xslt:
+
+    Returns:
+
+    """
+    global _worker_xslt
+    _worker_xslt = xslt_cache.get_xslt(xslt)
+
+
+def _transform_in_worker(xml_document):
+    """ Transforms a document in a worker process
+
+    Args:
+        xml_document:
+
+    Returns:
+
+    """
+    return _transform(_worker_xslt, xml_document)
+
+
+def _transform(transformer, xml_document):
+    """ Transforms a document and returns the result as a string
+
+    Args:
+        transformer:
+        xml_document: XML string or bytes
+
+    Returns:
+
+    """
+    if isinstance(xml_document, str):
+        xml_document = xml_document.encode('utf-8')
+    return str(transformer(etree.XML(xml_document)))
@@ -0,0 +1,440 @@
+"""Batch validation and coercion of text values according to their XSD builtin type
+"""
+import re
+from datetime import date, datetime
+from itertools import compress, count
+from operator import itemgetter, not_
+from decimal import Decimal, InvalidOperation
+
+from xml_utils.commons.exceptions import XMLError
+from xml_utils.xsd_types.xsd_types import get_xsd_numbers_set, get_xsd_floating_numbers_set
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# categories of builtin types
+INTEGER = 'integer'
+DECIMAL = 'decimal'
+FLOATING = 'floating'
+BOOLEAN = 'boolean'
+DATE = 'date'
+DATE_TIME = 'dateTime'
+STRING = 'string'
+
+# lexical space of each category, after whitespace collapsing
+LEXICAL_PATTERNS = {
+    INTEGER: r'[+-]?[0-9]+',
+    DECIMAL: r'[+-]?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)',
+    FLOATING: r'[+-]?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)(?:[eE][+-]?[0-9]+)?|[+-]?INF|NaN',
+    BOOLEAN: r'true|false|1|0',
+    DATE: r'[0-9]{4}-[0-9]{2}-[0-9]{2}(?:Z|[+-][0-9]{2}:[0-9]{2})?',
+    DATE_TIME: r'[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}(?:\.[0-9]+)?(?:Z|[+-][0-9]{2}:[0-9]{2})?',
+}
+# one value per line, matched in one pass over a whole column, or value by value
+COLUMN_REGEXES = {category: re.compile('^(?:{})$'.format(pattern), re.MULTILINE | re.ASCII)
+                  for category, pattern in LEXICAL_PATTERNS.items()}
+VALUE_REGEXES = {category: re.compile('(?:{})'.format(pattern), re.ASCII)
+                 for category, pattern in LEXICAL_PATTERNS.items()}
+# local part and timezone (possibly empty) of each valid date or dateTime of a column
+TIMEZONE_PATTERN = '(Z|[+-][0-9]{2}:[0-9]{2})?'
+DATE_PARTS_REGEXES = {
+    DATE: re.compile('^([0-9]{4}-[0-9]{2}-[0-9]{2})' + TIMEZONE_PATTERN + '$', re.MULTILINE),
+    DATE_TIME: re.compile('^([0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}(?:\\.[0-9]+)?)'
+                          + TIMEZONE_PATTERN + '$', re.MULTILINE),
+}
+
+# value space (min, max) of integer types, None if not bounded
+INTEGER_RANGES = {
+    'integer': (None, None),
+    'nonNegativeInteger': (0, None),
+    'positiveInteger': (1, None),
+    'nonPositiveInteger': (None, 0),
+    'negativeInteger': (None, -1),
+    'long': (-2 ** 63, 2 ** 63 - 1),
+    'int': (-2 ** 31, 2 ** 31 - 1),
+    'short': (-2 ** 15, 2 ** 15 - 1),
+    'byte': (-2 ** 7, 2 ** 7 - 1),
+    'unsignedLong': (0, 2 ** 64 - 1),
+    'unsignedInt': (0, 2 ** 32 - 1),
+    'unsignedShort': (0, 2 ** 16 - 1),
+    'unsignedByte': (0, 2 ** 8 - 1),
+}
+# characters of the lexical space of numeric categories (and whitespace), as translation tables deleting them
+LEXICAL_CHARACTERS = {
+    INTEGER: str.maketrans('', '', '0123456789+- \t\r\n'),
+    DECIMAL: str.maketrans('', '', '0123456789+-. \t\r\n'),
+    FLOATING: str.maketrans('', '', '0123456789+-.eEINFa \t\r\n'),
+}
+BOOLEAN_VALUES = {'true': True, '1': True, 'false': False, '0': False}
+
+
+class CoercedColumn(object):
+    """ Typed values of a column, and positions of the values that are not valid for the type.
+
+    values is a NumPy array or a list. Invalid values are replaced by a fill value
+    (0, NaN, False or NaT) in arrays, and by None in lists.
+    """
+
+    __slots__ = ('xsd_type', 'category', 'values', 'invalid')
+
+    def __init__(self, xsd_type, category, values, invalid):
+        """ Initializes the column
+
+        Args:
+            xsd_type:
+            category:
+            values:
+            invalid: sorted list of the positions of invalid values
+        """
+        self.xsd_type = xsd_type
+        self.category = category
+        self.values = values
+        self.invalid = invalid
+
+
+def get_type_category(xsd_type):
+    """ Returns the category of a builtin type
+
+    Args:
+        xsd_type: local, prefixed or expanded ({namespace}local) name of the type
+
+    Returns:
+
+    """
+    local_name = _get_local_name(xsd_type)
+    if local_name in get_xsd_floating_numbers_set():
+        return DECIMAL if local_name == 'decimal' else FLOATING
+    if local_name in get_xsd_numbers_set():
+        return INTEGER
+    if local_name in (BOOLEAN, DATE, DATE_TIME):
+        return local_name
+    return STRING
+
+
+def coerce_column(values, xsd_type, as_array=None):
+    """ Converts a column of text values to typed values
+
+    Values are validated and converted column by column; a Python loop over
+    the values only runs to locate invalid values, when there are some.
+    Integers are checked against the value space of bounded integer types.
+
+    Args:
+        values: list of strings
+        xsd_type: local, prefixed or expanded name of the builtin type
+        as_array: returns a NumPy array if True, a list if False, an array if NumPy is installed if None
+
+    Returns:
+        CoercedColumn
+
+    """
+    if as_array is None:
+        as_array = numpy is not None
+    elif as_array and numpy is None:
+        raise XMLError('NumPy is required to coerce values to arrays.')
+
+    category = get_type_category(xsd_type)
+    if category == STRING:
+        return CoercedColumn(xsd_type, category, numpy.array(values, dtype=object) if as_array else list(values), [])
+
+    typed_values = None
+    # int, float and Decimal ignore surrounding whitespace: columns only made of characters
+    # of the lexical space are converted at once, the conversion rejecting malformed values
+    if category in LEXICAL_CHARACTERS and _has_lexical_characters(values, category):
+        try:
+            typed_values = _convert(values, category, as_array)
+            invalid = []
+        except ValueError:
+            pass
+
+    if typed_values is None:
+        # whitespace is collapsed for all non-string types
+        stripped_values = list(map(str.strip, values))
+        invalid = _find_invalid(stripped_values, category)
+        if invalid:
+            # replace invalid values by a valid one of the category, to convert the column at once
+            fill_value = _get_fill_value(category)
+            for position in invalid:
+                stripped_values[position] = fill_value
+
+        if category in (DATE, DATE_TIME):
+            typed_values, unsupported = _parse_dates(stripped_values, category, as_array)
+            if unsupported:
+                invalid = sorted(set(invalid).union(unsupported))
+        else:
+            typed_values = _convert(stripped_values, category, as_array)
+
+    if category == INTEGER:
+        out_of_range = _find_out_of_range(typed_values, INTEGER_RANGES.get(_get_local_name(xsd_type)))
+        if out_of_range:
+            invalid = sorted(set(invalid).union(out_of_range))
+
+    if as_array:
+        return CoercedColumn(xsd_type, category, _to_array(typed_values, category, invalid), invalid)
+
+    for position in invalid:
+        typed_values[position] = None
+    return CoercedColumn(xsd_type, category, typed_values, invalid)
+
+
+def coerce_columns(columns, xsd_types, as_array=None):
+    """ Converts several columns of text values to typed values
+
+    Args:
+        columns: dict of column name -> list of strings
+        xsd_types: dict of column name -> builtin type, columns without type are kept as strings
+        as_array:
+
+    Returns:
+        dict of column name -> CoercedColumn
+
+    """
+    return {name: coerce_column(values, xsd_types.get(name, STRING), as_array=as_array)
+            for name, values in columns.items()}
+
+
+def _get_local_name(xsd_type):
+    """ Returns the local name of a type name
+
+    Args:
+        xsd_type:
+
+    Returns:
+
+    """
+    if xsd_type.startswith('{'):
+        return xsd_type[xsd_type.index('}') + 1:]
+    return xsd_type.rpartition(':')[2]
+
+
+def _has_lexical_characters(values, category):
+    """ Returns True if the values only contain characters of the lexical space of a numeric category
+
+    Args:
+        values:
+        category:
+
+    Returns:
+
+    """
+    column = '\n'.join(values)
+    if column.translate(LEXICAL_CHARACTERS[category]):
+        return False
+    # NaN has no sign, but float accepts one
+    return category != FLOATING or not ('+NaN' in column or '-NaN' in column)
+
+
+def _convert(values, category, as_array):
+    """ Converts valid values of a numeric or boolean category, raises ValueError if a value is not valid
+
+    Args:
+        values:
+        category:
+        as_array:
+
+    Returns:
+
+    """
+    if category == INTEGER:
+        return list(map(int, values))
+    if category == DECIMAL:
+        try:
+            return list(map(float if as_array else Decimal, values))
+        except InvalidOperation:
+            raise ValueError('Invalid decimal value.')
+    if category == FLOATING:
+        return list(map(float, values))
+    try:
+        return list(map(BOOLEAN_VALUES.__getitem__, values))
+    except KeyError:
+        raise ValueError('Invalid boolean value.')
+
+
+def _find_invalid(values, category):
+    """ Returns the positions of the values that do not match the lexical space of a category
+
+    Args:
+        values: stripped values
+        category:
+
+    Returns:
+
+    """
+    column = '\n'.join(values)
+    if column.count('\n') != len(values) - 1:
+        # some values span several lines
+        fullmatch = VALUE_REGEXES[category].fullmatch
+        return [position for position, value in enumerate(values) if fullmatch(value) is None]
+
+    # valid values are erased in one pass over the column, invalid (and empty) ones are left
+    remaining_values = COLUMN_REGEXES[category].sub('', column).split('\n')
+    invalid = set(compress(count(), remaining_values))
+    invalid.update(compress(count(), map(not_, values)))
+    return sorted(invalid)
+
+
+def _find_out_of_range(values, value_range):
+    """ Returns the positions of the integers out of the value space of their type
+
+    Args:
+        values:
+        value_range: (min, max), None if not bounded
+
+    Returns:
+
+    """
+    if not values or value_range is None:
+        return []
+
+    min_value, max_value = value_range
+    if (min_value is None or min(values) >= min_value) and (max_value is None or max(values) <= max_value):
+        return []
+
+    return [position for position, value in enumerate(values)
+            if (min_value is not None and value < min_value) or (max_value is not None and value > max_value)]
+
+
+def _get_fill_value(category):
+    """ Returns a valid text value of a category
+
+    Args:
+        category:
+
+    Returns:
+
+    """
+    if category == BOOLEAN:
+        return 'false'
+    if category == DATE:
+        return '1970-01-01'
+    if category == DATE_TIME:
+        return '1970-01-01T00:00:00'
+    return '0'
+
+
+def _parse_dates(values, category, as_array):
+    """ Converts valid date or dateTime values
+
+    Args:
+        values: valid values
+        category:
+        as_array: returns a NumPy array of dates (days) or dateTimes (microseconds, in UTC if they have a timezone)
+
+    Returns:
+        typed values, positions of the values not supported by Python or NumPy (out of range dates)
+
+    """
+    if as_array:
+        return _parse_date_array(values, category)
+
+    if category == DATE:
+        # Python dates have no timezone
+        values = list(map(itemgetter(0), DATE_PARTS_REGEXES[DATE].findall('\n'.join(values))))
+        parse = date.fromisoformat
+    else:
+        column = '\n'.join(values).replace('Z\n', '+00:00\n')
+        if column.endswith('Z'):
+            column = column[:-1] + '+00:00'
+        values = column.split('\n')
+        parse = datetime.fromisoformat
+
+    try:
+        typed_values = list(map(parse, values))
+        unsupported = []
+    except ValueError:
+        typed_values = []
+        unsupported = []
+        for position, value in enumerate(values):
+            try:
+                typed_values.append(parse(value))
+            except ValueError:
+                typed_values.append(parse(_get_fill_value(category)))
+                unsupported.append(position)
+
+    return typed_values, unsupported
+
+
+def _parse_date_array(values, category):
+    """ Converts valid date or dateTime values to a NumPy array, timezones being applied to dateTimes
+
+    Args:
+        values: valid values
+        category:
+
+    Returns:
+        array, positions of the values not supported by NumPy
+
+    """
+    # NumPy parses dates without timezone
+    parts = DATE_PARTS_REGEXES[category].findall('\n'.join(values))
+    local_values = list(map(itemgetter(0), parts))
+    dtype = 'datetime64[D]' if category == DATE else 'datetime64[us]'
+    unsupported = []
+    try:
+        array = numpy.array(local_values, dtype=dtype)
+    except ValueError:
+        array = numpy.empty(len(local_values), dtype=dtype)
+        for position, value in enumerate(local_values):
+            try:
+                array[position] = numpy.datetime64(value)
+            except ValueError:
+                array[position] = numpy.datetime64('NaT')
+                unsupported.append(position)
+
+    timezones = list(map(itemgetter(1), parts))
+    if category == DATE_TIME and any(timezones):
+        # timezones of the values, as offsets in minutes
+        offsets = {timezone_value: _get_timezone_offset(timezone_value) for timezone_value in set(timezones)}
+        array -= numpy.array(list(map(offsets.__getitem__, timezones)), dtype='timedelta64[m]')
+
+    return array, unsupported
+
+
+def _get_timezone_offset(timezone_value):
+    """ Returns the offset in minutes of a timezone (Z, +hh:mm or -hh:mm), 0 if empty
+
+    Args:
+        timezone_value:
+
+    Returns:
+
+    """
+    if timezone_value in ('', 'Z'):
+        return 0
+    offset = int(timezone_value[1:3]) * 60 + int(timezone_value[4:6])
+    return -offset if timezone_value[0] == '-' else offset
+
+
+def _to_array(values, category, invalid):
+    """ Returns the NumPy array of typed values, invalid values being replaced by a fill value
+
+    Args:
+        values:
+        category:
+        invalid:
+
+    Returns:
+
+    """
+    if category == INTEGER:
+        try:
+            array = numpy.array(values, dtype=numpy.int64)
+        except OverflowError:
+            # integers out of the 64 bits range (unbounded or unsigned long types)
+            array = numpy.array(values, dtype=object)
+    elif category in (DECIMAL, FLOATING):
+        array = numpy.array(values, dtype=numpy.float64)
+    elif category == BOOLEAN:
+        array = numpy.array(values, dtype=bool)
+    else:
+        array = numpy.array(values, dtype='datetime64[D]' if category == DATE else 'datetime64[us]')
+
+    if invalid:
+        if category in (DECIMAL, FLOATING):
+            array[invalid] = numpy.nan
+        elif category in (DATE, DATE_TIME):
+            array[invalid] = numpy.datetime64('NaT')
+        else:
+            array[invalid] = 0
+    return array
@@ -1,5 +1,8 @@
 """XSD types utils
 """
+from functools import lru_cache
+
+from xml_utils.commons import constants as xml_utils_constants
 
 
 def get_xsd_types(namespace_prefix=''):
@@ -44,7 +47,6 @@ def get_xsd_types(namespace_prefix=''):
             "{0}unsignedInt".format(namespace_prefix),
             "{0}unsignedShort".format(namespace_prefix),
             "{0}unsignedByte".format(namespace_prefix),
-            "{0}long".format(namespace_prefix),
             "{0}int".format(namespace_prefix),
             "{0}short".format(namespace_prefix),
             "{0}byte".format(namespace_prefix)]
@@ -95,3 +97,58 @@ def get_xsd_floating_numbers(namespace_prefix=''):
         '{0}float'.format(namespace_prefix),
         '{0}double'.format(namespace_prefix),
         '{0}decimal'.format(namespace_prefix)]
+
+
+@lru_cache(maxsize=None)
+def get_xsd_types_set(namespace_prefix=''):
+    """Returns the set of all supported XSD types, computed once per prefix
+
+    Args:
+        namespace_prefix:
+
+    Returns:
+
+    """
+    return frozenset(get_xsd_types(namespace_prefix))
+
+
+@lru_cache(maxsize=None)
+def get_xsd_numbers_set(namespace_prefix=''):
+    """Returns the set of formatted xsd number types, computed once per prefix
+
+    Args:
+        namespace_prefix:
+
+    Returns:
+
+    """
+    return frozenset(get_xsd_numbers(namespace_prefix))
+
+
+@lru_cache(maxsize=None)
+def get_xsd_floating_numbers_set(namespace_prefix=''):
+    """Returns the set of formatted xsd floating number types, computed once per prefix
+
+    Args:
+        namespace_prefix:
+
+    Returns:
+
+    """
+    return frozenset(get_xsd_floating_numbers(namespace_prefix))
+
+
+# supported XSD types, as expanded names ({namespace}local)
+BUILTIN_TYPES = frozenset(xml_utils_constants.LXML_SCHEMA_NAMESPACE + xsd_type for xsd_type in get_xsd_types())
+
+
+def is_builtin_type(qname):
+    """Returns True if the expanded name ({namespace}local) is a supported XSD type
+
+    Args:
+        qname:
+
+    Returns:
+
+    """
+    return qname in BUILTIN_TYPES